@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Frootlab
+# Copyright (C) 2013-2019 Patrick Michl
+#
+# This file is part of Frootlab Rian, https://www.frootlab.org/rian
+#
+#  Rian is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  Rian is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#  You should have received a copy of the GNU General Public License along with
+#  Rian. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Runner script for benchmarks.
+
+Usage:
+    python -m benchmarks [options] [pattern]
+
+The optional pattern filters the benchmark cases by their keys, which are
+given by '<module>.<class>.<case>[<scale>]', e.g. 'system.Optimizer.*'.
+
+Options:
+    --scales: Comma separated list of scales. Default: 'small,medium'
+    --repeat: Number of timed calls per benchmark case. Default: 3
+    --baseline: Path of JSON file with stored benchmark results.
+        Default: 'baseline.json' within the benchmarks directory
+    --threshold: Maximum accepted relative increase of the wall time with
+        respect to the baseline. Default: 0.25
+    --memthreshold: Maximum accepted relative increase of the peak memory
+        with respect to the baseline. Default: value of threshold
+    --save: Store the results as baseline
+
+If any benchmark case regressed with respect to the baseline, the script
+exits with status 1.
+
+"""
+
+__copyright__ = '2019 Frootlab'
+__license__ = 'GPLv3'
+__docformat__ = 'google'
+__author__ = 'Frootlab Developers'
+__email__ = 'contact@frootlab.org'
+__authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
+
+import argparse
+import fnmatch
+import importlib
+import os
+import pkgutil
+import sys
+from rian.core import ui
+
+#
+# Script Configuration
+#
+
+package_name = 'rian'
+
+#
+# Runner Script
+#
+
+if __name__ == "__main__":
+    root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(prog='benchmarks')
+    parser.add_argument('pattern', nargs='?', default='*')
+    parser.add_argument('--scales', default='small,medium')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument(
+        '--baseline', default=os.path.join(root, 'baseline.json'))
+    parser.add_argument('--threshold', type=float, default=.25)
+    parser.add_argument('--memthreshold', type=float, default=None)
+    parser.add_argument('--save', action='store_true')
+    args = parser.parse_args()
+
+    # Import package and benchmarks
+    sys.path.insert(0, os.path.dirname(root))
+    package = importlib.import_module(package_name)
+    base = importlib.import_module('benchmarks.base')
+
+    # Search Benchmarks within modules with prefix 'bench_'
+    benchmarks = []
+    for info in pkgutil.iter_modules([root]):
+        if not info.name.startswith('bench_'):
+            continue
+        module = importlib.import_module('benchmarks.' + info.name)
+        for name, cls in sorted(vars(module).items()):
+            if not isinstance(cls, type) or cls is base.Benchmark:
+                continue
+            if not issubclass(cls, base.Benchmark):
+                continue
+            if cls.__module__ != module.__name__:
+                continue
+            benchmarks.append((info.name[6:] + '.' + name, cls))
+
+    # Measure benchmark cases
+    package_version = getattr(package, '__version__', '')
+    ui.info(f"benchmarking {package_name} {package_version}")
+    cur_level = ui.get_notification_level()
+    ui.set_notification_level('CRITICAL')
+    scales = [scale for scale in args.scales.split(',') if scale]
+    results = {}
+    try:
+        for prefix, cls in benchmarks:
+            bench = cls()
+            for scale in scales:
+                if scale not in bench.scales:
+                    continue
+                cases = [case for case in bench.get_cases()
+                    if fnmatch.fnmatch(
+                    f'{prefix}.{case[5:]}[{scale}]', args.pattern)]
+                if not cases:
+                    continue
+                bench.setup(scale)
+                try:
+                    for case in cases:
+                        key = f'{prefix}.{case[5:]}[{scale}]'
+                        result = base.measure(
+                            getattr(bench, case), repeat=args.repeat)
+                        results[key] = result
+                        print(
+                            f"{key:<44} {result['time']:10.4f} s "
+                            f"{result['peakmem'] / 2**20:9.1f} MiB "
+                            f"{result['throughput']:12.1f} "
+                            f"{bench.get_unit(case)}/s")
+                finally:
+                    bench.teardown()
+    finally:
+        ui.set_notification_level(cur_level)
+
+    # Compare results with baseline
+    baseline = base.load_baseline(args.baseline)
+    regressions = base.compare(
+        results, baseline, threshold=args.threshold,
+        memthreshold=args.memthreshold)
+    for key, name, change in regressions:
+        print(f"regression of {name} in {key}: {change * 100.:+.1f}%")
+    if args.save:
+        base.save_baseline(args.baseline, results)
+    if regressions:
+        sys.exit(1)
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Frootlab
+# Copyright (C) 2013-2019 Patrick Michl
+#
+# This file is part of Frootlab Rian, https://www.frootlab.org/rian
+#
+#  Rian is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  Rian is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#  You should have received a copy of the GNU General Public License along with
+#  Rian. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Base classes and functions for benchmarks."""
+
+__copyright__ = '2019 Frootlab'
+__license__ = 'GPLv3'
+__docformat__ = 'google'
+__author__ = 'Frootlab Developers'
+__email__ = 'contact@frootlab.org'
+__authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
+
+import gc
+import json
+import os
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import rian
+
+#
+# Synthetic Datasets and Networks
+#
+
+scales: Dict[str, Dict[str, int]] = {
+    'small': {
+        'samples': 1000, 'inputs': 8, 'outputs': 8, 'hidden': 4,
+        'batch': 100, 'updates': 100},
+    'medium': {
+        'samples': 10000, 'inputs': 32, 'outputs': 32, 'hidden': 16,
+        'batch': 1000, 'updates': 100},
+    'large': {
+        'samples': 100000, 'inputs': 128, 'outputs': 128, 'hidden': 64,
+        'batch': 1000, 'updates': 100}}
+
+def get_columns(scale: str) -> Tuple[List[str], List[str]]:
+    """Get input and output columns of synthetic dataset."""
+    size = scales[scale]
+    inputs = ['i%i' % (i + 1) for i in range(size['inputs'])]
+    outputs = ['o%i' % (i + 1) for i in range(size['outputs'])]
+    return inputs, outputs
+
+def get_dataset(scale: str) -> Any:
+    """Create synthetic dataset with gaussian distributed values."""
+    inputs, outputs = get_columns(scale)
+    return rian.dataset.create('rules',
+        name='bench', columns=inputs + outputs, initialize='gauss',
+        sdev=1., rules=[], samples=scales[scale]['samples'],
+        normalize='gauss')
+
+def get_model(scale: str, system: str = 'ann') -> Any:
+    """Create model of synthetic dataset and network.
+
+    Args:
+        scale: Name of scale, as given by the keys of 'scales'
+        system: Name of system. For 'ann' a multilayer network with a single
+            hidden layer is created. For other systems, like 'rbm' or 'grbm'
+            a factor graph is created.
+
+    Returns:
+        Initialized (but not optimized) rian model instance.
+
+    """
+    inputs, outputs = get_columns(scale)
+    hidden = scales[scale]['hidden']
+    if system == 'ann':
+        network = rian.network.create('multilayer',
+            inputs=inputs, outputs=outputs, shape=[hidden])
+    else:
+        network = rian.network.create('factor',
+            visible_nodes=inputs + outputs, factors=hidden)
+    return rian.model.create(
+        dataset=get_dataset(scale), network=network, system=system)
+
+#
+# Benchmarks
+#
+
+class Benchmark:
+    """Base class for benchmarks.
+
+    Every method with prefix 'time\\_' is a benchmark case, which is measured
+    for all names in the class attribute 'scales'. Before the cases of a scale
+    are measured, the method 'setup' is called with the name of the scale. A
+    case returns the number of processed items (e.g. samples or updates) per
+    call, whereas the name of the items is given by 'units' with the case
+    name as key and 'samples' as default.
+
+    """
+
+    scales: List[str] = list(scales.keys())
+    units: Dict[str, str] = {}
+
+    def setup(self, scale: str) -> None:
+        """Prepare benchmark cases for given scale."""
+        pass
+
+    def teardown(self) -> None:
+        """Release resources of benchmark cases."""
+        pass
+
+    def get_cases(self) -> List[str]:
+        """Get sorted list of benchmark case names."""
+        return sorted(name for name in dir(self)
+            if name.startswith('time_') and callable(getattr(self, name)))
+
+    def get_unit(self, case: str) -> str:
+        """Get name of processed items of benchmark case."""
+        return self.units.get(case, 'samples')
+
+def measure(func: Callable[[], Any], repeat: int = 3) -> Dict[str, float]:
+    """Measure wall time, peak memory and throughput of function.
+
+    The peak memory is measured in a separate call by tracing the memory
+    allocations (including numpy arrays), since tracing slows down the
+    execution. The wall time is given by the minimum over the repeated calls,
+    which is the most robust estimate against external load.
+
+    Args:
+        func: Function without arguments, that returns the number of processed
+            items
+        repeat: Number of timed calls
+
+    Returns:
+        Dictionary with keys 'time' (wall time in seconds), 'peakmem' (peak
+        memory in bytes) and 'throughput' (processed items per second).
+
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        peakmem = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    times = []
+    count = 1
+    for _ in range(max(repeat, 1)):
+        gc.collect()
+        start = time.perf_counter()
+        count = func() or 1
+        times.append(time.perf_counter() - start)
+    wall = min(times)
+
+    return {
+        'time': wall, 'peakmem': float(peakmem),
+        'throughput': count / wall if wall > 0. else float('inf')}
+
+#
+# Baselines
+#
+
+def load_baseline(path: str) -> Dict[str, Dict[str, float]]:
+    """Load stored benchmark results from JSON file."""
+    if not os.path.isfile(path):
+        return {}
+    with open(path, 'r') as file:
+        return json.load(file)
+
+def save_baseline(path: str, results: Dict[str, Dict[str, float]]) -> None:
+    """Store benchmark results as JSON file.
+
+    Results of benchmark cases, which are not contained in the given results
+    are kept, such that the baseline can be updated for selected cases.
+
+    """
+    baseline = {**load_baseline(path), **results}
+    with open(path, 'w') as file:
+        json.dump(baseline, file, indent=2, sort_keys=True)
+
+def compare(
+        results: Dict[str, Dict[str, float]],
+        baseline: Dict[str, Dict[str, float]], threshold: float = .25,
+        memthreshold: Optional[float] = None) -> List[Tuple[str, str, float]]:
+    """Get regressions of benchmark results with respect to a baseline.
+
+    Args:
+        results: Dictionary with benchmark results, as returned by 'measure'
+            for the respective benchmark keys
+        baseline: Dictionary with stored benchmark results
+        threshold: Maximum accepted relative increase of the wall time
+        memthreshold: Maximum accepted relative increase of the peak memory.
+            By default the threshold of the wall time is used.
+
+    Returns:
+        List of triples, containing the benchmark key, the name of the
+        regressed measure and its relative increase.
+
+    """
+    if memthreshold is None:
+        memthreshold = threshold
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        limits = {'time': threshold, 'peakmem': memthreshold}
+        for name, limit in limits.items():
+            ref = baseline[key].get(name, 0.)
+            if ref <= 0.:
+                continue
+            change = result[name] / ref - 1.
+            if change > limit:
+                regressions.append((key, name, change))
+    return regressions
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Frootlab
+# Copyright (C) 2013-2019 Patrick Michl
+#
+# This file is part of Frootlab Rian, https://www.frootlab.org/rian
+#
+#  Rian is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  Rian is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#  You should have received a copy of the GNU General Public License along with
+#  Rian. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Benchmarks of data retrieval from datasets."""
+
+__copyright__ = '2019 Frootlab'
+__license__ = 'GPLv3'
+__docformat__ = 'google'
+__author__ = 'Frootlab Developers'
+__email__ = 'contact@frootlab.org'
+__authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
+
+from benchmarks import base
+
+class Dataset(base.Benchmark):
+    """Retrieval of complete data, stratified batches and chunks."""
+
+    def setup(self, scale: str) -> None:
+        self.size = base.scales[scale]
+        self.model = base.get_model(scale)
+        mapping = self.model.system._get_mapping()
+        self.cols = (mapping[0], mapping[-1])
+
+    def teardown(self) -> None:
+        del self.model
+
+    def time_get_data(self) -> int:
+        self.model.dataset.get('data', cols=self.cols)
+        return self.size['samples']
+
+    def time_get_data_batch(self) -> int:
+        size = self.size['batch']
+        self.model.dataset.get('data', cols=self.cols, size=size)
+        return size
+
+    def time_get_chunks(self) -> int:
+        size = self.size['batch']
+        for chunk in self.model.dataset.get(
+            'chunks', size=size, cols=self.cols):
+            pass
+        return self.size['samples']
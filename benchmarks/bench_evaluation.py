@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Frootlab
+# Copyright (C) 2013-2019 Patrick Michl
+#
+# This file is part of Frootlab Rian, https://www.frootlab.org/rian
+#
+#  Rian is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  Rian is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#  You should have received a copy of the GNU General Public License along with
+#  Rian. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Benchmarks of model evaluations."""
+
+__copyright__ = '2019 Frootlab'
+__license__ = 'GPLv3'
+__docformat__ = 'google'
+__author__ = 'Frootlab Developers'
+__email__ = 'contact@frootlab.org'
+__authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
+
+import rian
+from benchmarks import base
+
+class Relations(base.Benchmark):
+    """Evaluation of relations between source and target units."""
+
+    def setup(self, scale: str) -> None:
+        self.size = base.scales[scale]
+        self.model = base.get_model(scale)
+        mapping = self.model.system._get_mapping()
+        self.data = self.model.dataset.get(
+            'data', cols=(mapping[0], mapping[-1]))
+
+    def teardown(self) -> None:
+        del self.model, self.data
+
+    def evaluate(self, name: str) -> int:
+        self.model.system.evaluate(
+            self.data, 'relations', name, format='array')
+        return self.size['samples']
+
+    def time_correlation(self) -> int:
+        return self.evaluate('correlation')
+
+    def time_knockout(self) -> int:
+        return self.evaluate('knockout')
+
+    def time_induction(self) -> int:
+        return self.evaluate('induction')
+
+class Metrics(base.Benchmark):
+    """Evaluation of reconstruction errors, at once and in chunks."""
+
+    def setup(self, scale: str) -> None:
+        self.size = base.scales[scale]
+        self.model = base.get_model(scale)
+        self.evaluation = rian.model.evaluation.new(self.model)
+
+    def teardown(self) -> None:
+        del self.model, self.evaluation
+
+    def time_error(self) -> int:
+        self.evaluation.evaluate('error')
+        return self.size['samples']
+
+    def time_error_chunks(self) -> int:
+        self.evaluation.evaluate('error', chunksize=self.size['batch'])
+        return self.size['samples']
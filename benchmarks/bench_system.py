@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Frootlab
+# Copyright (C) 2013-2019 Patrick Michl
+#
+# This file is part of Frootlab Rian, https://www.frootlab.org/rian
+#
+#  Rian is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  Rian is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#  You should have received a copy of the GNU General Public License along with
+#  Rian. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Benchmarks of system evaluations and optimization algorithms."""
+
+__copyright__ = '2019 Frootlab'
+__license__ = 'GPLv3'
+__docformat__ = 'google'
+__author__ = 'Frootlab Developers'
+__email__ = 'contact@frootlab.org'
+__authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
+
+import numpy as np
+from benchmarks import base
+from rian.system.commons.links import Links
+
+class System(base.Benchmark):
+    """Forward propagation and link energies."""
+
+    def setup(self, scale: str) -> None:
+        self.size = base.scales[scale]
+        self.model = base.get_model(scale)
+        mapping = self.model.system._get_mapping()
+        self.data = self.model.dataset.get(
+            'data', cols=(mapping[0], mapping[-1]))
+
+        # link layer with gaussian source units
+        batch = self.size['batch']
+        src, tgt = self.size['inputs'], self.size['hidden']
+        self.energy_args = (
+            self.data[0][:batch], np.random.normal(size=(batch, tgt)),
+            {'class': 'gauss', 'lvar': np.zeros((1, src))}, {},
+            {'A': np.ones((src, tgt)), 'W': np.random.normal(
+                size=(src, tgt))})
+
+    def teardown(self) -> None:
+        del self.model, self.data
+
+    def time_unitexpect(self) -> int:
+        self.model.system._get_unitexpect(self.data[0])
+        return self.size['samples']
+
+    def time_links_energy(self) -> int:
+        Links.energy(*self.energy_args)
+        return self.size['batch']
+
+class Optimizer(base.Benchmark):
+    """Parameter updates of backpropagation and contrastive divergency."""
+
+    units = {'time_ann_bprop': 'updates', 'time_rbm_cdiv': 'updates'}
+
+    def setup(self, scale: str) -> None:
+        self.size = base.scales[scale]
+        self.ann = base.get_model(scale, system='ann')
+        self.rbm = base.get_model(scale, system='grbm')
+        self.config = {
+            'updates': self.size['updates'],
+            'minibatch_size': self.size['batch'],
+            'minibatch_update_interval': 1,
+            'tracker_estimate_time': False,
+            'tracker_obj_tracking_enable': False,
+            'tracker_eval_enable': False,
+            'key_events_enable': False}
+
+    def teardown(self) -> None:
+        del self.ann, self.rbm
+
+    def time_ann_bprop(self) -> int:
+        self.ann.optimize(algorithm='bprop', **self.config)
+        return self.size['updates']
+
+    def time_rbm_cdiv(self) -> int:
+        self.rbm.optimize(algorithm='cd', **self.config)
+        return self.size['updates']
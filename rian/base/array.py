@@ -25,11 +25,12 @@ __author__ = 'Frootlab Developers'
 __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
+from collections.abc import Mapping
 from typing import List
 import numpy as np
 from numpy.lib import recfunctions as nprec
 from hup.typing import check, StrPairDict, StrListPair, NaN, OptList
-from hup.typing import Number, OptNumber, OptStrList
+from hup.typing import Number, OptDict, OptNumber, OptStrList
 from rian.typing import NpArray, NpArrayLike, NpRecArray, NpFields
 
 #
@@ -127,6 +128,114 @@ def as_dict(
 
     return d
 
+class PairView(Mapping):
+    """Read-only dictionary view of a two dimensional array.
+
+    The view provides the same items as the dictionary, which is returned by
+    :func:`as_dict`, but accesses the array on demand, such that no
+    dictionary with an entry per cell is created.
+
+    Args:
+        x: Numpy ndarray of shape (*n*, *m*), where *n* equals the number of
+            <*rows*> and *m* the number of <*columns*>.
+        labels: Tuple of format (<*rows*>, <*columns*>), where <*rows*> is a
+            list of row labels and <*columns*> a list of column labels.
+        nan: Optional value to mask Not a Number (NaN) entries, like in
+            :func:`as_dict`. Default: [IEEE754]_ floating point representation
+            of NaN.
+        extra: Optional dictionary with additional items, which keys are not
+            pairs of labels, e.g. statistics of the array.
+
+    """
+
+    def __init__(
+            self, x: NpArray, labels: StrListPair, nan: OptNumber = NaN,
+            extra: OptDict = None) -> None:
+        # Check type and dimension of 'x'
+        check.has_type("'x'", x, np.ndarray)
+        if x.ndim != 2:
+            raise TypeError(
+                "Numpy ndarray 'x' is required to have dimension 2"
+                f", not '{x.ndim}'")
+
+        self._x = x
+        self._rows = {row: i for i, row in enumerate(labels[0])}
+        self._cols = {col: j for j, col in enumerate(labels[1])}
+        self._extra = dict(extra or {})
+        if nan is None:
+            self._valid = None
+            self._len = len(self._rows) * len(self._cols)
+        else:
+            rids = list(self._rows.values())
+            cids = list(self._cols.values())
+            self._valid = ~np.isnan(x[np.ix_(rids, cids)])
+            self._len = int(np.count_nonzero(self._valid))
+
+    def __getitem__(self, key):
+        if key in self._extra:
+            return self._extra[key]
+        try:
+            i, j = self._rows[key[0]], self._cols[key[1]]
+        except (KeyError, IndexError, TypeError):
+            raise KeyError(key) from None
+        val = self._x.item(i, j)
+        if self._valid is not None and np.isnan(val):
+            raise KeyError(key)
+        return val
+
+    def __iter__(self):
+        rows, cols = list(self._rows), list(self._cols)
+        if self._valid is None:
+            pairs = ((row, col) for row in rows for col in cols)
+        else:
+            nonzero = zip(*self._valid.nonzero())
+            pairs = ((rows[i], cols[j]) for i, j in nonzero)
+        yield from pairs
+        yield from self._extra
+
+    def __len__(self) -> int:
+        return self._len + len(self._extra)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    def __sizeof__(self) -> int:
+        size = object.__sizeof__(self) + self._x.nbytes
+        if self._valid is not None:
+            size += self._valid.nbytes
+        return size
+
+    @property
+    def array(self) -> NpArray:
+        """Numpy ndarray, that is viewed."""
+        return self._x
+
+def as_view(
+        x: NpArray, labels: StrListPair, nan: OptNumber = NaN,
+        extra: OptDict = None) -> PairView:
+    """Get read-only dictionary view of a two dimensional array.
+
+    Args:
+        x: Numpy ndarray of shape (*n*, *m*), where *n* equals the number of
+            <*rows*> and *m* the number of <*columns*>.
+        labels: Tuple of format (<*rows*>, <*columns*>), where <*rows*> is a
+            list of row labels, e.g. ['row1', 'row2', ...] and <*columns*> a
+            list of column labels, e.g. ['col1', 'col2', ...].
+        nan: Optional value to mask Not a Number (NaN) entries. For cells in the
+            array, which have this value, the view has no entry. If nan is None,
+            then for all numbers entries are viewed. Default: [IEEE754]_
+            floating point representation of NaN.
+        extra: Optional dictionary with additional items, which keys are not
+            pairs of labels.
+
+    Returns:
+         Instance of class :class:`PairView`, which provides the items of the
+         dictionary, that is returned by :func:`as_dict` with the additional
+         items, without creating a dictionary entry per cell.
+
+    """
+    return PairView(x, labels, nan=nan, extra=extra)
+
 def from_tuples(
         tuples: List[tuple], names: OptStrList = None,
         formats: OptList = None) -> NpArray:
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Frootlab
+# Copyright (C) 2013-2019 Patrick Michl
+#
+# This file is part of Frootlab Rian, https://www.frootlab.org/rian
+#
+#  Rian is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  Rian is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#  You should have received a copy of the GNU General Public License along with
+#  Rian. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Memory bounded caches for expensive results.
+
+This module provides a least recently used (LRU) cache, which is bounded by the
+memory size of the cached values instead of their number, and a function to
+calculate fingerprints of arguments, that are used as cache keys.
+
+"""
+
+__copyright__ = '2019 Frootlab'
+__license__ = 'GPLv3'
+__docformat__ = 'google'
+__author__ = 'Frootlab Developers'
+__email__ = 'contact@frootlab.org'
+__authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
+
+import collections
+import hashlib
+import sys
+import threading
+from typing import Any, Hashable
+import numpy as np
+
+#
+# Cache Class
+#
+
+class Cache:
+    """Least recently used cache, that is bounded by memory size.
+
+    Args:
+        maxsize: Maximum memory size of the cached values in bytes. If the
+            memory size is exceeded, the least recently used values are
+            evicted. Values, which are larger than the maximum memory size are
+            not cached at all. Default: 256 MiB
+
+    """
+
+    maxsize: int
+    size: int
+    hits: int
+    misses: int
+
+    _items: collections.OrderedDict
+    _lock: Any
+
+    def __init__(self, maxsize: int = 2 ** 28) -> None:
+        self.maxsize = maxsize
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get cached value and mark it as recently used.
+
+        Args:
+            key: Cache key
+            default: Value, that is returned, if the key is not cached.
+                Default: None
+
+        Returns:
+            Cached value of the key, or the given default value.
+
+        """
+        with self._lock:
+            if key not in self._items:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return self._items[key][0]
+
+    def set(self, key: Hashable, value: Any) -> bool:
+        """Cache value and evict least recently used values.
+
+        Args:
+            key: Cache key
+            value: Value to be cached
+
+        Returns:
+            True if the value has been cached, False if it exceeds the
+            maximum memory size of the cache.
+
+        """
+        size = get_size(value)
+        with self._lock:
+            if key in self._items:
+                self.size -= self._items.pop(key)[1]
+            if size > self.maxsize:
+                return False
+            while self._items and self.size + size > self.maxsize:
+                self.size -= self._items.popitem(last=False)[1][1]
+            self._items[key] = (value, size)
+            self.size += size
+        return True
+
+    def clear(self) -> None:
+        """Remove all cached values."""
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+#
+# Cache Functions
+#
+
+def get_size(obj: Any) -> int:
+    """Estimate memory size of an object in bytes.
+
+    Args:
+        obj: Arbitrary object. The sizes of numpy arrays are given by their
+            data buffers, the sizes of dictionaries, lists and tuples by the
+            sum of the sizes of their items.
+
+    Returns:
+        Estimated memory size of the object in bytes.
+
+    """
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            get_size(key) + get_size(val) for key, val in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(get_size(item) for item in obj)
+    return sys.getsizeof(obj)
+
+def fingerprint(*args: Any) -> str:
+    """Calculate fingerprint of arguments.
+
+    Args:
+        *args: Arguments of arbitrary types. Numpy arrays are identified by
+            their data type, shape and data. Dictionaries, lists and tuples are
+            identified by their items and all other objects by their string
+            representation.
+
+    Returns:
+        Hexadecimal string, which identifies the arguments.
+
+    """
+    digest = hashlib.blake2b(digest_size=16)
+
+    def update(obj: Any) -> None:
+        if isinstance(obj, np.ndarray):
+            digest.update(b'A' + repr((obj.dtype.descr, obj.shape)).encode())
+            if obj.dtype.hasobject:
+                digest.update(repr(obj.tolist()).encode())
+            else:
+                digest.update(np.ascontiguousarray(obj).data)
+        elif isinstance(obj, dict):
+            digest.update(b'D%d' % len(obj))
+            for key in sorted(obj, key=repr):
+                update(key)
+                update(obj[key])
+        elif isinstance(obj, (list, tuple)):
+            digest.update(b'L%d' % len(obj))
+            for item in obj:
+                update(item)
+        else:
+            digest.update(b'O' + repr(obj).encode())
+
+    update(args)
+
+    return digest.hexdigest()
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Frootlab
+# Copyright (C) 2013-2019 Patrick Michl
+#
+# This file is part of Frootlab Rian, https://www.frootlab.org/rian
+#
+#  Rian is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  Rian is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#  You should have received a copy of the GNU General Public License along with
+#  Rian. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Shared memory blocks for NumPy arrays.
+
+This module provides lightweight handles to NumPy arrays, that are stored in
+blocks of shared memory. The handles can be pickled and passed to worker
+processes, which reattach the arrays without copying the data.
+
+"""
+
+__copyright__ = '2019 Frootlab'
+__license__ = 'GPLv3'
+__docformat__ = 'google'
+__author__ = 'Frootlab Developers'
+__email__ = 'contact@frootlab.org'
+__authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
+
+from typing import Any, NamedTuple, Tuple
+import numpy as np
+from rian.typing import NpArray
+
+try:
+    from multiprocessing import shared_memory
+except ImportError: # pragma: no cover
+    shared_memory = None # Shared memory requires Python 3.8 or later
+
+#
+# Structural Types
+#
+
+Block = Any if shared_memory is None else shared_memory.SharedMemory
+
+class Handle(NamedTuple):
+    """Picklable reference to an array within a shared memory block."""
+    name: str
+    shape: Tuple[int, ...]
+    dtype: Any # NumPy dtype, which also describes structured arrays
+
+#
+# Shared Memory Functions
+#
+
+def is_available() -> bool:
+    """Check if shared memory is supported by the current interpreter."""
+    return shared_memory is not None
+
+def share(x: NpArray) -> Tuple[Block, NpArray]:
+    """Copy array into a new block of shared memory.
+
+    Args:
+        x: Numpy ndarray, that is copied into the shared memory block
+
+    Returns:
+        Tuple (*block*, *array*), where *block* is the created shared memory
+        block and *array* a numpy ndarray with the data of *x*, which uses the
+        block as its buffer. The block has to be released by the caller.
+
+    """
+    if not is_available():
+        raise RuntimeError("shared memory is not supported")
+    x = np.ascontiguousarray(x)
+    block = shared_memory.SharedMemory(create=True, size=max(x.nbytes, 1))
+    y = np.ndarray(x.shape, dtype=x.dtype, buffer=block.buf)
+    y[...] = x
+    return block, y
+
+def get_handle(block: Block, x: NpArray) -> Handle:
+    """Get picklable handle of an array within a shared memory block."""
+    return Handle(name=block.name, shape=x.shape, dtype=x.dtype)
+
+def attach(handle: Handle) -> Tuple[Block, NpArray]:
+    """Attach to an array within an existing block of shared memory.
+
+    Args:
+        handle: Handle of an array within a shared memory block
+
+    Returns:
+        Tuple (*block*, *array*), where *block* is the attached shared memory
+        block and *array* a numpy ndarray, which uses the block as its buffer.
+        The block has to be released by the caller, after the array is not
+        longer used.
+
+    """
+    if not is_available():
+        raise RuntimeError("shared memory is not supported")
+    block = shared_memory.SharedMemory(name=handle.name)
+    x = np.ndarray(handle.shape, dtype=np.dtype(handle.dtype), buffer=block.buf)
+    return block, x
+
+def release(block: Block, unlink: bool = False) -> None:
+    """Release shared memory block.
+
+    Args:
+        block: Shared memory block
+        unlink: Boolean value which determines, if the block is to be destroyed.
+            This should only be done once, by the process that created the
+            block. Default: False
+
+    """
+    try:
+        block.close()
+    except BufferError: # pragma: no cover
+        pass # There are still exported views to the buffer
+    if unlink:
+        try:
+            block.unlink()
+        except FileNotFoundError: # pragma: no cover
+            pass
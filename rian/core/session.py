@@ -142,11 +142,13 @@ class Session(attrib.Group, SessionType):
         'session': {
             'path': Path,
             'restore_on_startup': bool,
-            'autosave_on_exit': bool}}
+            'autosave_on_exit': bool,
+            'lazy_load': bool}}
     _default_config: ClassVar[StrDict] = {
         'path': None,
         'restore_on_startup': False,
-        'autosave_on_exit': False}
+        'autosave_on_exit': False,
+        'lazy_load': False}
     _default_paths: StrList = [
         '%user_data_dir%', '%site_data_dir%', '%package_data_dir%']
 
@@ -227,17 +229,24 @@ class Session(attrib.Group, SessionType):
 
     def load(
             self, workspace: OptPathLike = None, basedir: OptPathLike = None,
-            pwd: OptBytes = None) -> None:
+            pwd: OptBytes = None, lazy: Optional[bool] = None) -> None:
         """Load Workspace from file.
 
         Args:
             workspace:
             basedir:
             pwd: Bytes representing password of workspace file.
+            lazy: Boolean value which determines, if the workspace file is kept
+                on disk and its members are read on demand. By default the
+                session configuration 'lazy_load' is used.
 
         """
+        if lazy is None:
+            lazy = bool(self.config.get('lazy_load'))
         path = self._locate_path(workspace=workspace, basedir=basedir)
-        self._file = ws.Workspace(filepath=path, pwd=pwd)
+        if hasattr(self._file, 'close'):
+            self._file.close()
+        self._file = ws.Workspace(filepath=path, pwd=pwd, lazy=lazy)
         self._set_attr_group_parent(self._file)
 
     def save(self) -> None:
@@ -256,7 +265,8 @@ class Session(attrib.Group, SessionType):
 
     def close(self) -> None:
         """Close current session."""
-        if self.config.get('autosave_on_exit') and self._file.changed:
+        changed = self._file.changed or self._file.changes
+        if self.config.get('autosave_on_exit') and changed:
             self.save()
         if hasattr(self._file, 'close'):
             self._file.close()
@@ -316,8 +326,11 @@ class Session(attrib.Group, SessionType):
 
         """
         if workspace:
+            # Members of other workspaces are opened without copying the
+            # workspace file to the memory
             path = self._locate_path(workspace=workspace, basedir=basedir)
-            ws_file = ws.Workspace(filepath=path, pwd=pwd)
+            ws_file = ws.Workspace(
+                filepath=path, pwd=pwd, lazy='w' not in mode)
             return ws_file.open(
                 filepath, mode=mode, encoding=encoding, is_dir=is_dir)
         return self._file.open(
@@ -496,6 +509,23 @@ class Session(attrib.Group, SessionType):
         """
         return self._file.read_bytes(filepath)
 
+    def memmap(self, filepath: PathLike, mode: str = 'r') -> Any:
+        """Memory map numpy array from file in current workspace.
+
+        Args:
+            filepath: String or :term:`path-like object`, that points to a file
+                in the NPY format within the workspace.
+            mode: Mode of the memory map: 'r' for reading only (default) and 'c'
+                for copy-on-write.
+
+        Returns:
+            If the workspace is loaded lazily and the file is stored
+            uncompressed, a :class:`numpy.memmap` of the array, else a numpy
+            array, which is loaded into the memory.
+
+        """
+        return self._file.memmap(filepath, mode=mode)
+
     def write_text(
             self, text: str, filepath: PathLike,
             encoding: OptStr = None) -> int:
@@ -26,13 +26,225 @@ __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
 import datetime
+import fnmatch
+import io
+import os
+import shutil
+import struct
+import warnings
+import zipfile
 from pathlib import Path
-from typing import ClassVar, Optional
+from typing import Any, Callable, ClassVar, Dict, Optional
+import numpy as np
 from hup.base import attrib, env
 from rian.core import dcmeta
 from hup.errors import FileFormatError
 from hup.io import ini, zip as archive
-from hup.typing import StrList, PathLike, OptBytes, OptPathLike
+from hup.typing import FileLike, StrList, PathLike, OptBytes, OptPathLike
+from hup.typing import OptStr
+from rian.typing import NpArray
+
+#
+# Random Access Archives
+#
+
+class Archive:
+    """Read-only random access to the members of a ZipFile on disk.
+
+    In difference to the in-memory ZipFile of workspaces, only the central
+    directory of the ZipFile is read when the archive is opened, whereas the
+    members are read on demand. Uncompressed (stored) members, that contain
+    numpy arrays, can be memory mapped directly from the file.
+
+    Args:
+        filepath: String or :term:`path-like object`, that points to a valid
+            ZipFile. If the file does not exist or isn't a valid ZipFile,
+            respectively one of the errors FileNotFoundError or BadZipFile is
+            raised.
+        pwd: Bytes representing password of ZipFile.
+
+    """
+
+    path: Path
+    pwd: OptBytes
+
+    _file: zipfile.ZipFile
+    _local_header: ClassVar[struct.Struct] = struct.Struct('<4s22xHH')
+
+    def __init__(self, filepath: PathLike, pwd: OptBytes = None) -> None:
+        self.path = env.expand(filepath)
+        self.pwd = pwd
+        self._file = zipfile.ZipFile(self.path, mode='r')
+
+    def close(self) -> None:
+        """Close file handle of the archive."""
+        self._file.close()
+
+    def namelist(self) -> StrList:
+        """Get list of archive members."""
+        return self._file.namelist()
+
+    def getinfo(self, filepath: PathLike) -> zipfile.ZipInfo:
+        """Get information about archive member."""
+        name = Path(filepath).as_posix()
+        for key in [name, name + '/']: # Directories end with a slash
+            try:
+                return self._file.getinfo(key)
+            except KeyError:
+                pass
+        raise FileNotFoundError(f"file '{name}' does not exist")
+
+    def open(
+            self, filepath: PathLike, mode: str = '',
+            encoding: OptStr = None) -> FileLike:
+        """Open archive member in reading mode.
+
+        Args:
+            filepath: String or :term:`path-like object`, that points to a
+                file within the archive. If the file does not exist, a
+                FileNotFoundError is raised.
+            mode: String, which characters specify the mode in which the file
+                is to be opened. Suported characters are 'r' for reading mode
+                (default), 'b' for binary mode and 't' for text mode (default).
+            encoding: In text mode encoding specifies the name of the encoding,
+                which is used to decode the stream’s bytes into strings. By
+                default the preferred encoding of the operating system is used.
+
+        Returns:
+            :term:`File object` in reading mode.
+
+        """
+        if 'w' in mode:
+            raise ValueError("archive members can only be opened for reading")
+        info = self.getinfo(filepath)
+        if info.is_dir():
+            raise IsADirectoryError(f"'{info.filename}' is a directory")
+        file = self._file.open(info, mode='r', pwd=self.pwd)
+        if 'b' in mode:
+            return file
+        return io.TextIOWrapper(file, encoding=encoding)
+
+    def get_directory_offset(self) -> int:
+        """Get position of the central directory in the file."""
+        return self._file.start_dir
+
+    def get_stale_size(self) -> int:
+        """Get size of members, which are superseded by equally named members.
+
+        Members, that are appended to a ZipFile with the name of an existing
+        member, supersede the existing member, which however remains in the
+        file, until the file is rewritten.
+
+        """
+        total = sum(info.compress_size for info in self._file.infolist())
+        current = sum(self._file.getinfo(name).compress_size
+            for name in set(self._file.namelist()))
+        return total - current
+
+    def copy(self, filepath: PathLike, target: zipfile.ZipFile) -> None:
+        """Copy archive member to other ZipFile.
+
+        Args:
+            filepath: String or :term:`path-like object`, that points to a
+                file within the archive.
+            target: ZipFile in writing mode. The member is written with the
+                same name, date and compression type.
+
+        """
+        info = self.getinfo(filepath)
+        copy = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+        copy.compress_type = info.compress_type
+        copy.external_attr = info.external_attr
+        if info.is_dir():
+            target.writestr(copy, b'')
+            return
+        with self._file.open(info, mode='r', pwd=self.pwd) as src:
+            with target.open(copy, mode='w', force_zip64=True) as tgt:
+                shutil.copyfileobj(src, tgt)
+
+    def get_offset(self, filepath: PathLike) -> int:
+        """Get position of the data of an uncompressed member in the file.
+
+        Args:
+            filepath: String or :term:`path-like object`, that points to a
+                stored (uncompressed and unencrypted) file within the archive.
+                Otherwise a ValueError is raised.
+
+        Returns:
+            Byte offset of the member data within the ZipFile.
+
+        """
+        info = self.getinfo(filepath)
+        if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+            raise ValueError(
+                f"file '{info.filename}' is compressed or encrypted")
+
+        # The position of the data is given by the size of the local file
+        # header, which may differ from the central directory
+        with self.path.open('rb') as file:
+            file.seek(info.header_offset)
+            header = file.read(self._local_header.size)
+        magic, namelen, extralen = self._local_header.unpack(header)
+        if magic != b'PK\x03\x04':
+            raise zipfile.BadZipFile(
+                f"file '{info.filename}' has an invalid local header")
+
+        return info.header_offset + self._local_header.size \
+            + namelen + extralen
+
+    def memmap(self, filepath: PathLike, mode: str = 'r') -> NpArray:
+        """Memory map numpy array from archive member.
+
+        Args:
+            filepath: String or :term:`path-like object`, that points to a
+                stored (uncompressed and unencrypted) file within the archive,
+                which contains a numpy array in the NPY format.
+            mode: Mode of the memory map. Supported modes are 'r' for reading
+                only (default) and 'c' for copy-on-write, where assignments
+                affect data in memory, but are not saved to the file.
+
+        Returns:
+            :class:`numpy.memmap` with the array data.
+
+        """
+        if mode not in ['r', 'c']:
+            raise ValueError(f"mode '{mode}' is not supported")
+        offset = self.get_offset(filepath)
+
+        # Parse NPY header
+        with self.open(filepath, mode='rb') as file:
+            version = np.lib.format.read_magic(file)
+            if version == (1, 0):
+                header = np.lib.format.read_array_header_1_0(file)
+            elif version == (2, 0):
+                header = np.lib.format.read_array_header_2_0(file)
+            else:
+                raise ValueError(
+                    f"NPY format version {version} is not supported")
+            offset += file.tell()
+        shape, fortran, dtype = header
+        if dtype.hasobject:
+            raise ValueError("arrays of objects can not be memory mapped")
+
+        return np.memmap(
+            self.path, dtype=dtype, mode=mode, offset=offset, shape=shape,
+            order='F' if fortran else 'C')
+
+class _Member(io.BytesIO):
+    """Buffer for written members of workspace files on disk."""
+
+    def __init__(self, store: Callable[[bytes], None]) -> None:
+        super().__init__()
+        self._store = store
+
+    def close(self) -> None:
+        if not self.closed:
+            self._store(self.getvalue())
+        super().close()
+
+#
+# Workspaces
+#
 
 class Workspace(archive.File, attrib.Group):
     """Workspaces.
@@ -53,6 +265,12 @@ class Workspace(archive.File, attrib.Group):
             folders layout. In this case the attribute maintainer is initialized
             with the current username.
         pwd: Bytes representing password of workspace file.
+        lazy: Boolean value which determines, if the workspace file is kept on
+            disk. In this case only the directory of the workspace file is
+            read, when the workspace is loaded, and members are read on
+            demand. The workspace file is copied to the memory, before the
+            workspace is modified. By default the workspace file is loaded
+            into the memory.
 
     """
 
@@ -67,6 +285,10 @@ class Workspace(archive.File, attrib.Group):
             'date': datetime.datetime.now()}}
     _default_dir_layout: ClassVar[StrList] = [
         'dataset', 'network', 'system', 'model', 'script']
+    _compact_ratio: ClassVar[float] = .5
+    _stored_suffixes: ClassVar[StrList] = ['.npy']
+    _archive: Optional[Archive] = None
+    _changes: Optional[Dict[str, Optional[bytes]]] = None
 
     #
     # Public Attributes and Attribute Groups
@@ -82,15 +304,24 @@ class Workspace(archive.File, attrib.Group):
 
     def __init__(
             self, filepath: OptPathLike = None, pwd: OptBytes = None,
-            parent: Optional[attrib.Group] = None) -> None:
+            parent: Optional[attrib.Group] = None, lazy: bool = False) -> None:
 
         # Initialize in-memory ZipFile
-        archive.File.__init__(self, filepath=filepath, pwd=pwd)
+        if lazy and filepath is not None:
+            archive.File.__init__(self, pwd=pwd)
+        else:
+            archive.File.__init__(self, filepath=filepath, pwd=pwd)
 
         # Initialize Attribute Group
         attrib.Group.__init__(self, parent=parent)
 
-    def load(self, filepath: PathLike, pwd: OptBytes = None) -> None:
+        # Open workspace file on disk
+        if lazy and filepath is not None:
+            self.load(filepath, pwd=pwd, lazy=True)
+
+    def load(
+            self, filepath: PathLike, pwd: OptBytes = None,
+            lazy: bool = False) -> None:
         """Load Workspace from file.
 
         Args:
@@ -102,9 +333,17 @@ class Workspace(archive.File, attrib.Group):
                 respectively one of the errors FileNotFoundError, BadZipFile or
                 FileFormatError is raised.
             pwd: Bytes representing password of workspace file.
+            lazy: Boolean value which determines, if the workspace file is kept
+                on disk, instead of being copied to the memory.
 
         """
-        super().load(filepath, pwd=pwd)
+        self._close_archive()
+        if lazy:
+            self._archive = Archive(filepath, pwd=pwd)
+            self._changes = {}
+            self._path = self._archive.path
+        else:
+            super().load(filepath, pwd=pwd)
 
         # Try to open and load workspace configuration from buffer
         scheme = {
@@ -113,7 +352,7 @@ class Workspace(archive.File, attrib.Group):
         try:
             with self.open(self._config_file) as file:
                 cfg = ini.load(file, scheme=scheme)
-        except KeyError as err:
+        except (KeyError, FileNotFoundError) as err:
             if isinstance(self._path, Path):
                 raise FileFormatError(self._path, 'rian workspace') from err
             raise
@@ -125,6 +364,14 @@ class Workspace(archive.File, attrib.Group):
     def saveas(self, filepath: PathLike) -> None:
         """Save the workspace to a file.
 
+        If the workspace file is kept on disk and the given filepath equals the
+        current filepath, then only the modified members are appended to the
+        workspace file. Superseded and removed members are dropped by a
+        compaction of the workspace file, which is performed, if removed
+        members exist or if the superseded members exceed a fraction of the
+        file. Compactions and saves to other files write a temporary file, that
+        atomically replaces the target file.
+
         Args:
             filepath: String or :term:`path-like object`, that represents the
                 name of a workspace file.
@@ -141,7 +388,329 @@ class Workspace(archive.File, attrib.Group):
                 'dc': self._get_attr_values(group='dc'),
                 'hooks': self._get_attr_values(category='hooks')}, file)
 
-        super().saveas(filepath)
+        if self._archive is None:
+            super().saveas(filepath)
+        elif path == self._archive.path and not self._get_compaction():
+            self._save_append()
+        else:
+            self._save_compact(path)
+
+    def save(self) -> None:
+        """Save the workspace to its current file."""
+        if self._archive is None:
+            super().save()
+        else:
+            self.saveas(self._archive.path)
+
+    def close(self) -> None:
+        """Close the workspace file."""
+        self._close_archive()
+        if hasattr(super(), 'close'):
+            super().close()
+
+    @property
+    def changes(self) -> StrList:
+        """Sorted list of modified members of a workspace file on disk.
+
+        The list contains workspace members, that have been written or removed
+        since the workspace file has been loaded or saved. For workspaces, that
+        are copied to the memory, the list is empty.
+
+        """
+        return sorted(self._changes or {})
+
+    def open(
+            self, filepath: PathLike, mode: str = '', encoding: OptStr = None,
+            is_dir: bool = False) -> FileLike:
+        """Open file within the workspace.
+
+        Args:
+            filepath: String or :term:`path-like object`, that represents a
+                workspace member. In reading mode the path has to point to a
+                valid workspace file, or a FileNotFoundError is raised.
+            mode: String, which characters specify the mode in which the file is
+                to be opened. Suported characters are 'r' for reading mode
+                (default), 'w' for writing mode, 'b' for binary mode and 't' for
+                text mode (default). If the workspace file is kept on disk, then
+                written files are buffered, until the workspace is saved.
+            encoding: In binary mode encoding has not effect. In text mode
+                encoding specifies the name of the encoding, which in reading
+                and writing mode respectively is used to decode the stream’s
+                bytes into strings, and to encode strings into bytes.
+            is_dir: Boolean value which determines, if the path is to be treated
+                as a directory or not.
+
+        Returns:
+            Context manager for :term:`file object` in reading or writing mode.
+
+        """
+        if is_dir:
+            self._materialize()
+        if self._archive is None:
+            return super().open(
+                filepath, mode=mode, encoding=encoding, is_dir=is_dir)
+
+        name = Path(filepath).as_posix()
+        if 'w' in mode:
+            def store(data: bytes) -> None:
+                self._changes[name] = data
+            file = _Member(store)
+        elif name in self._changes:
+            data = self._changes[name]
+            if data is None:
+                raise FileNotFoundError(f"file '{name}' does not exist")
+            file = io.BytesIO(data)
+        else:
+            return self._archive.open(name, mode=mode, encoding=encoding)
+        if 'b' in mode:
+            return file
+        return io.TextIOWrapper(file, encoding=encoding)
+
+    def append(self, source: PathLike, target: OptPathLike = None) -> bool:
+        """Append file to the workspace."""
+        if self._archive is None:
+            return super().append(source, target=target)
+        src = env.expand(source)
+        if not src.is_file():
+            raise FileNotFoundError(f"file '{src}' does not exist")
+        name = Path(target or '', src.name).as_posix()
+        if name in self.search():
+            raise FileExistsError(f"file '{name}' already exists")
+        self._changes[name] = src.read_bytes()
+        return True
+
+    def unlink(self, filepath: PathLike, ignore_missing: bool = True) -> bool:
+        """Remove file from the workspace."""
+        if self._archive is None:
+            return super().unlink(filepath, ignore_missing=ignore_missing)
+        name = Path(filepath).as_posix()
+        if name not in self.search():
+            if ignore_missing:
+                return False
+            raise FileNotFoundError(f"file '{name}' does not exist")
+        self._changes[name] = None
+        return True
+
+    def mkdir(self, dirpath: PathLike, ignore_exists: bool = False) -> bool:
+        """Create a new directory in the workspace."""
+        if self._archive is None:
+            return super().mkdir(dirpath, ignore_exists=ignore_exists)
+        name = Path(dirpath).as_posix() + '/'
+        if name in self._get_members():
+            if ignore_exists:
+                return False
+            raise FileExistsError(f"directory '{name}' already exists")
+        self._changes[name] = b''
+        return True
+
+    def rmdir(self, *args: Any, **kwds: Any) -> bool:
+        """Remove directory from the workspace."""
+        self._materialize()
+        return super().rmdir(*args, **kwds)
+
+    def copy(self, source: PathLike, target: PathLike) -> bool:
+        """Copy file within the workspace."""
+        if self._archive is None:
+            return super().copy(source, target)
+        with self.open(source, mode='rb') as src:
+            data = src.read()
+        self._changes[Path(target).as_posix()] = data
+        return True
+
+    def move(self, source: PathLike, target: PathLike) -> bool:
+        """Move file within the workspace."""
+        if self._archive is None:
+            return super().move(source, target)
+        self.copy(source, target)
+        return self.unlink(source, ignore_missing=False)
+
+    def write_text(
+            self, text: str, filepath: PathLike,
+            encoding: OptStr = None) -> int:
+        """Write text to file in the workspace."""
+        if self._archive is None:
+            return super().write_text(text, filepath, encoding=encoding)
+        with self.open(filepath, mode='w', encoding=encoding) as file:
+            return file.write(text)
+
+    def write_bytes(self, data: bytes, filepath: PathLike) -> int:
+        """Write bytes to file in the workspace."""
+        if self._archive is None:
+            return super().write_bytes(data, filepath)
+        with self.open(filepath, mode='wb') as file:
+            return file.write(data)
+
+    def read_text(self, filepath: PathLike, encoding: OptStr = None) -> str:
+        """Read text from file in the workspace."""
+        if self._archive is None:
+            return super().read_text(filepath, encoding=encoding)
+        with self.open(filepath, encoding=encoding) as file:
+            return file.read()
+
+    def read_bytes(self, filepath: PathLike) -> bytes:
+        """Read bytes from file in the workspace."""
+        if self._archive is None:
+            return super().read_bytes(filepath)
+        with self.open(filepath, mode='rb') as file:
+            return file.read()
+
+    def search(self, pattern: OptStr = None) -> StrList:
+        """Search for files in the workspace.
+
+        Args:
+            pattern: Search pattern that contains Unix shell-style wildcards:
+                '*': Matches arbitrary strings
+                '?': Matches single characters
+                [seq]: Matches any character in seq
+                [!seq]: Matches any character not in seq
+                By default a list of all files is returned.
+
+        Returns:
+            List of files within the workspace, which match the search pattern.
+
+        """
+        if self._archive is None:
+            return super().search(pattern)
+        names = [name for name in self._get_members()
+            if not name.endswith('/')]
+        if pattern is None:
+            return names
+        return fnmatch.filter(names, pattern)
+
+    def memmap(self, filepath: PathLike, mode: str = 'r') -> NpArray:
+        """Memory map numpy array from file in the workspace.
+
+        Args:
+            filepath: String or :term:`path-like object`, that points to a file
+                in the NPY format within the workspace.
+            mode: Mode of the memory map: 'r' for reading only (default) and 'c'
+                for copy-on-write.
+
+        Returns:
+            If the workspace file is kept on disk and the file is saved
+            uncompressed, a :class:`numpy.memmap` of the array, else a numpy
+            array, which is loaded into the memory.
+
+        """
+        name = Path(filepath).as_posix()
+        if self._archive is not None and name not in self._changes:
+            try:
+                return self._archive.memmap(name, mode=mode)
+            except ValueError:
+                pass
+        with self.open(name, mode='rb') as file:
+            return np.load(io.BytesIO(file.read()), allow_pickle=False)
+
+    def _get_members(self) -> StrList:
+        # Sorted list of current members of a workspace file on disk,
+        # including the modifications, that have not yet been saved
+        changes = self._changes or {}
+        names = set(self._archive.namelist()) if self._archive else set()
+        names.update(name for name, data in changes.items() if data is not None)
+        names.difference_update(
+            name for name, data in changes.items() if data is None)
+        return sorted(names)
+
+    def _get_compaction(self) -> bool:
+        # Compaction is required for removed members, since ZipFiles do not
+        # support the deletion of members, and if the superseded members exceed
+        # the given fraction of the workspace file
+        changes = self._changes or {}
+        if any(data is None for data in changes.values()):
+            return True
+        replaced = sum(self._archive.getinfo(name).compress_size
+            for name in changes if name in self._archive.namelist())
+        total = self._archive.path.stat().st_size
+        stale = self._archive.get_stale_size() + replaced
+        return stale > self._compact_ratio * total
+
+    def _get_zipinfo(self, name: str) -> zipfile.ZipInfo:
+        # Numpy arrays are stored uncompressed, such that they can be memory
+        # mapped from the workspace file
+        info = zipfile.ZipInfo(
+            name, date_time=datetime.datetime.now().timetuple()[:6])
+        if Path(name).suffix in self._stored_suffixes:
+            info.compress_type = zipfile.ZIP_STORED
+        else:
+            info.compress_type = zipfile.ZIP_DEFLATED
+        return info
+
+    def _save_append(self) -> None:
+        # Append modified members to the workspace file. If the append fails,
+        # the original central directory is restored
+        path, pwd = self._archive.path, self._archive.pwd
+        start = self._archive.get_directory_offset()
+        with path.open('rb') as file:
+            file.seek(start)
+            directory = file.read()
+        self._close_archive(keep_changes=True)
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', UserWarning) # Duplicate names
+                with zipfile.ZipFile(path, mode='a') as file:
+                    for name, data in (self._changes or {}).items():
+                        file.writestr(self._get_zipinfo(name), data)
+        except BaseException:
+            with path.open('r+b') as file:
+                file.seek(start)
+                file.write(directory)
+                file.truncate()
+            self._archive = Archive(path, pwd=pwd)
+            raise
+        self._archive = Archive(path, pwd=pwd)
+        self._changes = {}
+
+    def _save_compact(self, path: Path) -> None:
+        # Write current members to temporary file, which atomically replaces
+        # the target file
+        archive = self._archive
+        changes = self._changes or {}
+        tmppath = path.with_name(path.name + '.tmp')
+        try:
+            try:
+                with zipfile.ZipFile(tmppath, mode='w') as file:
+                    for name in self._get_members():
+                        if name in changes:
+                            file.writestr(
+                                self._get_zipinfo(name), changes[name])
+                        else:
+                            archive.copy(name, file)
+            finally:
+                archive.close()
+            os.replace(tmppath, path)
+        except BaseException:
+            if tmppath.exists():
+                tmppath.unlink()
+            self._archive = Archive(archive.path, pwd=archive.pwd)
+            raise
+        self._archive = Archive(path, pwd=archive.pwd)
+        self._path = path
+        self._changes = {}
+
+    def _materialize(self) -> None:
+        # Copy the workspace file to the memory, including the modifications,
+        # that have not yet been saved
+        if self._archive is None:
+            return
+        changes = self._changes or {}
+        path, pwd = self._archive.path, self._archive.pwd
+        self.load(path, pwd=pwd)
+        for name, data in changes.items():
+            if data is None:
+                super().unlink(name)
+            elif name.endswith('/'):
+                super().mkdir(name, ignore_exists=True)
+            else:
+                with super().open(name, mode='wb') as file:
+                    file.write(data)
+
+    def _close_archive(self, keep_changes: bool = False) -> None:
+        if self._archive is None:
+            return
+        self._archive.close()
+        self._archive = None
+        if not keep_changes:
+            self._changes = None
 
     def _create_new(self) -> None:
         super()._create_new()
@@ -24,6 +24,11 @@ __author__ = 'Frootlab Developers'
 __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
+def attach(*args, **kwds):
+    """Create dataset instance from handle of shared dataset."""
+    from rian.dataset import shared
+    return shared.attach(*args, **kwds)
+
 def build(*args, **kwds):
     """Create dataset dictionary from building script."""
     from rian.dataset import builder
@@ -56,7 +61,18 @@ def save(*args, **kwds):
     from rian.dataset import exports
     return exports.save(*args, **kwds)
 
+def share(*args, **kwds):
+    """Export dataset instance to shared memory."""
+    from rian.dataset import shared
+    return shared.share(*args, **kwds)
+
 def show(*args, **kwds):
     """Show dataset as image."""
     from rian.dataset import exports
     return exports.show(*args, **kwds)
+
+def view(dataset, system, **kwds):
+    """Create dataset view of dataset instance transformed by system."""
+    from rian.dataset.classes import view as views
+    return views.View(parent = dataset, system = system,
+        config = {'type': 'view.View', **kwds})
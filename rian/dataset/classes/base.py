@@ -25,14 +25,19 @@ __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
 import copy
+import itertools
 from typing import Any, Dict, Optional
 import numpy as np
 from numpy.lib import recfunctions as nprec
 from hup.base import catalog, otree
 import rian
-from rian.base import array, nbase
+from rian.base import array, cache, nbase
 from rian.core import log, ui
 
+# the versions of dataset tables are drawn from a common counter, such that
+# versions of different dataset instances are distinct
+_tables_versions = itertools.count(1)
+
 class Dataset(nbase.ObjectIP):
     """Dataset base class.
 
@@ -81,6 +86,8 @@ class Dataset(nbase.ObjectIP):
 
     _config: Optional[dict] = None
     _tables: Optional[dict] = None
+    _tables_shared: frozenset = frozenset()
+    _tables_version: int = 0
     _default = { 'name': None }
 
     _attr: Dict[str, int] = {
@@ -427,10 +434,10 @@ class Dataset(nbase.ObjectIP):
 
         # iterative normalize tables and columns
         for table in tables:
+            data = self._get_table_writeable(table)
             for column in columns:
-                self._tables[table][column] = \
-                    (self._tables[table][column] - mean[column] + mu) \
-                    / sdev[column] * sigma
+                data[column] = \
+                    (data[column] - mean[column] + mu) / sdev[column] * sigma
 
         return True
 
@@ -468,10 +475,9 @@ class Dataset(nbase.ObjectIP):
 
         # iterative normalize tables and columns
         for table in list(self._tables.keys()):
-            for column in self._tables[table].dtype.names[1:]:
-                mean = data[column].mean()
-                self._tables[table][column] = \
-                    (self._tables[table][column] > quantile[column]
+            tdata = self._get_table_writeable(table)
+            for column in tdata.dtype.names[1:]:
+                tdata[column] = (tdata[column] > quantile[column]
                     ).astype(float)
 
         return True
@@ -511,30 +517,28 @@ class Dataset(nbase.ObjectIP):
 
         # gauss to binary data transformation
         if transformation.lower() in ['gausstobinary', 'binary']:
-            for table in self._tables:
-                for column in self._tables[table].dtype.names[1:]:
-                    self._tables[table][column] = \
-                        (self._tables[table][column] > 0.).astype(float)
+            for table in list(self._tables):
+                data = self._get_table_writeable(table)
+                for column in data.dtype.names[1:]:
+                    data[column] = (data[column] > 0.).astype(float)
             return True
 
         # gauss to weight in [0, 1] data transformation
         if transformation.lower() in ['gausstoweight', 'weight']:
-            for table in self._tables:
-                for column in self._tables[table].dtype.names[1:]:
-                    self._tables[table][column] = \
-                        (2. / (1. + np.exp(-1. * \
-                        self._tables[table][column] ** 2))
-                        ).astype(float)
+            for table in list(self._tables):
+                data = self._get_table_writeable(table)
+                for column in data.dtype.names[1:]:
+                    data[column] = (2. / (1. + np.exp(-1. * \
+                        data[column] ** 2))).astype(float)
             return True
 
         # gauss to distance data transformation
         if transformation.lower() in ['gausstodistance', 'distance']:
-            for table in self._tables:
-                for column in self._tables[table].dtype.names[1:]:
-                    self._tables[table][column] = \
-                        (1. - (2. / (1. + np.exp(-1. * \
-                        self._tables[table][column] ** 2)))
-                        ).astype(float)
+            for table in list(self._tables):
+                data = self._get_table_writeable(table)
+                for column in data.dtype.names[1:]:
+                    data[column] = (1. - (2. / (1. + np.exp(-1. * \
+                        data[column] ** 2)))).astype(float)
             return True
 
         raise ValueError(
@@ -595,7 +599,7 @@ class Dataset(nbase.ObjectIP):
                 new_rec_array[colname] = (trans_array[:, colid]).astype(float)
 
             # set record array
-            self._tables[table] = new_rec_array
+            self._set_table(table, new_rec_array)
 
         # create trivial column mapping
         colmapping = { col: col for col in tgtcols }
@@ -620,6 +624,7 @@ class Dataset(nbase.ObjectIP):
         if key == 'colfilter': return self._get_colfilter(*args, **kwds)
         if key == 'colfilters': return self._get_colfilters()
         if key == 'data': return self._get_data(*args, **kwds)
+        if key == 'chunks': return self._get_chunks(*args, **kwds)
         if key == 'rows': return self._get_rows(*args, **kwds)
         if key == 'rowgroups': return self._get_rowgroups(*args, **kwds)
         if key == 'rowfilter': return self._get_rowfilter(*args, **kwds)
@@ -632,6 +637,12 @@ class Dataset(nbase.ObjectIP):
             return self._get_copy(*args, **kwds)
         if key == 'config':
             return self._get_config(*args, **kwds)
+        if key == 'snapshot':
+            return self._get_snapshot()
+        if key == 'fingerprint':
+            return self._get_fingerprint(*args, **kwds)
+        if key == 'tables_version':
+            return self._get_tables_version()
         if key == 'tables':
             return self._get_table(*args, **kwds)
 
@@ -892,6 +903,82 @@ class Dataset(nbase.ObjectIP):
         return self._get_data_corrupt(fmt_data, \
             type = noise[0], factor = noise[1])
 
+    def _get_chunks(self, size: int = 10000, rows: str = '*',
+            cols: str = '*', output: str = 'array'):
+        """Iterate over data in chunks of rows.
+
+        In difference to :meth:`_get_data` the tables are not concatenated,
+        but sliced into chunks of consecutive rows, such that the data of
+        arbitrary large (e.g. memory mapped) tables can be processed with
+        constant memory.
+
+        Args:
+            size (int, optional): maximum number of rows per chunk
+                default: 10000
+            rows (str, optional): name of row select filter
+                default: '*' selects all rows
+            cols (str, list or tuple, optional): name of column select
+                filter, list of columns or tuple of column select filters
+                default: '*' selects all columns
+            output (str or tuple of str, optional): data return format
+                of the chunks, as accepted by :meth:`_get_data_format`
+                default: 'array'
+
+        Yields:
+            Data of chunks in given format. If 'cols' is a tuple, every
+            chunk is given by a tuple with the respective data formats.
+
+        """
+
+        if not isinstance(size, int) or size <= 0:
+            raise ValueError(
+                "could not get chunks: "
+                "argument 'size' is required to be a positive integer.")
+
+        # get row filter
+        if isinstance(rows, str):
+            if rows not in self._config['rowfilter']:
+                raise ValueError("invalid row filter '%s'!" % rows)
+            rowfilter = self._config['rowfilter'][rows]
+        else:
+            rowfilter = rows
+
+        # get column filters
+        if isinstance(cols, str):
+            colsel = self._get_columns(cols)
+        elif isinstance(cols, list):
+            colsel = cols
+        elif isinstance(cols, tuple):
+            colsel = tuple(self._get_columns(col) for col in cols)
+        else:
+            raise ValueError(
+                "could not get chunks: "
+                "invalid argument for columns!")
+
+        for table in self._tables.keys():
+            data = self._tables[table]
+            if '*:*' in rowfilter or table + ':*' in rowfilter:
+                labels = None
+            else:
+                labels = [
+                    row.split(':')[1] for row in rowfilter
+                    if row.split(':')[0] in [table, '*']]
+                if not labels: continue
+
+            # slicing of tables creates views, which for memory mapped
+            # tables do not load the remaining rows
+            for start in range(0, data.shape[0], size):
+                chunk = data[start:start + size]
+                if labels is not None:
+                    chunk = chunk[np.isin(chunk['label'], labels)]
+                    if not chunk.size: continue
+                if isinstance(colsel, tuple):
+                    yield tuple(self._get_data_format(chunk,
+                        cols = col, output = output) for col in colsel)
+                else:
+                    yield self._get_data_format(chunk,
+                        cols = colsel, output = output)
+
     def _get_data_format(self, data, cols = '*', output = 'array'):
         """Return data in given format.
 
@@ -1190,6 +1277,55 @@ class Dataset(nbase.ObjectIP):
 
         return np.take(data, rowsel)
 
+    def _get_snapshot(self):
+        """Get snapshot of dataset configuration and table references.
+
+        In difference to a copy of the dataset, the snapshot does not copy
+        the tables, but only references them. Since the system based
+        transformation of the dataset replaces the tables by new tables
+        instead of modifying them, the snapshot can be used to restore the
+        state of the dataset before a transformation, without duplicating
+        its data.
+
+        Returns:
+            Dictionary with keys 'config' and 'tables'.
+
+        """
+
+        # the tables are referenced by the snapshot from now on, such that
+        # they are copied before in-place modifications
+        self._tables_shared = frozenset(self._tables)
+
+        return {
+            'config': copy.deepcopy(self._config),
+            'tables': self._tables.copy() }
+
+    def _get_fingerprint(self):
+        """Get fingerprint of dataset configuration and tables.
+
+        The fingerprint identifies the configuration and the version of the
+        tables, which changes with every modification of the tables, such
+        that it can be calculated in constant time for arbitrary large
+        tables. It is intended to detect modifications of the dataset, e.g.
+        for cached evaluations.
+
+        Returns:
+            Hexadecimal string, which identifies the dataset.
+
+        """
+
+        return cache.fingerprint(self._config, self._get_tables_version())
+
+    def _get_tables_version(self):
+        """Get version of dataset tables.
+
+        The version is renewed, whenever the tables are set, replaced or
+        modified in place. It is used to invalidate cached evaluations of
+        the dataset.
+
+        """
+        return self._tables_version
+
     def _get_value(self, row = None, col = None):
         """Get single value from dataset."""
         return float(self._get_data(cols = [col], rows = [row]))
@@ -1206,6 +1342,32 @@ class Dataset(nbase.ObjectIP):
         raise ValueError("""could not get table:
             unknown tables name '%s'.""" % key) or None
 
+    def _get_table_writeable(self, table):
+        """Get dataset table for in-place modification.
+
+        Tables, which are referenced by snapshots or which are not writeable,
+        like tables that are attached from shared memory, are copied before
+        their first in-place modification (copy on write), such that the
+        referenced tables are not modified.
+
+        Args:
+            table (str): name of table
+
+        Since the table is modified by the caller, the version of the
+        tables is renewed.
+
+        Returns:
+            NumPy record array, that may be modified in place.
+
+        """
+
+        data = self._tables[table]
+        if table in self._tables_shared or not data.flags.writeable:
+            self._set_table(table, data.copy())
+        else:
+            self._set_tables_version()
+        return self._tables[table]
+
     def set(self, key = None, *args, **kwds):
         """Set meta information, parameters and data of dataset."""
 
@@ -1220,6 +1382,7 @@ class Dataset(nbase.ObjectIP):
         # import dataset configuration and dataset tables
         if key == 'copy': return self._set_copy(*args, **kwds)
         if key == 'config': return self._set_config(*args, **kwds)
+        if key == 'snapshot': return self._set_snapshot(*args, **kwds)
         if key == 'tables': return self._set_tables(*args, **kwds)
 
         raise KeyError(f"unknown key '{key}'")
@@ -1333,7 +1496,53 @@ class Dataset(nbase.ObjectIP):
 
         # 2do: reconfigure!?
         self._tables = {}
+        self._set_tables_version()
+
+        return True
+
+    def _set_snapshot(self, config = None, tables = None):
+        """Restore dataset configuration and tables from snapshot.
+
+        Args:
+            config (dict): dataset configuration of snapshot
+            tables (dict): dataset table references of snapshot
+
+        Returns:
+            Bool which is True if and only if no error occured.
+
+        """
+
+        if not isinstance(config, dict) or not isinstance(tables, dict):
+            raise ValueError("snapshot is not valid")
+
+        self._config = config
+        self._tables = tables.copy()
+        self._tables_shared = frozenset(self._tables)
+        self._set_tables_version()
+
+        return True
+
+    def _set_table(self, table, data):
+        """Replace dataset table.
+
+        Args:
+            table (str): name of table
+            data (NumPy record array): new table data
+
+        Returns:
+            Bool which is True if and only if no error occured.
+
+        """
+
+        self._tables[table] = data
+        self._tables_shared = self._tables_shared - {table}
+        self._set_tables_version()
+
+        return True
 
+    def _set_tables_version(self):
+        """Renew version of dataset tables."""
+        self._tables_version = next(_tables_versions)
         return True
 
     def _set_tables(self, tables = None):
@@ -1351,6 +1560,8 @@ class Dataset(nbase.ObjectIP):
             return True
 
         self._tables = {**self._tables, **tables}
+        self._tables_shared = self._tables_shared - set(tables)
+        self._set_tables_version()
         return True
 
     def evaluate(self, name = None, *args, **kwds):
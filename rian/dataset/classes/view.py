@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Frootlab
+# Copyright (C) 2013-2019 Patrick Michl
+#
+# This file is part of Frootlab Rian, https://www.frootlab.org/rian
+#
+#  Rian is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  Rian is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#  You should have received a copy of the GNU General Public License along with
+#  Rian. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Dataset views.
+
+Dataset views provide the data of a parent dataset, that is transformed by a
+system, without duplicating or modifying the tables of the parent dataset.
+The transformation is evaluated lazily for the requested rows, such that
+views can be chained, e.g. for the layerwise pretraining of deep networks.
+
+"""
+
+__copyright__ = '2019 Frootlab'
+__license__ = 'GPLv3'
+__docformat__ = 'google'
+__author__ = 'Frootlab Developers'
+__email__ = 'contact@frootlab.org'
+__authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
+
+import copy
+from typing import Any, Optional
+import numpy as np
+from numpy.lib import recfunctions as nprec
+from hup.base import otree
+from rian.base import cache
+from rian.dataset.classes import base
+
+class View(base.Dataset):
+    """Dataset view of a system transformation of a parent dataset.
+
+    The tables of a dataset view only contain the row labels of the parent
+    dataset. The columns of the view are given by the target units of the
+    system mapping and their values are calculated on access by transforming
+    the corresponding rows of the parent dataset. Thereby the transformation
+    uses the current parameters of the system, such that the view follows
+    the system during its optimization. If the system is not modified any
+    further, the option 'cache' allows to store the transformed rows in
+    chunks of 'chunksize' rows, which are calculated on their first access.
+
+    """
+
+    _parent: Optional[base.Dataset] = None
+    _system: Any = None
+    _cache: Optional[dict] = None
+    _default = {
+        'name': None,
+        'type': 'view.View',
+        'mapping': None,
+        'func': 'expect',
+        'cache': False,
+        'chunksize': 10000 }
+
+    def __init__(self, parent: Optional[base.Dataset] = None,
+            system: Any = None, *args: Any, **kwds: Any) -> None:
+        """Initialize dataset view with parent dataset and system."""
+
+        super().__init__(*args, **kwds)
+
+        if parent is not None:
+            self._set_view(parent, system)
+
+    def _get_copy(self, key: Optional[str] = None) -> Any:
+        """Get materialized copy of dataset view.
+
+        The copy of a dataset view is not a view, but a dataset with the
+        transformed tables of the view, such that it can be used and stored
+        independent of the parent dataset and the system.
+
+        """
+
+        config = copy.deepcopy(self._config)
+        config['type'] = 'base.Dataset'
+        for attrib in ['mapping', 'func', 'cache', 'chunksize', 'source']:
+            config.pop(attrib, None)
+        tables = self._get_tables()
+
+        if key is None: return {'config': config, 'tables': tables}
+        if key == 'config': return config
+        if key == 'tables': return tables
+
+        raise KeyError(f"unknown key '{key}'")
+
+    def _get_fingerprint(self) -> str:
+        """Get fingerprint of dataset view.
+
+        Since the rows of the view are transformed on access, the
+        fingerprint also identifies the parent dataset and the version of
+        the parameters of the system.
+
+        """
+
+        return cache.fingerprint(self._config, self._get_tables_version(),
+            self._parent._get_fingerprint(),
+            self._system.get('params_version'))
+
+    def _get_table(self, table = None, cols = '*', rows = '*',
+        size = 0, labels = False):
+        """Get transformed data from tables.
+
+        Args:
+            table (string or None, optional): name of table.
+                If None, the transformed data of all tables is returned.
+            cols (string, optional): string describing a column filter
+                using wildcards. Default value '*' selects all columns.
+            rows (string, optional): string describing a row filter
+                using wildcards. Default value '*' selects all rows.
+            size (int, optional): number of random choosen samples to
+                return. Default value 0 returns all samples of given
+                source.
+            labels (bool, optional): if True, the returned table
+                contains a column 'label' which contains row labels.
+
+        Returns:
+            Numpy recarray with data from a single dataset table.
+
+        """
+
+        if table is None:
+            return self._get_tables()
+
+        # check table name
+        if not isinstance(table, str) or table not in self._tables:
+            raise ValueError(
+                "could not retrieve data: "
+                "invalid table name: '%s'." % table)
+
+        # get columns from column filter
+        colnames = self._get_colnames(self._get_columns(cols))
+
+        # get row ids from row filter and (optional) stratify rows
+        rowids = self._get_rowids(table, rows)
+        if size:
+            fraction = self._config['table'][table]['fraction']
+            rowids = rowids[np.random.randint(rowids.size,
+                size = int(round(fraction * size)))]
+
+        return self._get_table_rows(table, rowids, colnames, labels)
+
+    def _get_table_rows(self, table: str, rowids: np.ndarray,
+            colnames: Optional[list] = None,
+            labels: bool = False) -> np.recarray:
+        """Get transformed rows of a table as record array.
+
+        Args:
+            table: name of table
+            rowids: numpy array with ids of rows
+            colnames: list of column names. By default all columns of the
+                view are returned.
+            labels: if True, the returned table contains a column 'label'
+                which contains row labels.
+
+        Returns:
+            Numpy recarray with the transformed rows.
+
+        """
+
+        columns = self._get_colnames(self._get_columns())
+        if colnames is None: colnames = columns
+        select = [columns.index(col) for col in colnames]
+
+        # transform rows and create record array
+        values = self._get_array(table, rowids)[:, select]
+        names = list(colnames)
+        formats = ['<f8'] * len(names)
+        if labels:
+            names = ['label'] + names
+            formats = [self._tables[table].dtype['label']] + formats
+        data = np.recarray((rowids.size, ),
+            dtype = list(zip(names, formats)))
+        if labels:
+            data['label'] = self._tables[table]['label'][rowids]
+        for colid, colname in enumerate(colnames):
+            data[colname] = values[:, colid]
+
+        return data
+
+    def _get_chunks(self, size: int = 10000, rows: Any = '*',
+            cols: Any = '*', output: Any = 'array'):
+        """Iterate over transformed data in chunks of rows.
+
+        In difference to the chunks of a dataset, the chunks of a view are
+        not sliced from the tables, but transformed from the rows of the
+        parent dataset on access.
+
+        Args:
+            size (int, optional): maximum number of rows per chunk
+                default: 10000
+            rows (str, optional): name of row select filter
+                default: '*' selects all rows
+            cols (str, list or tuple, optional): name of column select
+                filter, list of columns or tuple of column select filters
+                default: '*' selects all columns
+            output (str or tuple of str, optional): data return format
+                of the chunks, as accepted by :meth:`_get_data_format`
+                default: 'array'
+
+        Yields:
+            Data of chunks in given format. If 'cols' is a tuple, every
+            chunk is given by a tuple with the respective data formats.
+
+        """
+
+        if not isinstance(size, int) or size <= 0:
+            raise ValueError(
+                "could not get chunks: "
+                "argument 'size' is required to be a positive integer.")
+
+        # get column filters
+        if isinstance(cols, str):
+            colsel = self._get_columns(cols)
+        elif isinstance(cols, list):
+            colsel = cols
+        elif isinstance(cols, tuple):
+            colsel = tuple(self._get_columns(col) for col in cols)
+        else:
+            raise ValueError(
+                "could not get chunks: "
+                "invalid argument for columns!")
+
+        for table in self._tables:
+            rowids = self._get_rowids(table, rows)
+            for start in range(0, rowids.size, size):
+                chunk = self._get_table_rows(
+                    table, rowids[start:start + size], labels = True)
+                if isinstance(colsel, tuple):
+                    yield tuple(self._get_data_format(chunk,
+                        cols = col, output = output) for col in colsel)
+                else:
+                    yield self._get_data_format(chunk,
+                        cols = colsel, output = output)
+
+    def _get_tables(self, key = None):
+        """Get transformed dataset tables."""
+
+        if key is None:
+            return {table: self._get_table(table, labels = True)
+                for table in self._tables}
+
+        if isinstance(key, str) and key in self._tables:
+            return self._get_table(key, labels = True)
+
+        raise ValueError("""could not get table:
+            unknown tables name '%s'.""" % key) or None
+
+    def _get_rowids(self, table: str, rows: Any = '*') -> np.ndarray:
+        """Get ids of rows of a table, that are selected by a row filter."""
+
+        if isinstance(rows, str):
+            if rows not in self._config['rowfilter']:
+                raise ValueError("invalid row filter '%s'!" % rows)
+            rowfilter = self._config['rowfilter'][rows]
+        else:
+            rowfilter = rows
+
+        size = self._tables[table].size
+        if '*:*' in rowfilter or table + ':*' in rowfilter:
+            return np.arange(size)
+
+        names = [row.split(':')[1] for row in rowfilter
+            if row.split(':')[0] in [table, '*']]
+
+        return np.flatnonzero(np.isin(self._tables[table]['label'], names))
+
+    def _get_array(self, table: str,
+            rowids: Optional[np.ndarray] = None) -> np.ndarray:
+        """Get transformed data of rows as unstructured array.
+
+        Args:
+            table: name of table
+            rowids: numpy array with ids of rows. By default all rows
+                of the table are transformed.
+
+        Returns:
+            Numpy ndarray, that contains the values of all columns of the
+            view in the order of the target units of the system mapping.
+
+        """
+
+        if rowids is None:
+            rowids = np.arange(self._tables[table].size)
+
+        if not self._config.get('cache', False):
+            return self._get_transform(self._get_source(table, rowids))
+
+        # calculate missing chunks
+        cache = self._cache.setdefault(table, {})
+        chunksize = max(int(self._config.get('chunksize') or 1), 1)
+        size = self._tables[table].size
+        chunkids = rowids // chunksize
+        for chunk in np.unique(chunkids).tolist():
+            if chunk in cache: continue
+            chunkrows = np.arange(chunk * chunksize,
+                min((chunk + 1) * chunksize, size))
+            cache[chunk] = self._get_transform(
+                self._get_source(table, chunkrows))
+
+        # gather rows from chunks
+        values = np.empty((rowids.size, len(self._config['columns'])))
+        for chunk in np.unique(chunkids).tolist():
+            mask = chunkids == chunk
+            values[mask] = cache[chunk][rowids[mask] - chunk * chunksize]
+
+        return values
+
+    def _get_source(self, table: str, rowids: np.ndarray) -> np.ndarray:
+        """Get source data of rows from parent dataset."""
+
+        parent = self._parent
+        srccols = self._config['source']
+
+        # parent dataset views provide unstructured arrays
+        if isinstance(parent, View):
+            columns = parent._get_columns()
+            select = [columns.index(col) for col in srccols]
+            return parent._get_array(table, rowids)[:, select]
+
+        # dataset columns may map to identical table columns
+        colnames = parent._get_colnames(srccols)
+        redcols = sorted(set(colnames), key = colnames.index)
+        select = [redcols.index(col) for col in colnames]
+        sliced = parent._tables[table][redcols][rowids]
+
+        return nprec.structured_to_unstructured(sliced)[:, select]
+
+    def _get_transform(self, data: np.ndarray) -> np.ndarray:
+        """Transform source data by system mapping."""
+
+        mapping = self._config['mapping']
+        func = self._config.get('func', 'expect')
+
+        if func == 'expect':
+            return self._system._get_unitexpect(data, mapping)
+        if func == 'value':
+            return self._system._get_unitvalues(data, mapping)
+        if func == 'sample':
+            return self._system._get_unitsamples(data, mapping)
+
+        raise ValueError(
+            "could not transform data: "
+            "unsupported transformation function '%s'." % func)
+
+    def _set_view(self, parent: base.Dataset, system: Any) -> bool:
+        """Set parent dataset and system of dataset view.
+
+        Args:
+            parent: dataset instance, which contains the source data
+            system: system instance, that transforms the source data
+
+        Returns:
+            Bool which is True if and only if no error occured.
+
+        """
+
+        if not otree.has_base(parent, 'Dataset'):
+            raise ValueError("dataset is not valid")
+        if not otree.has_base(system, 'System'):
+            raise ValueError("system is not valid")
+
+        self._config = {**self._default, **(self._config or {})}
+        mapping = self._config.get('mapping') or system.mapping
+        srccols = system.get('units', layer = mapping[0])
+        tgtcols = system.get('units', layer = mapping[-1])
+        if [col for col in srccols if col not in parent._get_columns()]:
+            raise ValueError("""could not create dataset view:
+                dataset does not contain the source units of the system.""")
+
+        # the tables of the view only reference the row labels of the parent
+        self._parent = parent
+        self._system = system
+        self._cache = {}
+        self._tables = {table: parent._tables[table][['label']]
+            for table in parent._tables}
+
+        # configure view
+        config = parent._config
+        self._config['name'] = self._config.get('name') or config.get('name')
+        self._config['mapping'] = tuple(mapping)
+        self._config['source'] = list(srccols)
+        self._config['table'] = copy.deepcopy(config.get('table', {}))
+        self._config['rowfilter'] = copy.deepcopy(config.get('rowfilter', {}))
+        self._config['colfilter'] = {'*': ['*:*']}
+        self._config['colmapping'] = {col: col for col in tgtcols}
+        self._config['columns'] = tuple(
+            tuple(col.split(':')) if ':' in col else ('', col)
+            for col in tgtcols)
+
+        return True
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Frootlab
+# Copyright (C) 2013-2019 Patrick Michl
+#
+# This file is part of Frootlab Rian, https://www.frootlab.org/rian
+#
+#  Rian is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  Rian is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#  You should have received a copy of the GNU General Public License along with
+#  Rian. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Shared memory export of dataset instances.
+
+The tables of a dataset are copied into blocks of shared memory once. The
+returned handle only comprises the dataset configuration and references to
+the blocks, such that it can cheaply be pickled and passed to worker
+processes, which attach the tables without copying them.
+
+"""
+
+__copyright__ = '2019 Frootlab'
+__license__ = 'GPLv3'
+__docformat__ = 'google'
+__author__ = 'Frootlab Developers'
+__email__ = 'contact@frootlab.org'
+__authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
+
+import copy
+import weakref
+from hup.base import otree
+import rian
+from rian.base import shared
+
+# shared memory blocks, which are attached by the current process
+_attached = {}
+
+class Share:
+    """Shared memory export of dataset instance.
+
+    The instance owns the shared memory blocks of the dataset tables. The
+    blocks are destroyed, when the instance is closed, which is done by
+    calling :meth:`close`, by leaving the context of the instance or at
+    latest when the instance is garbage collected.
+
+    Args:
+        dataset (dataset instance): rian dataset instance
+
+    Attributes:
+        handle (dict): picklable handle of the shared dataset with keys
+            'config' and 'tables', which can be passed to :func:`attach`
+
+    """
+
+    def __init__(self, dataset):
+        if not otree.has_base(dataset, 'Dataset'):
+            raise ValueError("dataset is not valid")
+
+        snapshot = dataset.get('snapshot')
+        blocks = []
+        tables = {}
+        try:
+            for name, table in snapshot['tables'].items():
+                block, array = shared.share(table)
+                blocks.append(block)
+                tables[name] = shared.get_handle(block, array)
+                del array # the block can not be closed with exported views
+        except Exception:
+            _release(blocks, unlink = True)
+            raise
+
+        self.handle = {'config': snapshot['config'], 'tables': tables}
+        self._finalizer = weakref.finalize(
+            self, _release, blocks, unlink = True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def closed(self):
+        """True if the shared memory blocks have been destroyed."""
+        return not self._finalizer.alive
+
+    def close(self):
+        """Destroy shared memory blocks of dataset tables.
+
+        Datasets, which are attached to the blocks by other processes,
+        remain valid until they are detached, but the blocks can not be
+        attached anymore.
+
+        """
+        self._finalizer()
+
+def share(dataset):
+    """Export dataset instance to shared memory.
+
+    Args:
+        dataset (dataset instance): rian dataset instance
+
+    Returns:
+        Instance of class :class:`Share`, which owns the shared memory blocks
+        and provides the picklable handle of the dataset.
+
+    """
+    return Share(dataset)
+
+def attach(handle):
+    """Create dataset instance from handle of shared dataset.
+
+    The tables of the created dataset are read-only NumPy arrays, which use
+    the shared memory blocks as buffers. Blocks, which already have been
+    attached by the current process, are reused, such that multiple datasets
+    created from the same handle share their tables. Transformations, which
+    modify the tables in place, like the normalization, copy the shared
+    tables before their first modification, such that the shared tables are
+    not modified.
+
+    Args:
+        handle (dict): handle of shared dataset, given by the attribute
+            'handle' of a :class:`Share` instance
+
+    Returns:
+        Dataset instance with the configuration of the shared dataset.
+
+    """
+
+    if not isinstance(handle, dict) or not 'tables' in handle:
+        raise ValueError("dataset handle is not valid")
+
+    tables = {}
+    for name, ref in handle['tables'].items():
+        if not ref.name in _attached:
+            block, array = shared.attach(ref)
+            array.flags.writeable = False
+            _attached[ref.name] = (block, array)
+        tables[name] = _attached[ref.name][1]
+
+    config = copy.deepcopy(handle['config'])
+    dataset = rian.dataset.new(config = config)
+    dataset.set('snapshot', config = config, tables = tables)
+
+    return dataset
+
+def detach(handle = None):
+    """Release shared memory blocks, attached by the current process.
+
+    Args:
+        handle (dict, optional): handle of shared dataset. By default all
+            blocks, that are attached by the current process, are released.
+
+    """
+
+    if handle is None: names = list(_attached)
+    else: names = [ref.name for ref in handle['tables'].values()]
+    blocks = [_attached.pop(name)[0] for name in names if name in _attached]
+    _release(blocks)
+
+def _release(blocks, unlink = False):
+    """Release shared memory blocks."""
+    for block in blocks: shared.release(block, unlink = unlink)
@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Frootlab
+# Copyright (C) 2013-2019 Patrick Michl
+#
+# This file is part of Frootlab Rian, https://www.frootlab.org/rian
+#
+#  Rian is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  Rian is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#  You should have received a copy of the GNU General Public License along with
+#  Rian. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Gradient based update rules.
+
+This module provides update rules for the iterative optimization of parameter
+arrays by gradients, as used by backpropagation of error. These comprise::
+
+    * Plain gradient steps
+    * Momentum based steps (Classical Momentum, Nesterov Momentum)
+    * Adaptive steps (RMSProp, Adam, Resilient Propagation)
+
+The update rules do not allocate new arrays for every step, but store their
+state, including the returned step, in preallocated arrays, which are reused
+in subsequent steps.
+
+"""
+__copyright__ = '2019 Frootlab'
+__license__ = 'GPLv3'
+__docformat__ = 'google'
+__author__ = 'Frootlab Developers'
+__email__ = 'contact@frootlab.org'
+__authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
+
+from typing import Any, Dict, Hashable
+import numpy as np
+from hup.base import call, catalog
+from hup.typing import StrList
+from rian.typing import NpArray
+
+#
+# Define Catalog Categories
+#
+
+@catalog.category
+class Rule:
+    name: str
+
+#
+# Update rules
+#
+
+def rules() -> StrList:
+    """Get sorted list of update rules.
+
+    Returns:
+        Sorted list of all update rules, that are implemented within the
+        module.
+
+    """
+    return sorted(catalog.search(Rule).get('name'))
+
+def step(
+        grad: NpArray, state: dict, name: str = 'sgd', **kwds: Any) -> NpArray:
+    """Calculate update step of a parameter array.
+
+    Args:
+        grad: Numpy ndarray, which contains the gradient of the objective
+            function with respect to the parameter array, in the direction of
+            the optimization.
+        state: Dictionary, which contains the state of the update rule for the
+            parameter array. The state is initialized by an empty dictionary
+            and updated by each step.
+        name: Name of update rule. Default: 'sgd'
+        **kwds: Hyperparameters of the update rule. Hyperparameters, that are
+            not supported by the update rule, are ignored.
+
+    Returns:
+        Numpy ndarray which contains the update step of the parameter array.
+        The array is reused by subsequent steps.
+
+    """
+    f = catalog.pick(Rule, name=name)
+
+    return call.safe_call(f, grad=grad, state=state, **kwds)
+
+@catalog.register(Rule, name='sgd')
+def sgd(grad: NpArray, state: dict, rate: float = .1) -> NpArray:
+    """Calculate plain gradient step.
+
+    Args:
+        grad: Numpy ndarray, which contains the gradient of the parameter array
+        state: Dictionary, which contains the state of the update rule
+        rate: Learning rate. Default: 0.1
+
+    Returns:
+        Numpy ndarray which contains the update step of the parameter array.
+
+    """
+    out = _get_buffer(state, 'step', grad)
+
+    return np.multiply(grad, rate, out=out)
+
+@catalog.register(Rule, name='momentum')
+def momentum(
+        grad: NpArray, state: dict, rate: float = .1,
+        beta: float = .9) -> NpArray:
+    """Calculate gradient step with classical momentum.
+
+    Args:
+        grad: Numpy ndarray, which contains the gradient of the parameter array
+        state: Dictionary, which contains the state of the update rule
+        rate: Learning rate. Default: 0.1
+        beta: Decay rate of the velocity. Default: 0.9
+
+    Returns:
+        Numpy ndarray which contains the update step of the parameter array.
+
+    """
+    out = _get_buffer(state, 'step', grad)
+    vel = _get_buffer(state, 'velocity', grad)
+
+    vel *= beta
+    vel += np.multiply(grad, rate, out=out)
+    np.copyto(out, vel)
+
+    return out
+
+@catalog.register(Rule, name='nesterov')
+def nesterov(
+        grad: NpArray, state: dict, rate: float = .1,
+        beta: float = .9) -> NpArray:
+    """Calculate gradient step with Nesterov momentum.
+
+    The step is calculated in the reformulation of Sutskever et al., which
+    evaluates the gradient at the current parameters, instead of the look
+    ahead parameters.
+
+    Args:
+        grad: Numpy ndarray, which contains the gradient of the parameter array
+        state: Dictionary, which contains the state of the update rule
+        rate: Learning rate. Default: 0.1
+        beta: Decay rate of the velocity. Default: 0.9
+
+    Returns:
+        Numpy ndarray which contains the update step of the parameter array.
+
+    """
+    out = _get_buffer(state, 'step', grad)
+    vel = _get_buffer(state, 'velocity', grad)
+    tmp = _get_buffer(state, 'cache', grad)
+
+    vel *= beta
+    vel += np.multiply(grad, rate, out=out)
+    out += np.multiply(vel, beta, out=tmp)
+
+    return out
+
+@catalog.register(Rule, name='rmsprop')
+def rmsprop(
+        grad: NpArray, state: dict, rate: float = .001, rho: float = .9,
+        eps: float = 1e-8) -> NpArray:
+    """Calculate gradient step with RMSProp.
+
+    Args:
+        grad: Numpy ndarray, which contains the gradient of the parameter array
+        state: Dictionary, which contains the state of the update rule
+        rate: Learning rate. Default: 0.001
+        rho: Decay rate of the mean square of the gradient. Default: 0.9
+        eps: Small positive value for numerical stability. Default: 1e-8
+
+    Returns:
+        Numpy ndarray which contains the update step of the parameter array.
+
+    """
+    out = _get_buffer(state, 'step', grad)
+    msq = _get_buffer(state, 'msq', grad)
+
+    msq *= rho
+    msq += np.multiply(np.square(grad, out=out), 1. - rho, out=out)
+    np.sqrt(msq, out=out)
+    out += eps
+    np.divide(grad, out, out=out)
+    out *= rate
+
+    return out
+
+@catalog.register(Rule, name='adam')
+def adam(
+        grad: NpArray, state: dict, rate: float = .001, beta1: float = .9,
+        beta2: float = .999, eps: float = 1e-8) -> NpArray:
+    """Calculate gradient step with Adam.
+
+    Args:
+        grad: Numpy ndarray, which contains the gradient of the parameter array
+        state: Dictionary, which contains the state of the update rule
+        rate: Learning rate. Default: 0.001
+        beta1: Decay rate of the first moment of the gradient. Default: 0.9
+        beta2: Decay rate of the second moment of the gradient. Default: 0.999
+        eps: Small positive value for numerical stability. Default: 1e-8
+
+    Returns:
+        Numpy ndarray which contains the update step of the parameter array.
+
+    """
+    out = _get_buffer(state, 'step', grad)
+    mean = _get_buffer(state, 'mean', grad)
+    msq = _get_buffer(state, 'msq', grad)
+    state['count'] = count = state.get('count', 0) + 1
+
+    # update biased estimates of first and second moment
+    mean *= beta1
+    mean += np.multiply(grad, 1. - beta1, out=out)
+    msq *= beta2
+    msq += np.multiply(np.square(grad, out=out), 1. - beta2, out=out)
+
+    # calculate step with bias corrected learning rate
+    np.sqrt(msq, out=out)
+    out += eps
+    np.divide(mean, out, out=out)
+    out *= rate * np.sqrt(1. - beta2 ** count) / (1. - beta1 ** count)
+
+    return out
+
+@catalog.register(Rule, name='rprop')
+def rprop(
+        grad: NpArray, state: dict, accel: tuple = (.5, 1., 1.2),
+        init_rate: float = .001, min_factor: float = .000001,
+        max_factor: float = 50.) -> NpArray:
+    """Calculate gradient step with resilient propagation (RPROP).
+
+    Args:
+        grad: Numpy ndarray, which contains the gradient of the parameter array
+        state: Dictionary, which contains the state of the update rule
+        accel: Triple of factors, which are applied to the step sizes, if the
+            sign of the gradient changed, vanished or persisted. Default:
+            (0.5, 1.0, 1.2)
+        init_rate: Initial step size. Default: 0.001
+        min_factor: Minimum step size. Default: 0.000001
+        max_factor: Maximum step size. Default: 50.0
+
+    Returns:
+        Numpy ndarray which contains the update step of the parameter array.
+
+    """
+    out = _get_buffer(state, 'step', grad)
+    sign = _get_buffer(state, 'sign', grad)
+    size = _get_buffer(state, 'size', grad, fill=init_rate)
+    factor = _get_buffer(state, 'factor', grad)
+
+    # get factors from the product of the current and the previous sign
+    np.sign(grad, out=out)
+    sign *= out
+    factor.fill(accel[1])
+    np.copyto(factor, accel[0], where=sign < 0)
+    np.copyto(factor, accel[2], where=sign > 0)
+    np.copyto(sign, out)
+
+    # update step sizes
+    size *= factor
+    np.clip(size, min_factor, max_factor, out=size)
+
+    return np.multiply(out, size, out=out)
+
+#
+# Update engine
+#
+
+class Engine:
+    """Update engine for parameter arrays.
+
+    The update engine applies an update rule to a collection of parameter
+    arrays, which are identified by hashable keys, and keeps the state of the
+    update rule for each of the parameter arrays.
+
+    Args:
+        name: Name of update rule. Default: 'sgd'
+        **kwds: Hyperparameters of the update rule. Hyperparameters, that are
+            not supported by the update rule, are ignored.
+
+    """
+
+    name: str
+    kwds: Dict[str, Any]
+    states: Dict[Hashable, dict]
+
+    def __init__(self, name: str = 'sgd', **kwds: Any) -> None:
+        if name not in rules():
+            raise ValueError(f"unknown update rule '{name}'")
+        self.name = name
+        self.kwds = kwds
+        self.states = {}
+
+    def step(self, key: Hashable, grad: NpArray) -> NpArray:
+        """Calculate update step of a parameter array.
+
+        Args:
+            key: Hashable key, that identifies the parameter array
+            grad: Numpy ndarray, which contains the gradient of the parameter
+                array, in the direction of the optimization.
+
+        Returns:
+            Numpy ndarray which contains the update step of the parameter
+            array. The array is reused by subsequent steps.
+
+        """
+        state = self.states.setdefault(key, {})
+
+        return step(grad, state, name=self.name, **self.kwds)
+
+    def update(self, key: Hashable, param: NpArray, grad: NpArray) -> None:
+        """Update parameter array in place.
+
+        Args:
+            key: Hashable key, that identifies the parameter array
+            param: Numpy ndarray, which contains the parameter array
+            grad: Numpy ndarray, which contains the gradient of the parameter
+                array, in the direction of the optimization.
+
+        """
+        param += self.step(key, grad)
+
+    def reset(self) -> None:
+        """Reset states of the update rule."""
+        self.states = {}
+
+#
+# Helper functions
+#
+
+def _get_buffer(
+        state: dict, key: str, grad: NpArray, fill: float = 0.) -> NpArray:
+    # Get preallocated array from state or allocate array, if the shape of
+    # the gradient changed, e.g. by the removal of units
+    buf = state.get(key)
+    if buf is None or buf.shape != grad.shape:
+        buf = state[key] = np.full(grad.shape, fill, dtype=float)
+    return buf
@@ -281,3 +281,76 @@ def pq_dist(
 
     """
     return pq_norm(x - y, p=p, q=q, axes=axes)
+
+#
+# Matrix Correlation
+#
+
+def corrcoef(x: NpArrayLike, y: NpArrayLike, chunksize: int = 0) -> NpArray:
+    """Calculate Pearson correlation coefficients between columns of matrices.
+
+    In difference to :func:`numpy.corrcoef`, which calculates the symmetric
+    correlation matrix of all columns of the stacked matrices, only the block
+    of correlations between the columns of *x* and the columns of *y* is
+    calculated. The correlations are given by the matrix product of the
+    centered columns, which are normalized by their lengths.
+
+    Args:
+        x: Any sequence that can be interpreted as a numpy ndarray of two
+            dimensions, with observations in the rows and variables in the
+            columns.
+        y: Any sequence that can be interpreted as a numpy ndarray of two
+            dimensions, with the same number of rows as 'x'.
+        chunksize: Positive integer, which determines the number of rows, that
+            are processed at once. If the chunksize is 0, all rows are
+            processed at once. Otherwise the matrix products are accumulated
+            over chunks of rows, such that the additional memory is bounded by
+            the chunksize. This allows to use memory mapped arrays, which
+            exceed the memory. The default value is 0.
+
+    Returns:
+        :class:`numpy.ndarray` of shape (*m*, *n*), where *m* is the number of
+        columns in 'x' and *n* the number of columns in 'y'. The correlation
+        coefficients of constant columns are NaN.
+
+    """
+    # Try to cast 'x' and 'y' as arrays
+    x = array.cast(x)
+    y = array.cast(y)
+
+    # Check dimensions of 'x' and 'y'
+    if x.ndim != 2 or y.ndim != 2:
+        raise ValueError("arrays 'x' and 'y' are required to be matrices")
+    if x.shape[0] != y.shape[0]:
+        raise ValueError(
+            "arrays 'x' and 'y' are required to have the same number of rows")
+
+    rows = x.shape[0]
+    size = chunksize if chunksize > 0 else max(rows, 1)
+    chunks = [slice(i, i + size) for i in range(0, rows, size)]
+
+    # Calculate means of columns
+    xmean = np.zeros(x.shape[1])
+    ymean = np.zeros(y.shape[1])
+    for chunk in chunks:
+        xmean += np.sum(x[chunk], axis=0, dtype=float)
+        ymean += np.sum(y[chunk], axis=0, dtype=float)
+    xmean /= rows
+    ymean /= rows
+
+    # Accumulate matrix product and squared lengths of centered columns
+    prod = np.zeros((x.shape[1], y.shape[1]))
+    xsq = np.zeros(x.shape[1])
+    ysq = np.zeros(y.shape[1])
+    for chunk in chunks:
+        xc = x[chunk] - xmean
+        yc = y[chunk] - ymean
+        prod += np.dot(xc.T, yc)
+        xsq += np.sum(xc ** 2, axis=0)
+        ysq += np.sum(yc ** 2, axis=0)
+
+    # Normalize matrix product by lengths of centered columns
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = prod / np.sqrt(np.outer(xsq, ysq))
+
+    return np.clip(corr, -1., 1.)
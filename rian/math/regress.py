@@ -25,7 +25,7 @@ __author__ = 'Frootlab Developers'
 __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
-from typing import Any
+from typing import Any, Optional
 import numpy as np
 from hup.base import call, catalog
 from hup.typing import StrList
@@ -206,5 +206,138 @@ def rmse(x: NpArray, y: NpArray, axes: NpAxes = 0) -> NpArray:
     """
     return vector.qmean_dist(x, y, axes=axes)
 
+#
+# Sufficient statistics for the chunkwise evaluation of Regression Errors
+#
+
+class Statistics:
+    """Sufficient statistics of an array along its first axis.
+
+    The statistics are accumulated over chunks of rows, e.g. of residuals
+    given by chunks of a dataset, such that regression errors and vector norms
+    along the first axis can be evaluated with constant memory. The results
+    equal the respective functions, that are evaluated over the concatenated
+    chunks.
+
+    Args:
+        x: Optional numpy ndarray, which is accumulated at initialization.
+        p: Optional positive real number, which determines the exponent of the
+            accumulated p-th powered absolute values, as required by the norms
+            'p-norm' and 'p-mean'. By default the p-th powers are not
+            accumulated.
+
+    """
+
+    count: int
+    mean: Any
+    m2: Any
+    sum_abs: Any
+    sum_sq: Any
+    sum_pow: Any
+    max_abs: Any
+    p: Optional[float]
+
+    def __init__(
+            self, x: Optional[NpArrayLike] = None,
+            p: Optional[float] = None) -> None:
+        self.count = 0
+        self.mean = self.m2 = self.sum_abs = self.sum_sq = 0.
+        self.sum_pow = self.max_abs = 0.
+        self.p = p
+        if x is not None:
+            self.update(x)
+
+    def update(self, x: NpArrayLike) -> None:
+        """Accumulate chunk of rows.
+
+        Args:
+            x: Any sequence that can be interpreted as a numpy ndarray with the
+                same shape as the previous chunks, apart from the first axis.
+
+        """
+        x = array.cast(x)
+        size = x.shape[0]
+        if not size:
+            return
+        absx = np.abs(x)
+
+        # Combine means and sums of squared deviations of chunks
+        mean = np.mean(x, axis=0)
+        m2 = np.sum(np.square(x - mean), axis=0)
+        count = self.count + size
+        delta = mean - self.mean
+        self.mean = self.mean + delta * size / count
+        self.m2 = self.m2 + m2 + np.square(delta) * self.count * size / count
+        self.count = count
+
+        # Accumulate sums and maxima of absolute values
+        self.sum_abs = self.sum_abs + np.sum(absx, axis=0)
+        self.sum_sq = self.sum_sq + np.sum(np.square(x), axis=0)
+        self.max_abs = np.maximum(self.max_abs, np.amax(absx, axis=0))
+        if self.p is not None:
+            self.sum_pow = self.sum_pow + np.sum(
+                np.power(absx, self.p), axis=0)
+
+    def error(self, name: str = 'mse') -> NpArray:
+        """Evaluate regression error of accumulated residuals.
+
+        Args:
+            name: Case insensitive name of discrepancy function:
+                'sad': :term:`Sum of Absolute Differences`
+                'rss': :term:`Residual Sum of Squares`
+                'mse': :term:`Mean Squared Error` (default)
+                'mae': :term:`Mean Absolute Error`
+                'rmse': :term:`Root-Mean-Square Error`
+
+        Returns:
+            :class:`numpy.ndarray` of dimension dim(*x*) - 1.
+
+        """
+        name = name.lower()
+        if name == 'sad':
+            return self.sum_abs
+        if name == 'rss':
+            return self.sum_sq
+        if name == 'mse':
+            return self.sum_sq / self.count
+        if name == 'mae':
+            return self.sum_abs / self.count
+        if name == 'rmse':
+            return np.sqrt(self.sum_sq / self.count)
+        raise ValueError(f"regression error '{name}' is not supported")
+
+    def length(self, norm: str = 'euclid') -> NpArray:
+        """Evaluate vector norm of accumulated values.
+
+        Args:
+            norm: Name of vector norm, as accepted by
+                :func:`rian.math.vector.length`. The norms 'p-norm' and
+                'p-mean' require the parameter *p* at initialization.
+                Additionally the name 'SD' evaluates the standard deviation.
+
+        Returns:
+            :class:`numpy.ndarray` of dimension dim(*x*) - 1.
+
+        """
+        if norm == 'SD':
+            return np.sqrt(self.m2 / self.count)
+        if norm == '1-norm':
+            return self.sum_abs
+        if norm == 'euclid':
+            return np.sqrt(self.sum_sq)
+        if norm == 'maximum':
+            return self.max_abs
+        if norm == 'abs-mean':
+            return self.sum_abs / self.count
+        if norm == 'quadratic-mean':
+            return np.sqrt(self.sum_sq / self.count)
+        if norm in ['p-norm', 'p-mean'] and self.p is None:
+            raise ValueError(f"norm '{norm}' requires parameter 'p'")
+        if norm == 'p-norm':
+            return np.power(self.sum_pow, 1. / self.p)
+        if norm == 'p-mean':
+            return np.power(self.sum_pow / self.count, 1. / self.p)
+        raise ValueError(f"norm '{norm}' is not supported")
+
 # TODO (patrick.michl@frootlab.org): Goodness of fit Measures
 # https://en.wikipedia.org/wiki/Goodness_of_fit
@@ -30,7 +30,10 @@ import rian.model.classes
 import rian.model.evaluation
 import rian.model.exports
 import rian.model.imports
+import rian.model.inference
 import rian.model.morphisms
+import rian.model.server
+import rian.model.sweep
 
 def build(*args, **kwds):
     """Create model dictionary from building script."""
@@ -62,16 +65,32 @@ def new(*args, **kwds):
 
 def open(*args, **kwds):
     """Import model instance from file."""
-    return new(**load(*args, **kwds))
+    return new(load(*args, **kwds))
 
 def optimize(*args, **kwds):
     """Optimize model instance."""
     return rian.model.morphisms.optimize(*args, **kwds)
 
+def predict(*args, **kwds):
+    """Predict values of target units of model instance."""
+    return rian.model.inference.predict(*args, **kwds)
+
 def save(*args, **kwds):
     """Export model instance to file."""
     return rian.model.exports.save(*args, **kwds)
 
+def score(*args, **kwds):
+    """Score multiple model instances on shared source data."""
+    return rian.model.inference.score(*args, **kwds)
+
+def serve(*args, **kwds):
+    """Serve predictions of model instance."""
+    return rian.model.server.serve(*args, **kwds)
+
 def show(*args, **kwds):
     """Show model as image."""
     return rian.model.exports.show(*args, **kwds)
+
+def sweep(*args, **kwds):
+    """Search optimizer configuration of model instance."""
+    return rian.model.sweep.sweep(*args, **kwds)
@@ -50,7 +50,7 @@ __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
 import numpy
 from hup.base import catalog
-from rian.math import curve
+from rian.math import curve, matrix
 
 #
 # (1) Sampler for Bayesian Networks
@@ -369,7 +369,7 @@ def get_precision(model, *args, **kwds):
     plot     = 'heatmap',
     formater = lambda val: '%.3f' % (val)
 )
-def correlation(model, data, mapping = None, **kwds):
+def correlation(model, data, mapping = None, chunksize = 0, **kwds):
     """Data correlation between source and target units.
 
     Undirected data based relation describing the 'linearity'
@@ -380,6 +380,8 @@ def correlation(model, data, mapping = None, **kwds):
         mapping: tuple of strings containing the mapping
             from input layer (first argument of tuple)
             to output layer (last argument of tuple)
+        chunksize: number of samples, that are processed at once.
+            The default value 0 processes all samples at once.
 
     Returns:
         Numpy array of shape (source, target) containing pairwise
@@ -389,22 +391,9 @@ def correlation(model, data, mapping = None, **kwds):
 
     # 2do: allow correlation between hidden units
 
-    # calculate symmetric correlation matrix
-    corr = numpy.corrcoef(numpy.hstack(data).T)
-
-    # create asymmetric output matrix
-    mapping = model.system._get_mapping()
-    srcunits = model.system._get_units(layer = mapping[0])
-    tgtunits = model.system._get_units(layer = mapping[-1])
-    units = srcunits + tgtunits
-    relation = numpy.zeros(shape = (len(srcunits), len(tgtunits)))
-    for i, u1 in enumerate(srcunits):
-        k = units.index(u1)
-        for j, u2 in enumerate(tgtunits):
-            l = units.index(u2)
-            relation[i, j] = corr[k, l]
-
-    return relation
+    # calculate asymmetric correlation matrix between the columns of the
+    # input data (source units) and the output data (target units)
+    return matrix.corrcoef(data[0], data[1], chunksize = chunksize)
 
 
 @catalog.custom(
@@ -26,11 +26,23 @@ __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
 import rian.model.classes.base
 import importlib
+from collections.abc import Mapping
 
 def new(*args, **kwds):
-    """Return model instance."""
+    """Return model instance.
 
-    type = kwds.get('config', {}).get('type', 'base.Model')
+    The model dictionary is given by keyword arguments or as a mapping, like
+    the lazily loaded components of a model archive. The components of a
+    mapping are fetched one after another, when they are set to the model,
+    such that the model type is validated before the dataset is loaded.
+
+    """
+
+    components = args[0] if args and isinstance(args[0], Mapping) else {}
+    if components:
+        kwds = {'config': components.get('config', None), **kwds}
+
+    type = (kwds.get('config', None) or {}).get('type', 'base.Model')
     module_name = 'rian.model.classes.' + type.split('.', 1)[0]
     class_name = type.rsplit('.', 1)[-1]
 
@@ -42,4 +54,8 @@ def new(*args, **kwds):
         raise ValueError("""could not create model:
             unknown model type '%s'.""" % (type))
 
+    for key in ['dataset', 'network', 'system']:
+        if key in components and key not in kwds:
+            model.set('copy', **{key: components[key]})
+
     return model
@@ -24,10 +24,11 @@ __author__ = 'Frootlab Developers'
 __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
+import copy
 from typing import Any, Dict
 from hup.base import otree
 import rian
-from rian.base import nbase
+from rian.base import cache, nbase
 
 class Model(nbase.ObjectIP):
     """Model base class.
@@ -91,6 +92,7 @@ class Model(nbase.ObjectIP):
 
     _config  = None
     _default = {}
+    _cache   = None
 
     _attr: Dict[str, int] = {
         'error': 0b01, 'accuracy': 0b01, 'precision': 0b01
@@ -155,6 +157,10 @@ class Model(nbase.ObjectIP):
         """Optimize model parameters."""
         return rian.model.optimize(self, *args, **kwds)
 
+    def predict(self, *args, **kwds):
+        """Predict values of target units in chunks of rows."""
+        return rian.model.predict(self, *args, **kwds)
+
     def get(self, *args, **kwds):
         """Get meta information and content."""
         return super().get(*args, **kwds)
@@ -203,6 +209,23 @@ class Model(nbase.ObjectIP):
 
         return found[0]
 
+    def _get_cache(self):
+        """Get cache of evaluated relations.
+
+        The memory size of the cache is given by the configuration key
+        'cache_size' in bytes. A size of 0 disables the cache.
+
+        Returns:
+            Instance of class :class:`rian.base.cache.Cache`.
+
+        """
+
+        if self._cache is None:
+            size = (self._config or {}).get('cache_size', 2 ** 28)
+            self._cache = cache.Cache(maxsize = size)
+
+        return self._cache
+
     def _get_dataset(self, type = 'dict'):
         """ """
 
@@ -403,6 +426,10 @@ class Model(nbase.ObjectIP):
             return self.network.evaluate(*args, **kwds)
         if key == 'system':
 
+            # evaluate system relations using the relation cache
+            if args and args[0] == 'relations':
+                return self._evaluate_relation(*args[1:], **kwds)
+
             # get data for system evaluation
             if 'data' in list(kwds.keys()):
                 # get data from keyword argument
@@ -418,6 +445,48 @@ class Model(nbase.ObjectIP):
             "could not evaluate model: "
             "evaluation key '%s' is not supported." % key)
 
+    def _evaluate_relation(self, *args, **kwds):
+        """Evaluate system relation using the relation cache.
+
+        Evaluated relations are cached by their arguments, the version of
+        the system parameters and a fingerprint of the data, such that
+        repeated evaluations, e.g. by different exports of the same
+        relation, reuse the result, until the system parameters or the
+        dataset are modified. If no data is given, the fingerprint is
+        given by the dataset and the sampling parameters 'preprocessing'
+        and 'statistics', such that also the drawn sample is reused.
+
+        Since cached relations are shared between calls, copies of the
+        cached relations are returned.
+
+        """
+
+        # get fingerprint of data
+        if 'data' in list(kwds.keys()):
+            data = kwds.pop('data')
+            source = cache.fingerprint(data)
+        else:
+            data = None
+            source = (self.dataset.get('fingerprint'),
+                kwds.get('preprocessing'), kwds.get('statistics', 0))
+
+        # get cached relation
+        relations = self._get_cache()
+        key = cache.fingerprint('relations', args, kwds,
+            self.system.get('params_version'), source)
+        retval = relations.get(key)
+        if retval is not None: return copy.deepcopy(retval)
+
+        # evaluate relation
+        if data is None:
+            data = self._get_sample(*args, **kwds)
+        kwds.pop('preprocessing', None)
+        kwds.pop('statistics', None)
+        retval = self.system.evaluate(data, 'relations', *args, **kwds)
+        relations.set(key, copy.deepcopy(retval))
+
+        return retval
+
     def save(self, *args, **kwds):
         """Export model to file."""
         return rian.model.save(self, *args, **kwds)
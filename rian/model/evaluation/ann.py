@@ -37,7 +37,7 @@ __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 import numpy
 import rian
 from hup.base import catalog
-from rian.math import curve
+from rian.math import curve, matrix, regress
 from rian.model.evaluation.base import Evaluation
 
 class ANN(Evaluation):
@@ -48,7 +48,8 @@ class ANN(Evaluation):
         category = 'model',
         args     = 'all',
         formater = lambda val: '%.3f' % (val),
-        optimum  = 'min'
+        optimum  = 'min',
+        stream   = True
     )
     def modelerror(self, *args, **kwds):
         """Mean data reconstruction error of output units."""
@@ -60,7 +61,8 @@ class ANN(Evaluation):
         category = 'model',
         args     = 'all',
         formater = lambda val: '%.1f%%' % (val * 100.),
-        optimum  = 'max'
+        optimum  = 'max',
+        stream   = True
     )
     def modelaccuracy(self, *args, **kwds):
         """Mean data reconstruction accuracy of output units."""
@@ -72,7 +74,8 @@ class ANN(Evaluation):
         category = 'model',
         args     = 'all',
         formater = lambda val: '%.1f%%' % (val * 100.),
-        optimum  = 'max'
+        optimum  = 'max',
+        stream   = True
     )
     def modelprecision(self, *args, **kwds):
         """Mean data reconstruction precision of output units."""
@@ -280,13 +283,73 @@ class ANN(Evaluation):
         # calculate residuals
         return d_tgt - m_out
 
+    def _get_residual_stats(self, data, mapping = None, block = None):
+        """Sufficient statistics of reconstruction residuals and target data.
+
+        The statistics are accumulated over chunks of rows, such that the
+        evaluation data may be given by an iterable over chunks, which
+        allows the evaluation of arbitrary large datasets with constant
+        memory. For a single chunk the statistics equal the statistics
+        of the complete data.
+
+        Args:
+            data: 2-tuple or list of numpy arrays containing source and
+                target data corresponding to the first and the last layer
+                in the mapping, or re-iterable object over such 2-tuples
+            mapping: n-tuple of strings containing the mapping
+                from source unit layer (first argument of tuple)
+                to target unit layer (last argument of tuple)
+            block: list of strings containing labels of source units
+                that are blocked by setting the values to their means
+
+        Returns:
+            2-tuple of instances of class :class:`rian.math.regress.Statistics`
+            with the statistics of the residuals and the target data.
+
+        """
+
+        if mapping is None: mapping = self.model.system._get_mapping()
+
+        # a pair of arrays (given as tuple or list) is a single chunk, other
+        # iterables are regarded as streams of chunks
+        if isinstance(data, (tuple, list)) and len(data) == 2 \
+            and all(isinstance(d, numpy.ndarray) for d in data):
+            chunks = [data]
+        else:
+            chunks = data
+
+        # get means of blocked source units (requires an additional pass
+        # over the chunks)
+        if isinstance(block, list):
+            means = regress.Statistics()
+            for d_src, d_tgt in chunks: means.update(d_src[:, block])
+            means = means.mean
+
+        res = regress.Statistics()
+        dat = regress.Statistics()
+        for d_src, d_tgt in chunks:
+            if isinstance(block, list):
+                d_src = numpy.copy(d_src)
+                d_src[:, block] = means
+            res.update(d_tgt - self.unitexpect(d_src, mapping))
+            dat.update(d_tgt)
+
+        return res, dat
+
+    @staticmethod
+    def _get_norm(stats, norm):
+        """Evaluate regression error or vector norm of statistics."""
+        if norm.lower() in regress.errors(): return stats.error(norm)
+        return stats.length(norm)
+
     @catalog.custom(
         name     = 'error',
         category = 'units',
         args     = 'all',
         retfmt   = 'scalar',
         formater = lambda val: '%.3f' % (val),
-        plot     = 'diagram'
+        plot     = 'diagram',
+        stream   = True
     )
     def uniterror(self, data, norm: str = 'MSE', **kwds):
         """Unit reconstruction error.
@@ -297,25 +360,21 @@ class ANN(Evaluation):
         Args:
             data: 2-tuple of numpy arrays containing source and target
                 data corresponding to the first and the last layer in
-                the mapping
+                the mapping, or re-iterable object over such 2-tuples
             mapping: n-tuple of strings containing the mapping
                 from source unit layer (first argument of tuple)
                 to target unit layer (last argument of tuple)
             block: list of strings containing labels of source units
                 that are blocked by setting the values to their means
-            norm: used norm to calculate data reconstuction error from
-                residuals. see rian.math.vector.norm for a list
-                of provided norms
+            norm: used regression error or norm to calculate data
+                reconstuction error from residuals. see rian.math.regress
+                and rian.math.vector for lists of provided errors and norms
 
         """
-        from rian.math import vector
 
-        # TODO: use vector
-        #error = vector.distance(x, y, metric=metric)
-        res = self.unitresiduals(data, **kwds)
-        error = numpy.mean(numpy.square(res), axis=0)
+        res, dat = self._get_residual_stats(data, **kwds)
 
-        return error
+        return self._get_norm(res, norm)
 
     @catalog.custom(
         name     = 'accuracy',
@@ -323,7 +382,8 @@ class ANN(Evaluation):
         args     = 'all',
         retfmt   = 'scalar',
         formater = lambda val: '%.3f' % (val),
-        plot     = 'diagram'
+        plot     = 'diagram',
+        stream   = True
     )
     def unitaccuracy(self, data, norm: str = 'MSE', **kwds):
         """Unit reconstruction accuracy.
@@ -334,26 +394,21 @@ class ANN(Evaluation):
         Args:
             data: 2-tuple of numpy arrays containing source and target
                 data corresponding to the first and the last layer
-                in the mapping
+                in the mapping, or re-iterable object over such 2-tuples
             mapping: n-tuple of strings containing the mapping
                 from source unit layer (first argument of tuple)
                 to target unit layer (last argument of tuple)
             block: list of strings containing labels of source units
                 that are blocked by setting the values to their means
-            norm: used norm to calculate accuracy
-                see rian.math.vector.norm for a list of provided
-                norms
+            norm: used regression error or norm to calculate accuracy
+                see rian.math.regress and rian.math.vector for lists of
+                provided errors and norms
 
         """
 
-        from rian.math import vector
-
-        # TODO: use vector to calculate distance
-        res = self.unitresiduals(data, **kwds)
-        normres = numpy.mean(numpy.square(res), axis=0)
-        normdat = numpy.mean(numpy.square(data[1]), axis=0)
+        res, dat = self._get_residual_stats(data, **kwds)
 
-        return 1. - normres / normdat
+        return 1. - self._get_norm(res, norm) / self._get_norm(dat, norm)
 
     @catalog.custom(
         name     = 'precision',
@@ -361,7 +416,8 @@ class ANN(Evaluation):
         args     = 'all',
         retfmt   = 'scalar',
         formater = lambda val: '%.3f' % (val),
-        plot     = 'diagram'
+        plot     = 'diagram',
+        stream   = True
     )
     def unitprecision(self, data, norm: str = 'SD', **kwds):
         """Unit reconstruction precision.
@@ -372,7 +428,7 @@ class ANN(Evaluation):
         Args:
             data: 2-tuple of numpy arrays containing source and target
                 data corresponding to the first and the last layer
-                in the mapping
+                in the mapping, or re-iterable object over such 2-tuples
             mapping: n-tuple of strings containing the mapping
                 from source unit layer (first argument of tuple)
                 to target unit layer (last argument of tuple)
@@ -380,16 +436,13 @@ class ANN(Evaluation):
                 that are blocked by setting the values to their means
             norm: used norm to calculate deviation for precision
                 see rian.math.vector.norm for a list of provided
-                norms
+                norms. The default 'SD' uses the standard deviation
 
         """
-        from rian.math import vector
 
-        res = self.unitresiduals(data, **kwds)
-        devres = vector.length(res, norm=norm)
-        devdat = vector.length(data[1], norm=norm)
+        res, dat = self._get_residual_stats(data, **kwds)
 
-        return 1. - devres / devdat
+        return 1. - res.length(norm) / dat.length(norm)
 
     @catalog.custom(
         name     = 'correlation',
@@ -402,7 +455,7 @@ class ANN(Evaluation):
         plot     = 'heatmap',
         formater = lambda val: '%.3f' % (val)
     )
-    def correlation(self, data, mapping = None, **kwds):
+    def correlation(self, data, mapping = None, chunksize = 0, **kwds):
         """Data correlation between source and target units.
 
         Undirected data based relation describing the 'linearity'
@@ -413,6 +466,8 @@ class ANN(Evaluation):
             mapping: tuple of strings containing the mapping
                 from input layer (first argument of tuple)
                 to output layer (last argument of tuple)
+            chunksize: number of samples, that are processed at once.
+                The default value 0 processes all samples at once.
 
         Returns:
             Numpy array of shape (source, target) containing pairwise
@@ -422,22 +477,9 @@ class ANN(Evaluation):
 
         # 2do: allow correlation between hidden units
 
-        # calculate symmetric correlation matrix
-        corr = numpy.corrcoef(numpy.hstack(data).T)
-
-        # create asymmetric output matrix
-        mapping = self.model.system._get_mapping()
-        srcunits = self.model.system._get_units(layer = mapping[0])
-        tgtunits = self.model.system._get_units(layer = mapping[-1])
-        units = srcunits + tgtunits
-        relation = numpy.zeros(shape = (len(srcunits), len(tgtunits)))
-        for i, u1 in enumerate(srcunits):
-            k = units.index(u1)
-            for j, u2 in enumerate(tgtunits):
-                l = units.index(u2)
-                relation[i, j] = corr[k, l]
-
-        return relation
+        # calculate asymmetric correlation matrix between the columns of the
+        # input data (source units) and the output data (target units)
+        return matrix.corrcoef(data[0], data[1], chunksize = chunksize)
 
     @catalog.custom(
         name     = 'connectionweight',
@@ -24,20 +24,40 @@ __author__ = 'Frootlab Developers'
 __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
-import numpy as np
+import copy
 from hup.base import otree
-from rian.base import array
+from rian.base import array, cache
+
+class Stream:
+    """Re-iterable stream of evaluation data chunks.
+
+    Args:
+        dataset: rian dataset instance
+        cols: tuple of column filters, which correspond to the first and the
+            last layer in the mapping
+        size: maximum number of rows per chunk
+
+    """
+
+    def __init__(self, dataset, cols, size = 10000):
+        self.dataset = dataset
+        self.cols = cols
+        self.size = size
+
+    def __iter__(self):
+        return self.dataset.get('chunks', size=self.size, cols=self.cols)
 
 class Evaluation:
 
     _config = None
     _default = {
         'algorithm': 'accuracy'}
-    _buffer = {}
+    _buffer = None
 
     def __init__(self, model = None, *args, **kwds):
         """Configure evaluation to given rian model instance."""
 
+        self._buffer = {}
         if model: self._set_model(model)
 
     def get(self, key, *args, **kwds):
@@ -170,16 +190,34 @@ class Evaluation:
                 f"could not evaluate {category}: "
                 f"invalid algorithm {algname}.")
 
-        data = kwds.pop('data', self._get_data())
-
         getmapping = self.model.system._get_mapping
         getunits = self.model.system._get_units
 
+        # get evaluation data. Algorithms, which accumulate their results
+        # over chunks of rows, optionally iterate over the dataset, instead
+        # of loading it at once
+        chunksize = kwds.pop('chunksize', 0) \
+            if algorithm.get('stream', False) else 0
+        given = 'data' in kwds
+        if given:
+            data = kwds.pop('data')
+        elif chunksize:
+            mapping = getmapping()
+            data = Stream(self.model.dataset,
+                cols=(mapping[0], mapping[-1]), size=chunksize)
+        else:
+            data = self._get_data()
+
         # prepare non keyword arguments for evaluation
-        args = {
-            'none': [], 'input': [data[0]], 'output': [data[1]],
-            'all': [data]
-        }.get(algorithm.get('args', None), [data])
+        argtype = algorithm.get('args', None)
+        if argtype == 'none':
+            args = []
+        elif argtype == 'input':
+            args = [data[0]]
+        elif argtype == 'output':
+            args = [data[1]]
+        else:
+            args = [data]
 
         # get category specific keyword arguments
         if category == 'relation':
@@ -193,8 +231,22 @@ class Evaluation:
         if kwds.get('mapping', None) is not None:
             kwds['mapping'] = getmapping()
 
-        # run evaluation
-        retval = algorithm['reference'](*args, **kwds)
+        # run evaluation (relations are cached by the model, until the
+        # system parameters or the data are modified)
+        if category == 'relation':
+            relations = self.model.get('cache')
+            source = cache.fingerprint(data) if given \
+                else self.model.dataset.get('fingerprint')
+            key = cache.fingerprint('evaluation', algname, kwds,
+                self.model.system.get('params_version'), source)
+            retval = relations.get(key)
+            if retval is None:
+                retval = algorithm['reference'](*args, **kwds)
+                relations.set(key, copy.deepcopy(retval))
+            else:
+                retval = copy.deepcopy(retval)
+        else:
+            retval = algorithm['reference'](*args, **kwds)
 
         # format result
         retfmt = algorithm.get('retfmt', 'scalar')
@@ -235,27 +287,16 @@ class Evaluation:
                 if rettype == 'array':
                     return retval
                 if rettype == 'dict':
-                    from rian.math import matrix
                     src = getunits(layer=kwds['mapping'][0])
                     tgt = getunits(layer=kwds['mapping'][-1])
-                    retval = array.as_dict(retval, labels=(src, tgt))
-                    if not evalstat:
-                        return retval
 
                     # (optional) add statistics
-                    filtered = []
-                    for src, tgt in retval:
-                        sunit = src.split(':')[1] if ':' in src else src
-                        tunit = tgt.split(':')[1] if ':' in tgt else tgt
-                        if sunit == tunit:
-                            continue
-                        filtered.append(retval[(src, tgt)])
-                    arr = np.array(filtered)
-                    retval['max'] = np.amax(arr)
-                    retval['min'] = np.amin(arr)
-                    retval['mean'] = np.mean(arr)
-                    retval['std'] = np.std(arr)
-                    return retval
+                    stats = self.model.system._get_relation_stats(
+                        retval, src, tgt) if evalstat else None
+
+                    # create lazy dictionary view of relation matrix
+                    return array.as_view(
+                        retval, labels=(src, tgt), extra=stats)
 
         raise Warning(
             "could not evaluate system units: "
@@ -284,10 +325,9 @@ class Evaluation:
                 evluation of model: evaluation is not compatible to
                 model.""") or None
 
-        # update time and config
+        # update time and config. The evaluation data is retrieved when it
+        # is first required
         self.model = model
-
-        # initialize data for evaluation
-        self._get_data()
+        self._buffer.pop('data', None)
 
         return True
@@ -24,9 +24,18 @@ __author__ = 'Frootlab Developers'
 __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
-import rian
-import numpy
+import json
 import os
+import zipfile
+import numpy
+import rian
+from rian.base import cache
+from rian.system.exports.archive import _encode
+
+# content hashes of datasets by their fingerprints, which change with every
+# modification of the dataset, such that unchanged datasets are only hashed
+# once
+_digests = cache.Cache(maxsize = 2 ** 20)
 
 def filetypes():
     """Get supported archive filetypes for model export."""
@@ -40,27 +49,120 @@ def save(model, path, filetype, **kwds):
     if filetype not in filetypes():
         raise ValueError(f"filetype '{filetype}' is not supported")
 
+    archive = Npz(**kwds)
     copy = model.get('copy')
-    return Npz(**kwds).save(copy, path)
+
+    # get content hash of referenced dataset from cache
+    digest = None
+    if archive.settings['dataset'] == 'reference':
+        fingerprint = model.dataset.get('fingerprint')
+        digest = _digests.get(fingerprint)
+        if digest is None:
+            digest = cache.fingerprint(copy['dataset'])
+            _digests.set(fingerprint, digest)
+
+    return archive.save(copy, path, digest = digest)
 
 class Npz:
-    """Export model to numpy zipped archive."""
+    """Export model to numpy zipped archive.
+
+    The components of the model are stored separately, such that they can
+    be loaded independently. Like in system archives, the archive does not
+    contain pickled objects: Within the components all numpy arrays are
+    stored as individual NPY members and the remaining structure as JSON
+    member. Uncompressed archives therefore allow to memory map the system
+    parameters and the dataset tables on import.
+
+    Settings:
+        compress (bool): Compress members of the archive. Default: True
+        dataset (str): If 'reference' (default), the dataset is stored in a
+            separate archive within the directory of the model, which is
+            referenced by the model archive by its path and content hash.
+            The name of the dataset archive contains the content hash, such
+            that models of the same dataset share the dataset archive, which
+            is only written once. If 'embed', the dataset is stored within
+            the model archive.
+
+    """
 
     settings = None
-    default = {'compress': True}
+    default = {'compress': True, 'dataset': 'reference'}
+    version = 2
 
     def __init__(self, **kwds):
         self.settings = {**self.default, **kwds}
 
-    def save(self, copy, path):
+    def save(self, copy, path, digest = None):
+        """Write model copy to archive file.
+
+        Args:
+            copy (dict): model copy as dictionary
+            path (str): path of model archive
+            digest (str, optional): content hash of the dataset. By default
+                the content hash is calculated from the dataset copy.
+
+        Returns:
+            Path of the model archive.
+
+        """
 
         # create path if not available
-        if not os.path.exists(os.path.dirname(path)):
-            os.makedirs(os.path.dirname(path))
+        dirname = os.path.dirname(path)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+
+        if self.settings['dataset'] not in ['reference', 'embed']:
+            raise ValueError(
+                "dataset storage '%s' is not supported"
+                % self.settings['dataset'])
+
+        components = dict(copy)
+        manifest = {'version': self.version}
+
+        # (optional) reference dataset by content hash
+        if self.settings['dataset'] == 'reference' \
+            and components.get('dataset', None):
+            dataset = components.pop('dataset')
+            digest = digest or cache.fingerprint(dataset)
+            name = dataset.get('config', {}).get('name', None) or 'dataset'
+            filename = '%s.%s.npz' % (name, digest)
+            filepath = os.path.join(dirname, filename)
+            if not os.path.exists(filepath):
+                self._write(filepath, {'dataset': dataset},
+                    {'version': self.version, 'hash': digest})
+            manifest['dataset'] = {'path': filename, 'hash': digest}
 
-        if self.settings['compress']:
-            numpy.savez_compressed(path, **copy)
-        else:
-            numpy.savez(path, **copy)
+        return self._write(path, components, manifest)
+
+    def _write(self, path, components, manifest):
+        """Write components to archive file."""
+
+        compression = zipfile.ZIP_DEFLATED if self.settings['compress'] \
+            else zipfile.ZIP_STORED
+
+        manifest = {**manifest, 'components': list(components.keys())}
+
+        # write to temporary file, which atomically replaces the archive
+        temp = path + '.tmp'
+        try:
+            with zipfile.ZipFile(temp, mode='w',
+                compression=compression, allowZip64=True) as file:
+                file.writestr('manifest.json', json.dumps(manifest))
+                for key, val in components.items():
+                    arrays = {}
+                    meta = _encode(val, arrays, key)
+                    file.writestr(key + '.json', json.dumps(meta))
+                    for name, array in arrays.items():
+                        _write_array(file, name, array)
+            os.replace(temp, path)
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
 
         return path
+
+def _write_array(file, name, array):
+    """Write numpy array as NPY member to ZipFile."""
+    with file.open(name, mode='w', force_zip64=True) as member:
+        numpy.lib.format.write_array(member, numpy.asanyarray(array),
+            allow_pickle = False)
@@ -25,6 +25,7 @@ __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
 import importlib
+from collections.abc import Mapping
 import os
 import networkx as nx
 import numpy as np
@@ -159,7 +160,7 @@ class Graph(network.Graph2D):
             measure = self._config['measure'],
             statistics = self._config['statistics'],
             transform = self._config['transform'])
-        if not isinstance(W, dict):
+        if not isinstance(W, Mapping):
             raise ValueError(
                 "could not create relation graph: "
                 "invalid weight relation '%s'" % rel_name)
@@ -175,7 +176,7 @@ class Graph(network.Graph2D):
             preprocessing = self._config['preprocessing'],
             measure = self._config['measure'],
             statistics = self._config['statistics'])
-        if not isinstance(F, dict): raise ValueError(
+        if not isinstance(F, Mapping): raise ValueError(
             "could not create relation graph: "
             "invalid filter relation '%s'!" % self._config['filter'])
 
@@ -205,7 +206,7 @@ class Graph(network.Graph2D):
                 preprocessing = self._config['preprocessing'],
                 measure = self._config['measure'],
                 statistics = self._config['statistics'])
-            if not isinstance(sr, dict): raise ValueError(
+            if not isinstance(sr, Mapping): raise ValueError(
                 "could not create relation graph: "
                 "invalid sign relation!")
             S = {edge: 2. * (float(sr[edge] > 0.) - 0.5) \
@@ -314,7 +315,7 @@ class Heatmap(heatmap.Heatmap):
             measure = self._config['measure'],
             statistics = self._config['statistics'],
             transform = self._config['transform'])
-        if not isinstance(R, dict):
+        if not isinstance(R, Mapping):
             raise ValueError(
                 "could not create histogram: "
                 "invalid relation '%s'!" % self._config['relation'])
@@ -384,7 +385,7 @@ class Histogram(histogram.Histogram):
             measure = self._config['measure'],
             statistics = self._config['statistics'],
             transform = self._config['transform'])
-        if not isinstance(R, dict):
+        if not isinstance(R, Mapping):
             raise ValueError(
                 "could not create histogram: "
                 "invalid evaluation '%s'!" % self._config['evaluation'])
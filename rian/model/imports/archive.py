@@ -24,8 +24,14 @@ __author__ = 'Frootlab Developers'
 __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
-import rian
+import json
+import os
+import zipfile
+from collections.abc import Mapping
 import numpy
+import rian
+from rian.core import ws
+from rian.system.imports.archive import _decode
 
 def filetypes():
     """Get supported archive filetypes for model import."""
@@ -37,18 +43,123 @@ def load(path, **kwds):
     return Npz(**kwds).load(path)
 
 class Npz:
-    """Import model from numpy zipped archive."""
+    """Import model from numpy zipped archive.
+
+    Settings:
+        mmap_mode (str): If given, numpy arrays, which are stored uncompressed
+            within the archive, are memory mapped from the file instead of
+            being read into memory. Supported modes are 'r' for reading only
+            and 'c' for copy-on-write. Default: None
+
+    """
 
     settings = None
-    default = {}
+    default = {'mmap_mode': None}
 
     def __init__(self, **kwds):
         self.settings = {**self.default, **kwds}
 
     def load(self, path):
+        with zipfile.ZipFile(path) as file:
+            if 'manifest.json' in file.namelist():
+                return Components(path, **self.settings)
+
+        # archives without manifest contain pickled components
         with numpy.load(path, encoding='latin1', allow_pickle=True) as copy:
             return {
                 'config': copy['config'].item(),
                 'dataset': copy['dataset'].item(),
                 'network': copy['network'].item(),
                 'system': copy['system'].item() }
+
+class Components(Mapping):
+    """Lazily loaded components of a model archive.
+
+    The components of the model are loaded on first access. If the archive
+    references a dataset archive, the dataset is loaded from the referenced
+    archive, which is required to have the referenced content hash.
+
+    Args:
+        path (str): path of model archive
+        mmap_mode (str, optional): mode to memory map uncompressed numpy
+            arrays. Default: None
+
+    """
+
+    version = 2
+
+    def __init__(self, path, mmap_mode = None):
+        self.path = path
+        self.mmap_mode = mmap_mode
+        self._components = {}
+
+        archive = ws.Archive(path)
+        try:
+            with archive.open('manifest.json') as file:
+                self.manifest = json.load(file)
+        finally:
+            archive.close()
+
+        if self.manifest.get('version', None) != self.version:
+            raise ValueError(
+                f"model archive '{path}' has unsupported version "
+                f"'{self.manifest.get('version', None)}'")
+
+        self._keys = list(self.manifest['components'])
+        if 'dataset' in self.manifest:
+            self._keys.append('dataset')
+
+    def __getitem__(self, key):
+        if key not in self._components:
+            if key not in self._keys:
+                raise KeyError(key)
+            if key == 'dataset' and 'dataset' in self.manifest:
+                self._components[key] = self._load_reference()
+            else:
+                self._components[key] = self._load(key)
+        return self._components[key]
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _load(self, key):
+        """Load component from archive."""
+
+        archive = ws.Archive(self.path)
+        try:
+            with archive.open(key + '.json') as file:
+                meta = json.load(file)
+            def load(name):
+                return self._load_array(archive, name)
+            return _decode(meta, load)
+        finally:
+            archive.close()
+
+    def _load_array(self, archive, name):
+        """Load numpy array from archive member."""
+
+        info = archive.getinfo(name)
+        if self.mmap_mode and info.compress_type == zipfile.ZIP_STORED:
+            return archive.memmap(name, mode=self.mmap_mode)
+        with archive.open(name, mode='rb') as file:
+            return numpy.lib.format.read_array(file, allow_pickle = False)
+
+    def _load_reference(self):
+        """Load dataset from referenced dataset archive."""
+
+        reference = self.manifest['dataset']
+        path = os.path.join(os.path.dirname(self.path), reference['path'])
+        if not os.path.isfile(path):
+            raise FileNotFoundError(
+                f"dataset archive '{path}' does not exist")
+
+        dataset = Components(path, mmap_mode = self.mmap_mode)
+        if dataset.manifest.get('hash', None) != reference['hash']:
+            raise ValueError(
+                f"dataset archive '{path}' does not match the content hash "
+                f"'{reference['hash']}'")
+
+        return dataset['dataset']
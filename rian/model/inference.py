@@ -0,0 +1,417 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Frootlab
+# Copyright (C) 2013-2019 Patrick Michl
+#
+# This file is part of Frootlab Rian, https://www.frootlab.org/rian
+#
+#  Rian is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  Rian is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#  You should have received a copy of the GNU General Public License along with
+#  Rian. If not, see <http://www.gnu.org/licenses/>.
+#
+
+__copyright__ = '2019 Frootlab'
+__license__ = 'GPLv3'
+__docformat__ = 'google'
+__author__ = 'Frootlab Developers'
+__email__ = 'contact@frootlab.org'
+__authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
+
+import collections
+import concurrent.futures
+import os
+import shutil
+import numpy
+import rian
+from hup.base import otree
+from rian.math import curve
+
+_funcs = {
+    'expect': '_get_unitexpect',
+    'value': '_get_unitvalues',
+    'sample': '_get_unitsamples' }
+
+# activation functions of unit classes, which allow to stack the first layer
+# weights, where None denotes the identity
+_activations = {
+    'sigmoid': curve.sigmoid,
+    'gauss': None }
+
+def predict(model, data = None, func = 'expect', mapping = None,
+    chunksize = 10000, workers = 0, pool = 'thread', out = None):
+    """Predict values of target units in chunks of rows.
+
+    The source data is split into chunks of rows, which are processed
+    independently, such that arbitrary large data can be processed with
+    constant memory, if the results are written to an output array or file.
+
+    Args:
+        model (model instance): rian model instance
+        data (optional): source data, corresponding to the source unit
+            layer of the mapping, given by a numpy array, a dataset
+            instance, the path of an NPY file, which is memory mapped, or an
+            iterable over numpy arrays, e.g. a file reader. The data is
+            required to be preprocessed like the training data.
+            default: None uses the dataset of the model
+        func (str, optional): name of the prediction function: 'expect' for
+            expectation values, 'value' for maximum likelihood values or
+            'sample' for sampled values of the target units.
+            default: 'expect'
+        mapping (tuple, optional): tuple with names of unit layers from the
+            source unit layer to the target unit layer.
+            default: None uses the mapping from the input to the output layer
+        chunksize (int, optional): maximum number of rows per chunk
+            default: 10000
+        workers (int, optional): number of workers, that process the chunks
+            concurrently. For 0 or 1 the chunks are processed sequentially.
+            default: 0
+        pool (str, optional): type of worker pool: 'thread' for a thread
+            pool, which is efficient, since numpy releases the GIL within
+            the matrix products, or 'process' for a process pool.
+            default: 'thread'
+        out (optional): numpy array with sufficient rows, to which the
+            results are written, or path of an NPY file, to which the
+            results are streamed.
+            default: None returns the results in a new numpy array
+
+    Returns:
+        Numpy array with the values of the target units or, if 'out' is a
+        path, the path of the NPY file.
+
+    """
+
+    if not otree.has_base(model, 'Model'):
+        raise ValueError("model is not valid")
+    if func not in _funcs:
+        raise ValueError(f"prediction function '{func}' is not supported")
+    if not isinstance(chunksize, int) or chunksize <= 0:
+        raise ValueError("chunksize is required to be a positive integer")
+    if pool not in ['thread', 'process']:
+        raise ValueError(f"pool '{pool}' is not supported")
+
+    system = model.system
+    if mapping is None: mapping = system._get_mapping()
+    if data is None: data = model.dataset
+
+    chunks, rows = _get_chunks(data, mapping[0], chunksize)
+    cols = len(system._units[mapping[-1]].params['id'])
+    results = _get_results(system, func, mapping, chunks, workers, pool)
+
+    return _write(results, rows, cols, out)
+
+def score(models, data = None, func = 'expect', chunksize = 10000,
+    transform = None, stack = True):
+    """Score multiple models on shared chunks of source data.
+
+    Every chunk of the source data is fetched and preprocessed only once and
+    then passed to all models. If the source data is given by a dataset, the
+    chunks contain the union of the source columns of the models, from which
+    the source columns of the individual models are selected.
+
+    Args:
+        models (dict or list): dictionary with names as keys and rian model
+            instances or paths of model files as values, or list of rian
+            model instances or paths, which are named by the model names
+        data (optional): source data, given by a dataset instance, a numpy
+            array or an iterable over numpy arrays. Numpy arrays are required
+            to contain the source data of all models.
+            default: None uses the dataset of the first model
+        func (str, optional): name of the prediction function, as accepted
+            by :func:`predict`. default: 'expect'
+        chunksize (int, optional): maximum number of rows per chunk
+            default: 10000
+        transform (callable, optional): function, which is applied once to
+            every chunk of source data, before it is passed to the models,
+            e.g. to normalize the data. default: None
+        stack (bool, optional): for the prediction function 'expect' the
+            first layer weights of models, that have the same source columns,
+            are stacked, such that the first layer of all these models is
+            calculated by a single matrix product. Models with unit classes,
+            which do not support stacking, are calculated separately.
+            default: True
+
+    Returns:
+        Numpy structured array with a field 'label', which contains the row
+        names of the dataset (or the row numbers for other source data), and
+        a field for every model, named by the model, which contains the
+        values of the target units of the model.
+
+    """
+
+    if func not in _funcs:
+        raise ValueError(f"prediction function '{func}' is not supported")
+    if not isinstance(chunksize, int) or chunksize <= 0:
+        raise ValueError("chunksize is required to be a positive integer")
+
+    # get model instances
+    if isinstance(models, dict): items = list(models.items())
+    else: items = [(None, model) for model in models]
+    models = {}
+    for name, model in items:
+        if isinstance(model, str): model = rian.model.open(model)
+        if not otree.has_base(model, 'Model'):
+            raise ValueError("model is not valid")
+        models[name or model.name] = model
+    if not models:
+        raise ValueError("no models are given")
+    if 'label' in models or len(models) < len(items):
+        raise ValueError("model names are required to be unique")
+    if data is None: data = next(iter(models.values())).dataset
+
+    # get chunks of source data and source columns of models
+    if otree.has_base(data, 'Dataset'):
+        columns = {name: model.dataset.get('columns',
+            model.system._get_mapping()[0]) \
+            for name, model in models.items()}
+        union = []
+        for cols in columns.values():
+            union += [col for col in cols if col not in union]
+        select = {name: tuple(union.index(col) for col in cols) \
+            for name, cols in columns.items()}
+        chunks = data.get('chunks', size = chunksize, cols = union,
+            output = ('array', 'rows'))
+    else:
+        chunks = ((chunk, None) for chunk in _get_chunks(
+            data, None, chunksize)[0])
+        select = {name: None for name in models}
+
+    # group models by source columns and stack first layer weights
+    groups = {}
+    for name, sel in select.items():
+        groups.setdefault(sel, []).append(name)
+    stacks = {}
+    if stack and func == 'expect':
+        for sel, names in groups.items():
+            if len(names) > 1 and all(_get_stackable(models[name]) \
+                for name in names):
+                stacks[sel] = _get_stack([models[name] for name in names])
+
+    # score chunks
+    labels = []
+    values = {name: [] for name in models}
+    count = 0
+    for chunk, rows in chunks:
+        if transform: chunk = transform(chunk)
+        if rows is None: rows = numpy.arange(count, count + chunk.shape[0])
+        labels.append(numpy.asarray(rows))
+        count += chunk.shape[0]
+        for sel, names in groups.items():
+            source = chunk if sel is None else chunk[:, list(sel)]
+            if sel in stacks:
+                for name, result in zip(names,
+                    _get_stack_expect(stacks[sel], source)):
+                    values[name].append(result)
+                continue
+            for name in names:
+                system = models[name].system
+                values[name].append(getattr(system, _funcs[func])(source,
+                    system._get_mapping()))
+
+    # collect results in structured array
+    labels = numpy.concatenate(labels) if labels else numpy.empty(0)
+    dtype = [('label', labels.dtype)]
+    for name, model in models.items():
+        system = model.system
+        size = len(system._units[system._get_mapping()[-1]].params['id'])
+        dtype.append((name, float, (size, )))
+    scores = numpy.empty(labels.shape[0], dtype = dtype)
+    scores['label'] = labels
+    for name, parts in values.items():
+        if parts: scores[name] = numpy.concatenate(parts)
+
+    return scores
+
+def _get_stackable(model):
+    """Check if the first layer weights of a model can be stacked.
+
+    Returns:
+        Bool which is True if the classes of the source and target units of
+        the first layer have known activation functions.
+
+    """
+
+    system = model.system
+    mapping = system._get_mapping()
+    source = system._units[mapping[0]].params
+    target = system._units[mapping[1]].params
+
+    return source['class'] in _activations \
+        and target['class'] in _activations
+
+def _get_stack(models):
+    """Get stacked first layer weights of models.
+
+    The first layer of the models is given by a linear transformation of
+    the source data, followed by the activation of the target units. Since
+    gaussian source units scale the data by their standard deviations, the
+    scaling is applied to the weights, such that the linear transformations
+    of all models can be calculated by a single matrix product.
+
+    """
+
+    weights = []
+    layers = []
+    for model in models:
+        if not _get_stackable(model):
+            raise ValueError("could not stack first layer weights of "
+                f"model '{model.name}': unit classes are not supported")
+        system = model.system
+        mapping = system._get_mapping()
+        source = system._units[mapping[0]].params
+        target = system._units[mapping[1]]
+        W = target.weights(source)
+        if source['class'] == 'gauss':
+            W = W / numpy.sqrt(numpy.exp(source['lvar'])).T
+        weights.append(W)
+        layers.append((system, mapping, target.params))
+
+    bounds = numpy.cumsum([0] + [W.shape[1] for W in weights])
+
+    return numpy.hstack(weights), bounds, layers
+
+def _get_stack_expect(stack, data):
+    """Get expectation values of models with stacked first layer weights."""
+
+    weights, bounds, layers = stack
+    product = numpy.dot(data, weights)
+    for id, (system, mapping, target) in enumerate(layers):
+        values = target['bias'] + product[:, bounds[id]:bounds[id + 1]]
+        activation = _activations[target['class']]
+        if activation: values = activation(values)
+        if len(mapping) > 2:
+            values = system._get_unitexpect(values, mapping[1:])
+        yield values
+
+def _get_chunks(data, layer, size):
+    """Get iterator over chunks of source data and the number of rows.
+
+    Returns:
+        Tuple (chunks, rows), where the number of rows is None, if it is not
+        known in advance.
+
+    """
+
+    if isinstance(data, str):
+        data = numpy.load(data, mmap_mode='r')
+    if isinstance(data, numpy.ndarray):
+        if data.ndim != 2:
+            raise ValueError("data is required to be a two-dimensional array")
+        return (data[pos:pos + size] \
+            for pos in range(0, data.shape[0], size)), data.shape[0]
+    if otree.has_base(data, 'Dataset'):
+        return data.get('chunks', size = size, cols = layer), None
+
+    def split(data):
+        for array in data:
+            array = numpy.asarray(array)
+            for pos in range(0, array.shape[0], size):
+                yield array[pos:pos + size]
+
+    return split(data), None
+
+def _get_results(system, func, mapping, chunks, workers, pool):
+    """Iterate over predicted values of chunks in the order of the chunks.
+
+    The number of chunks, which are processed concurrently by the workers,
+    is limited to twice the number of workers, such that the memory
+    consumption is bounded independently of the size of the data.
+
+    """
+
+    workers = workers or 0
+    if workers < 2:
+        predict = getattr(system, _funcs[func])
+        for chunk in chunks: yield predict(chunk, mapping)
+        return
+
+    if pool == 'thread':
+        executor = concurrent.futures.ThreadPoolExecutor(workers)
+        task = getattr(system, _funcs[func])
+        args = (mapping, )
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(workers,
+            initializer = _worker_init,
+            initargs = (system.get('copy'), func, mapping))
+        task = _worker_predict
+        args = ()
+
+    with executor:
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(executor.submit(task, chunk, *args))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def _write(results, rows, cols, out):
+    """Write predicted values of chunks to output."""
+
+    if out is None:
+        parts = list(results)
+        if not parts: return numpy.empty((0, cols))
+        return numpy.concatenate(parts)
+
+    if isinstance(out, numpy.ndarray):
+        pos = 0
+        for result in results:
+            if pos + result.shape[0] > out.shape[0]:
+                raise ValueError("output array has too few rows")
+            out[pos:pos + result.shape[0]] = result
+            pos += result.shape[0]
+        return out
+
+    if not isinstance(out, str):
+        raise ValueError("output is required to be an array or a path")
+
+    # write to memory mapped NPY file, if the number of rows is known
+    if rows is not None:
+        array = numpy.lib.format.open_memmap(out, mode='w+',
+            dtype=float, shape=(rows, cols))
+        _write(results, rows, cols, array)
+        array.flush()
+        del array
+        return out
+
+    # otherwise write data to temporary file and prepend NPY header
+    temp = out + '.tmp'
+    try:
+        rows = 0
+        with open(temp, 'wb') as file:
+            for result in results:
+                numpy.ascontiguousarray(result, dtype=float).tofile(file)
+                rows += result.shape[0]
+        with open(out, 'wb') as file, open(temp, 'rb') as data:
+            numpy.lib.format.write_array_header_1_0(file, {
+                'descr': numpy.lib.format.dtype_to_descr(numpy.dtype(float)),
+                'fortran_order': False,
+                'shape': (rows, cols)})
+            shutil.copyfileobj(data, file)
+    finally:
+        if os.path.exists(temp):
+            os.remove(temp)
+
+    return out
+
+#
+# Process pool workers
+#
+
+_worker = {}
+
+def _worker_init(copy, func, mapping):
+    """Initialize worker process with a copy of the system."""
+    system = rian.system.new(**copy)
+    _worker['predict'] = getattr(system, _funcs[func])
+    _worker['mapping'] = mapping
+
+def _worker_predict(chunk):
+    """Predict values of target units for chunk in worker process."""
+    return _worker['predict'](chunk, _worker['mapping'])
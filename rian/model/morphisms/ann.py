@@ -28,9 +28,15 @@ __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 import numpy
 import rian.model.morphisms.base
 from hup.base import catalog
+from rian.base import shared
+from rian.core import ui
+from rian.math import descent
 
 class ANN(rian.model.morphisms.base.Optimizer):
 
+    _checkpoint_buffer = rian.model.morphisms.base.Optimizer \
+        ._checkpoint_buffer + ['bprop_states']
+
     _default = {
         'algorithm': 'bprop',
         'updates': 10000,
@@ -42,10 +48,23 @@ class ANN(rian.model.morphisms.base.Optimizer):
         'hidden': None,
         'adjacency_enable': False,
         'bprop_rate': .1,
+        'bprop_workers': 0,
+        'bprop_shards': None,
         'rprop_accel': (.5, 1., 1.2),
         'rprop_init_rate': .001,
         'rprop_min_factor': .000001,
         'rprop_max_factor': 50.,
+        'momentum_rate': .1,
+        'momentum_beta': .9,
+        'nesterov_rate': .1,
+        'nesterov_beta': .9,
+        'rmsprop_rate': .001,
+        'rmsprop_rho': .9,
+        'rmsprop_eps': 1e-8,
+        'adam_rate': .001,
+        'adam_beta1': .9,
+        'adam_beta2': .999,
+        'adam_eps': 1e-8,
         'tracker_estimate_time': False,
         'tracker_estimate_time_wait': 15.,
         'tracker_obj_tracking_enable': True,
@@ -68,17 +87,157 @@ class ANN(rian.model.morphisms.base.Optimizer):
     def _bprop(self):
         """Optimize parameters using backpropagation of error."""
 
-        while self.update():
-            # get training data (sample from stratified minibatches)
-            data = self._get_data_training()
-            # forward pass (compute estimations from given input)
-            values = self._bprop_forward(data[0])
-            # backward pass (compute deltas to given output)
-            deltas = self._bprop_backward(data[1], values)
-            # compute parameter updates
-            updates = self._bprop_get_updates(values, deltas)
-            # update parameters
-            self._bprop_update(updates)
+        return self._bprop_optimize('sgd', prefix = 'bprop')
+
+    @catalog.custom(
+        name     = 'momentum',
+        longname = 'backpropagation of error with momentum',
+        category = 'optimization',
+        type     = 'algorithm',
+        syscheck = None)
+    def _momentum(self):
+        """Optimize parameters using backpropagation with momentum."""
+
+        return self._bprop_optimize('momentum')
+
+    @catalog.custom(
+        name     = 'nesterov',
+        longname = 'backpropagation of error with nesterov momentum',
+        category = 'optimization',
+        type     = 'algorithm',
+        syscheck = None)
+    def _nesterov(self):
+        """Optimize parameters using backpropagation with nesterov momentum."""
+
+        return self._bprop_optimize('nesterov')
+
+    @catalog.custom(
+        name     = 'rmsprop',
+        longname = 'backpropagation of error with rmsprop',
+        category = 'optimization',
+        type     = 'algorithm',
+        syscheck = None)
+    def _rmsprop(self):
+        """Optimize parameters using backpropagation with RMSProp."""
+
+        return self._bprop_optimize('rmsprop')
+
+    @catalog.custom(
+        name     = 'adam',
+        longname = 'backpropagation of error with adam',
+        category = 'optimization',
+        type     = 'algorithm',
+        syscheck = None)
+    def _adam(self):
+        """Optimize parameters using backpropagation with Adam."""
+
+        return self._bprop_optimize('adam')
+
+    def _bprop_optimize(self, rule, prefix = None):
+        """Optimize parameters using backpropagation and an update rule.
+
+        Args:
+            rule: name of update rule, as provided by rian.math.descent
+            prefix: prefix of the configuration parameters, that contain
+                the hyperparameters of the update rule. By default the
+                name of the update rule is used, such that e.g. the
+                configuration parameter 'adam_rate' is passed to the
+                update rule 'adam' as hyperparameter 'rate'.
+
+        """
+
+        prefix = (prefix or rule) + '_'
+        kwds = {key[len(prefix):]: val for key, val \
+            in self._config.items() if key.startswith(prefix)}
+        engine = descent.Engine(rule, **kwds)
+        # share states of update rule with checkpoints
+        engine.states = self._buffer.setdefault('bprop_states', {})
+        self._buffer['bprop_engine'] = engine
+
+        self._bprop_parallel_start()
+        try:
+            while self.update():
+                # get training data (sample from stratified minibatches)
+                data = self._get_data_training()
+                # compute parameter gradients (optionally data parallel)
+                gradient = self._bprop_get_gradient(data)
+                # update parameters in place
+                self._bprop_update_engine(gradient)
+        finally:
+            self._bprop_parallel_stop()
+
+        return True
+
+    def _bprop_parallel_start(self):
+        """Start worker processes for data parallel gradient computation.
+
+        If the configuration parameter 'bprop_workers' is greater than one,
+        the arrays of the unit and link parameters are moved to shared memory
+        and a pool of worker processes is started, which attach to the shared
+        arrays. Thereby parameter updates within the main process are
+        immediately visible to the workers.
+
+        Returns:
+            True if the worker pool has been started, else False.
+
+        """
+
+        workers = self._config.get('bprop_workers', 0) or 0
+        if workers < 2: return False
+        if not shared.is_available():
+            ui.warning("data parallel optimization requires shared memory: "
+                "using sequential optimization.")
+            return False
+
+        import multiprocessing
+
+        system = self.model.system
+        blocks = []
+        arrays = []
+
+        def _share(params):
+            handles = {}
+            for key, val in params.items():
+                if not isinstance(val, numpy.ndarray):
+                    handles[key] = val
+                    continue
+                block, array = shared.share(val)
+                params[key] = array
+                blocks.append(block)
+                arrays.append((params, key, array))
+                handles[key] = shared.get_handle(block, array)
+            return handles
+
+        handles = {
+            'units': [_share(layer) for layer in system._params['units']],
+            'links': {key: _share(links) for key, links \
+                in system._params['links'].items()},
+            'mapping': system._get_mapping() }
+
+        pool = multiprocessing.Pool(workers,
+            initializer = _bprop_worker_init,
+            initargs = (self.model.get('config'),
+                system.get('copy')['config'], handles, self._config))
+
+        self._buffer['bprop_pool'] = pool
+        self._buffer['bprop_shared'] = {'blocks': blocks, 'arrays': arrays}
+
+        return True
+
+    def _bprop_parallel_stop(self):
+        """Stop worker processes and release shared memory."""
+
+        pool = self._buffer.pop('bprop_pool', None)
+        if pool is None: return False
+        pool.close()
+        pool.join()
+
+        # replace shared arrays by private copies and release blocks
+        state = self._buffer.pop('bprop_shared')
+        for params, key, array in state['arrays']:
+            if params.get(key) is array: params[key] = array.copy()
+        del state['arrays']
+        for block in state['blocks']: shared.release(block, unlink = True)
 
         return True
 
@@ -133,40 +292,95 @@ class ANN(rian.model.morphisms.base.Optimizer):
 
         return delta
 
-    def _bprop_update(self, updates):
-        """Update parameters from dictionary."""
+    def _bprop_update_engine(self, gradient):
+        """Update parameters in place from gradients using update engine."""
 
         system = self.model.system
+        engine = self._buffer['bprop_engine']
 
         layers = system._get_mapping()
-        for id, layer in enumerate(layers[:-1]):
-            src = layer
+        for id, src in enumerate(layers[:-1]):
             tgt = layers[id + 1]
-            system._params['links'][(id, id + 1)]['W'] += \
-                updates['links'][(src, tgt)]['W']
-            system._units[tgt].update(updates['units'][tgt])
+            links = system._params['links'][(id, id + 1)]
+            for key, grad in gradient['links'][(src, tgt)].items():
+                engine.update(('links', src, tgt, key), links[key], grad)
+            units = system._units[tgt].params
+            for key, grad in gradient['units'][tgt].items():
+                engine.update(('units', tgt, key), units[key], grad)
 
         return True
 
-    def _bprop_get_updates(self, out, delta):
-        """Compute parameter update directions from weight deltas."""
+    def _bprop_get_gradient(self, data):
+        """Compute parameter gradients from training data.
 
-        system = self.model.system
+        Args:
+            data: 2-tuple of numpy arrays containing source and target data
+
+        Returns:
+            Dictionary with keys 'units' and 'links', that contains the
+            gradients of the unit and link parameters.
+
+        """
 
-        rate = self._config.get('bprop_rate', .1)
+        if self._buffer.get('bprop_pool', None):
+            return self._bprop_get_gradient_parallel(data)
+        return self._bprop_get_gradient_local(data)
+
+    def _bprop_get_gradient_local(self, data):
+        """Compute parameter gradients within the current process."""
+
+        # forward pass (compute estimations from given input)
+        values = self._bprop_forward(data[0])
+        # backward pass (compute deltas to given output)
+        deltas = self._bprop_backward(data[1], values)
+
+        return self._bprop_get_gradient_delta(values, deltas)
+
+    def _bprop_get_gradient_parallel(self, data):
+        """Compute parameter gradients within the worker pool.
+
+        The minibatch is split into shards, which are processed by the
+        workers. Since the gradients of units and links are means over
+        the samples, the gradient of the minibatch is given by the sum
+        of the shard gradients, weighted by the relative shard sizes.
+
+        """
+
+        pool = self._buffer['bprop_pool']
+        size = data[0].shape[0]
+        shards = self._config.get('bprop_shards', None) \
+            or self._config['bprop_workers']
+        bounds = numpy.linspace(0, size, min(shards, size) + 1).astype(int)
+        tasks = [(data[0][a:b], data[1][a:b])
+            for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+        # compute shard gradients and reduce them to minibatch gradient
+        results = pool.map(_bprop_worker_gradient, tasks)
+        weights = [float(task[0].shape[0]) / size for task in tasks]
+        gradient = {'units': {}, 'links': {}}
+        for cat in gradient:
+            for key, params in results[0][cat].items():
+                gradient[cat][key] = {
+                    param: sum(weight * result[cat][key][param]
+                    for weight, result in zip(weights, results))
+                    for param in params}
+
+        return gradient
+
+    def _bprop_get_gradient_delta(self, out, delta):
+        """Compute parameter gradients from weight deltas."""
+
+        system = self.model.system
 
         layers = system._get_mapping()
         links = {}
         units = {}
         for id, src in enumerate(layers[:-1]):
             tgt = layers[id + 1]
-            updu = system._units[tgt].get_updates_delta(delta[src, tgt])
-            updl = rian.system.commons.links.Links.get_updates_delta(
+            units[tgt] = system._units[tgt].get_updates_delta(delta[src, tgt])
+            links[(src, tgt)] = \
+                rian.system.commons.links.Links.get_updates_delta(
                 out[src], delta[src, tgt])
-            units[tgt] = {key: rate * updu[key]
-                for key in updu.keys()}
-            links[(src, tgt)] = {key: rate * updl[key]
-                for key in updl.keys()}
 
         return { 'units': units, 'links': links }
 
@@ -180,98 +394,66 @@ class ANN(rian.model.morphisms.base.Optimizer):
     def _rprop(self):
         """Optimize parameters using resiliant backpropagation (RPROP).
 
-        resiliant backpropagation ...
-
-        2Do: self._config['resilience'] = True; return self._bprob()
+        Resiliant backpropagation only uses the signs of the gradients,
+        to adapt individual step sizes of the parameters, which are
+        increased by the factor 'rprop_accel'[2], if the sign of the
+        gradient persists and decreased by the factor 'rprop_accel'[0],
+        if it changes.
 
         """
 
-        while self.update():
-            data = self._get_data_training()
-            # forward pass (compute estimations from given input)
-            values = self._bprop_forward(data[0])
-            # backward pass (compute deltas to given output)
-            deltas = self._bprop_backward(data[1], values)
-            # compute parameter updates
-            updates = self._rprop_get_updates(values, deltas)
-            # update parameters
-            self._bprop_update(updates)
-
-        return True
-
-    def _rprop_get_updates(self, out, delta):
-        """ """
-
-        def _get_dict(dict, val): return {key: val * numpy.ones(
-            shape = dict[key].shape) for key in list(dict.keys())}
-
-        def _get_update(prevGrad, prev_update, grad, accel, min_factor,
-            max_factor):
-            update = {}
-            for key in list(grad.keys()):
-                sign = numpy.sign(grad[key])
-                a = numpy.sign(prevGrad[key]) * sign
-                magnitude = numpy.maximum(numpy.minimum(
-                    prev_update[key] \
-                    * (accel[0] * (a == -1) + accel[1] * (a == 0)
-                    + accel[2] * (a == 1)), max_factor), min_factor)
-                update[key] = magnitude * sign
-            return update
-
-        # RProp parameters
-        accel = self._config.get('rprop_accel', (.5, 1., 1.2))
-        init_rate = self._config.get('rprop_init_rate', .001)
-        min_factor = self._config.get('rprop_min_factor', .000001)
-        max_factor = self._config.get('rprop_max_factor', 50.)
-
-        system = self.model.system
-        layers = system._get_mapping()
-
-        # compute gradient from delta rule
-        grad = {'units': {}, 'links': {}}
-        for id, src in enumerate(layers[:-1]):
-            tgt = layers[id + 1]
-            grad['units'][tgt] = \
-                system._units[tgt].get_updates_delta(delta[src, tgt])
-            grad['links'][(src, tgt)] = \
-                rian.system.commons.links.Links.get_updates_delta(
-                out[src], delta[src, tgt])
-
-        # get previous gradients and updates
-        prev = self.read('rprop')
-        if not prev:
-            prev = {
-                'gradient': grad,
-                'update': {'units': {}, 'links': {}}}
-            for id, src in enumerate(layers[:-1]):
-                tgt = layers[id + 1]
-                prev['update']['units'][tgt] = \
-                    _get_dict(grad['units'][tgt], init_rate)
-                prev['update']['links'][(src, tgt)] = \
-                    _get_dict(grad['links'][(src, tgt)], init_rate)
-        prev_gradient = prev['gradient']
-        prev_update = prev['update']
-
-        # compute updates
-        update = {'units': {}, 'links': {}}
-        for id, src in enumerate(layers[:-1]):
-            tgt = layers[id + 1]
-
-            # calculate current rates for units
-            update['units'][tgt] = _get_update(
-                prev_gradient['units'][tgt],
-                prev_update['units'][tgt],
-                grad['units'][tgt],
-                accel, min_factor, max_factor)
-
-            # calculate current rates for links
-            update['links'][(src, tgt)] = _get_update(
-                prev_gradient['links'][(src, tgt)],
-                prev_update['links'][(src, tgt)],
-                grad['links'][(src, tgt)],
-                accel, min_factor, max_factor)
+        return self._bprop_optimize('rprop')
 
-        # save updates to store
-        self.write('rprop', gradient = grad, update = update)
+#
+# Data parallel workers
+#
 
-        return update
+_worker = {}
+
+def _bprop_worker_init(mconfig, sconfig, params, config):
+    """Initialize worker process for data parallel gradient computation.
+
+    The worker creates a model instance with the system of the optimized
+    model, which however uses the arrays in shared memory as parameters.
+    Since the gradient computation only requires the system, the dataset
+    and the network of the model are not passed to the worker.
+
+    Args:
+        mconfig: dictionary with the model configuration
+        sconfig: dictionary with the system configuration
+        params: dictionary with system parameters, where numpy arrays
+            are replaced by handles to shared memory blocks
+        config: dictionary with the optimizer configuration
+
+    """
+
+    blocks = []
+
+    def _attach(handles):
+        params = {}
+        for key, val in handles.items():
+            if isinstance(val, shared.Handle):
+                block, val = shared.attach(val)
+                blocks.append(block)
+            params[key] = val
+        return params
+
+    model = rian.model.new(config = mconfig, system = {
+        'config': sconfig, 'params': {
+        'units': [_attach(layer) for layer in params['units']],
+        'links': {key: _attach(links) for key, links \
+            in params['links'].items()},
+        'mapping': params['mapping'] }})
+
+    # the model is not compatible with the optimizer, since it does not
+    # contain a dataset, such that it is assigned without check
+    optimizer = ANN()
+    optimizer.model = model
+    optimizer._config = config.copy()
+
+    _worker['optimizer'] = optimizer
+    _worker['blocks'] = blocks
+
+def _bprop_worker_gradient(data):
+    """Compute parameter gradients of a minibatch shard."""
+    return _worker['optimizer']._bprop_get_gradient_local(data)
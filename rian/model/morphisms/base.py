@@ -24,16 +24,37 @@ __author__ = 'Frootlab Developers'
 __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
+import copy
+import json
+import os
+import threading
 import time
+import zipfile
 import numpy
 import rian
 from hup.base import otree
 from rian.core import ui
+from rian.system.exports.archive import _encode
+from rian.system.imports.archive import _decode
 
 class Optimizer:
 
     _config = None
+    _config_keys = frozenset()
     _buffer = {}
+    _default = {
+        'checkpoint_path': None,
+        'checkpoint_updates': 0,
+        'checkpoint_interval': 0.,
+        'checkpoint_resume': False,
+        'key_events_enable': True,
+        'tracker_obj_stop_patience': 0,
+        'tracker_obj_stop_min_delta': 0.,
+        'tracker_obj_stop_window': 0,
+        'tracker_obj_stop_rel_delta': .001,
+        'tracker_time_budget': 0. }
+    _checkpoint_buffer = ['epoch', 'store', 'obj_values', 'obj_opt_value',
+        'optimum', 'eval_values']
 
     def __init__(self, model = None, *args, **kwds):
         """Configure tracker to given rian system instance."""
@@ -59,6 +80,8 @@ class Optimizer:
             return self._get_progress()
         if key == 'model':
             return self._get_model()
+        if key == 'config':
+            return self._config
 
         if key in self._buffer: return self._buffer[key]
 
@@ -134,6 +157,50 @@ class Optimizer:
         algorithm = self._get_objective_algorithm('name')
         return self.evaluation.evaluate(algorithm)
 
+    def _get_convergence(self):
+        """Check objective values for convergence.
+
+        The optimization is regarded as converged, if within the last
+        'tracker_obj_stop_patience' calculations of the objective function
+        its optimum did not improve by more than the absolute value
+        'tracker_obj_stop_min_delta', or if within the last
+        'tracker_obj_stop_window' calculations its optimum did not improve
+        by more than the fraction 'tracker_obj_stop_rel_delta' of its
+        previous optimum. The criterions are disabled by the value 0.
+
+        Returns:
+            String containing the criterion, that detected the
+            convergence, or None if the optimization did not converge.
+
+        """
+
+        values = self._buffer['obj_values']
+        if not isinstance(values, numpy.ndarray) or values.shape[0] < 2:
+            return None
+        if values[-1, 0] < self._config.get('tracker_obj_init_wait', 0.):
+            return None
+
+        # get running optimum of objective values as running maximum
+        values = values[:, 1]
+        if self._get_objective_algorithm('optimum') == 'min':
+            values = -values
+        optimum = numpy.maximum.accumulate(values)
+
+        patience = int(self._config.get('tracker_obj_stop_patience', 0) or 0)
+        if patience and optimum.size > patience:
+            delta = self._config.get('tracker_obj_stop_min_delta', 0.)
+            if optimum[-1] - optimum[-patience - 1] <= delta:
+                return 'patience'
+
+        window = int(self._config.get('tracker_obj_stop_window', 0) or 0)
+        if window and optimum.size > window:
+            delta = self._config.get('tracker_obj_stop_rel_delta', 0.)
+            prev = optimum[-window - 1]
+            if optimum[-1] - prev <= delta * abs(prev):
+                return 'window'
+
+        return None
+
     def _get_data_training(self, *args, **kwds):
         """Get training data.
 
@@ -232,6 +299,28 @@ class Optimizer:
 
         return True
 
+    def _get_checkpoint(self):
+        """Get snapshot of the optimization state.
+
+        The snapshot only comprises the system parameters, the learning
+        rates and the buffers of the optimizer, that are required to
+        continue the optimization, but not the dataset or the network.
+
+        Returns:
+            Dictionary with keys 'params', 'rates' and 'buffer'.
+
+        """
+
+        buffer = {key: self._buffer[key] \
+            for key in self._checkpoint_buffer if key in self._buffer}
+        rates = {key: val for key, val in self._config.items() \
+            if key.endswith('_rate')}
+
+        return {
+            'params': self.model.system.get('copy', 'params'),
+            'rates': rates,
+            'buffer': copy.deepcopy(buffer) }
+
     def _get_schedule(self, key):
         """Get schedule by name."""
 
@@ -246,6 +335,8 @@ class Optimizer:
             return None
         if not self._set_buffer_reset():
             return None
+        if self._config.get('checkpoint_resume', False):
+            self._set_checkpoint()
 
         # get name of optimization algorithm
         name = self._config.get('algorithm', None)
@@ -267,7 +358,8 @@ class Optimizer:
                 % (self.model.name, self.model.system.type, name))
 
             # start key events
-            if not self._buffer['key_events_started']:
+            if self._buffer['key_events'] \
+                and not self._buffer['key_events_started']:
                 ui.info("press 'h' for help or 'q' to quit.")
                 self._buffer['key_events_started'] = True
                 rian.set('shell', 'buffmode', 'key')
@@ -284,6 +376,21 @@ class Optimizer:
         except KeyboardInterrupt:
             retval = False
             rian.set('shell', 'buffmode', 'line')
+        finally:
+            self.model.system.set('params_version')
+
+            # wait for pending checkpoint
+            writer = self._buffer.get('checkpoint_writer', None)
+            if writer: writer.join()
+
+        # record the reason for the termination in the model configuration
+        self.model.set('config', {
+            'stop_reason': self._buffer.get('stop_reason', None)})
+
+        # write final checkpoint, such that the optimization can be continued
+        path = self._config.get('checkpoint_path', None)
+        if retval and path:
+            _write_checkpoint(path, self._get_checkpoint())
 
         return retval
 
@@ -316,7 +423,13 @@ class Optimizer:
             schedules = system._config.get('schedules', {})
             config = schedules.get(key, {}).get(system.type, {})
 
-        self._config = {**self._default, **config, **kwds}
+        # defaults of the optimizer class extend the common defaults
+        self._config = {
+            **Optimizer._default, **self._default, **config, **kwds}
+
+        # keep the explicitly given parameters, which take precedence over
+        # the learning rates of a checkpoint
+        self._config_keys = frozenset(config) | frozenset(kwds)
 
         return True
 
@@ -345,6 +458,41 @@ class Optimizer:
 
         raise KeyError(f"unknown key '{key}'")
 
+    def _set_checkpoint(self, path = None):
+        """Resume optimization from checkpoint.
+
+        Args:
+            path (string, optional): path of checkpoint file. By default
+                the configuration parameter 'checkpoint_path' is used.
+
+        Learning rates, which have explicitly been given to the
+        optimization, are not overwritten by the learning rates of the
+        checkpoint.
+
+        Returns:
+            Bool which is True if the system parameters and the buffers of
+            the optimizer have been restored from the checkpoint, and False
+            if no checkpoint has been found.
+
+        """
+
+        path = path or self._config.get('checkpoint_path', None)
+        if not path or not os.path.exists(path):
+            return False
+
+        state = _read_checkpoint(path)
+
+        self.model.system.set('copy', params = state['params'])
+        self._config.update({key: val for key, val in state['rates'].items()
+            if key not in self._config_keys})
+        self._buffer.update(state['buffer'])
+        self._buffer['checkpoint_epoch'] = self._buffer['epoch']
+
+        ui.info('resume optimization from checkpoint at update %i'
+            % self._buffer['epoch'])
+
+        return True
+
     def _set_buffer_reset(self):
         now = time.time()
 
@@ -354,16 +502,21 @@ class Optimizer:
             'training_data': None,
             'optimum': {},
             'continue': True,
+            'stop_reason': None,
+            'start_time': now,
             'obj_values': None,
             'obj_opt_value': None,
-            'key_events': True,
+            'key_events': self._config['key_events_enable'],
             'key_events_started': False,
             'eval_prev_time': now,
             'eval_values': None,
             'estim_started': False,
             'estim_start_time': now,
             'store': {},
-            'algorithms': {} }
+            'algorithms': {},
+            'checkpoint_epoch': 0,
+            'checkpoint_time': now,
+            'checkpoint_writer': None }
 
         return True
 
@@ -396,8 +549,16 @@ class Optimizer:
     def update(self):
         """Update epoch and check termination criterions."""
         self._buffer['epoch'] += 1
+        self.model.system.set('params_version')
         if self._buffer['epoch'] >= self._config['updates']:
-            self._buffer['continue'] = False
+            self._update_stop('updates')
+
+        # (optional) check wall-clock time budget
+        budget = self._config.get('tracker_time_budget', 0.)
+        if budget and self._buffer['continue'] \
+            and time.time() - self._buffer['start_time'] > budget:
+            ui.info('time budget of %.1fs exceeded' % budget)
+            self._update_stop('budget')
 
         if self._buffer['key_events']:
             self._update_keypress()
@@ -405,8 +566,11 @@ class Optimizer:
             self._update_objective_function()
         if self._config.get('tracker_eval_enable', False):
             self._update_evaluation()
+        if self._buffer['continue'] \
+            and self._config.get('checkpoint_path', None):
+            self._update_checkpoint()
 
-        if not self._buffer['continue']:
+        if not self._buffer['continue'] and self._buffer['key_events']:
             rian.set('shell', 'buffmode', 'line')
 
         return self._buffer['continue']
@@ -429,7 +593,7 @@ class Optimizer:
                 "'t' -- estimate finishing time")
         elif char == 'q':
             ui.info('aborting optimization')
-            self._buffer['continue'] = False
+            self._update_stop('keypress')
         elif char == 't':
             ftime = self._get_estimatetime()
             ui.info('estimated finishing time %s' % ftime)
@@ -456,6 +620,13 @@ class Optimizer:
             numpy.vstack((self._buffer['obj_values'], \
             numpy.array([[progr, value]])))
 
+        # (optional) check for convergence of objective function
+        if self._buffer['continue']:
+            reason = self._get_convergence()
+            if reason:
+                ui.info('objective function converged (%s)' % reason)
+                self._update_stop(reason)
+
         # (optional) check for new optimum
         if self._config['tracker_obj_keep_optimum']:
 
@@ -499,6 +670,60 @@ class Optimizer:
 
         return True
 
+    def _update_stop(self, reason):
+        """Stop optimization and record the reason.
+
+        Args:
+            reason (string): reason for the termination of the
+                optimization: 'updates', 'keypress', 'budget', 'patience'
+                or 'window'. After the optimization the reason is available
+                by the model configuration key 'stop_reason'.
+
+        """
+
+        self._buffer['continue'] = False
+        if not self._buffer.get('stop_reason', None):
+            self._buffer['stop_reason'] = reason
+
+        return True
+
+    def _update_checkpoint(self):
+        """Write checkpoint of the optimization state.
+
+        A checkpoint is written every 'checkpoint_updates' updates and
+        after 'checkpoint_interval' seconds. The snapshot of the optimization
+        state is taken synchronously, but written to the checkpoint file by
+        a background thread, such that the optimization is not blocked by
+        the file I/O. If the previous checkpoint is still being written, the
+        checkpoint is postponed to a subsequent update.
+
+        """
+
+        epoch = self._buffer['epoch']
+        now = time.time()
+
+        updates = self._config.get('checkpoint_updates', 0) or 0
+        interval = self._config.get('checkpoint_interval', 0.) or 0.
+        if not (updates and epoch - self._buffer['checkpoint_epoch'] \
+            >= updates) and not (interval and now \
+            - self._buffer['checkpoint_time'] >= interval):
+            return False
+
+        writer = self._buffer['checkpoint_writer']
+        if writer and writer.is_alive():
+            return False
+
+        writer = threading.Thread(target = _write_checkpoint,
+            args = (self._config['checkpoint_path'], self._get_checkpoint()),
+            daemon = True)
+        writer.start()
+
+        self._buffer['checkpoint_writer'] = writer
+        self._buffer['checkpoint_epoch'] = epoch
+        self._buffer['checkpoint_time'] = now
+
+        return True
+
     def _update_evaluation(self):
         """Calculate evaluation function of system."""
 
@@ -534,3 +759,48 @@ class Optimizer:
                 progress * 100., func['name'], func['formater'](value)))
 
         return False
+
+def _read_checkpoint(path):
+    """Read snapshot of optimization state from checkpoint file."""
+
+    with zipfile.ZipFile(path) as file:
+        if 'checkpoint.json' not in file.namelist():
+            raise ValueError(f"file '{path}' is not a valid checkpoint")
+        meta = json.loads(file.read('checkpoint.json'))
+        def load(name):
+            with file.open(name) as npy:
+                return numpy.lib.format.read_array(npy, allow_pickle = False)
+        return _decode(meta, load)
+
+def _write_checkpoint(path, state):
+    """Write snapshot of optimization state to checkpoint file.
+
+    Like system archives, the checkpoint file is a ZIP archive without
+    pickled objects: The numpy arrays of the snapshot are stored as
+    individual NPY members and the remaining structure as JSON member
+    'checkpoint.json'. The snapshot is written to a temporary file, which
+    atomically replaces the checkpoint file, such that the checkpoint file
+    is never partially written, even if the process is terminated.
+
+    """
+
+    try:
+        dirname = os.path.dirname(path)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+        arrays = {}
+        meta = _encode(state, arrays, 'checkpoint')
+        temp = path + '.tmp'
+        try:
+            with zipfile.ZipFile(temp, mode='w', allowZip64=True) as file:
+                file.writestr('checkpoint.json', json.dumps(meta))
+                for name, array in arrays.items():
+                    with file.open(name, mode='w', force_zip64=True) as npy:
+                        numpy.lib.format.write_array(npy, array,
+                            allow_pickle = False)
+            os.replace(temp, path)
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
+    except (OSError, TypeError) as err:
+        ui.warning(f"could not write checkpoint '{path}': {err}")
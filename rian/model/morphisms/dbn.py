@@ -29,6 +29,9 @@ __author__ = 'Frootlab Developers'
 __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
+import copy
+import threading
+import time
 from hup.base import catalog
 from rian.core import ui
 import rian.model.morphisms.ann
@@ -39,6 +42,8 @@ class DBN(rian.model.morphisms.ann.ANN):
     _default = {
         'algorithm': 'dbn',
         'pretraining': True,
+        'pretraining_pipeline': False,
+        'pretraining_pipeline_warmup': 1000,
         'finetuning': True,
         'schedule': None,
         'visible': None,
@@ -79,22 +84,35 @@ class DBN(rian.model.morphisms.ann.ANN):
         The default optimization schedules uses restricted boltzmann
         machines and contrastive divergency optimization.
 
+        If the parameter 'pretraining_pipeline' is True, the layerwise
+        subsystems are optimized concurrently: The optimization of a
+        subsystem starts, when the optimization of the preceding
+        subsystem has performed 'pretraining_pipeline_warmup' updates.
+
+        The training data of the subsystems are given by dataset views,
+        that transform the rows of the dataset of the preceding subsystem
+        on access, such that the tables of the dataset are neither
+        modified nor duplicated. Within a pipeline the transformation uses
+        the current parameters of the preceding subsystem, otherwise the
+        transformed rows are cached by the dataset view.
+
         """
 
         system = self.model.system
         config = self._config
+        pipeline = config.get('pretraining_pipeline', False)
 
         if 'units' not in system._params:
             raise ValueError("""could not configure subsystems:
                 no layers have been defined!""") or None
 
-        # create backup of dataset (before transformation)
+        # create snapshot of dataset (before column filtering)
         dataset = self.model.dataset
-        dataset_backup = dataset.get('copy')
+        dataset_snapshot = dataset.get('snapshot')
 
         # create layerwise subsystems for RBM pretraining
         cid = int((len(system._units) - 1) / 2)
-        rbmparams = { 'units': [], 'links': [] }
+        stages = []
         for lid in range(cid):
 
             src = system._params['units'][lid]
@@ -127,30 +145,37 @@ class DBN(rian.model.morphisms.ann.ANN):
                 hidden_nodes = tgtnodes, hidden_type = tgt['class'])
             subsystem.configure(network)
 
-            # transform dataset with previous system and initialize
-            # subsystem with dataset
+            # create dataset view with previous system and initialize
+            # subsystem with dataset view
             if lid:
-                vlayer = prevsys._params['units'][0]['layer']
-                hlayer = prevsys._params['units'][1]['layer']
-                dataset._initialize_transform_system(
-                    system = prevsys, mapping = (vlayer, hlayer),
-                    func = 'expect')
-            dataset.set('colfilter', visible = srcnodes)
+                prevmodel = stages[-1]['model']
+                vlayer = prevmodel.system._params['units'][0]['layer']
+                hlayer = prevmodel.system._params['units'][1]['layer']
+                subdataset = rian.dataset.view(prevmodel.dataset,
+                    prevmodel.system, mapping = (vlayer, hlayer),
+                    func = 'expect', cache = not pipeline)
+            else:
+                subdataset = dataset
+            subdataset.set('colfilter', visible = srcnodes)
 
             # create model
             model = rian.model.new(
                 config = {'type': 'base.Model', 'name': name},
-                dataset = dataset, network = network,
+                dataset = subdataset, network = network,
                 system = subsystem)
 
             # copy parameters from perantal subsystems hidden units
             # to current subsystems visible units
             if lid:
-                dsrc = rbmparams['units'][-1]
+                dsrc = stages[-1]['model'].system._units['hidden'].params
                 dtgt = model.system._params['units'][0]
                 lkeep = ['id', 'layer', 'layer_id', 'visible', 'class']
                 lcopy = [key for key in list(dsrc.keys()) if not key in lkeep]
-                for key in lcopy: dtgt[key] = dsrc[key]
+                for key in lcopy:
+                    # within a pipeline the preceding subsystem is still
+                    # optimized, such that the parameters are copied
+                    dtgt[key] = copy.deepcopy(dsrc[key]) \
+                        if pipeline else dsrc[key]
 
             # reference parameters of current subsystem
             # in first layer reference visible, links and hidden
@@ -160,15 +185,34 @@ class DBN(rian.model.morphisms.ann.ANN):
                 src['init'] = model.system._units['visible'].params
             tgt['init'] = model.system._units['hidden'].params
 
-            # optimize model
+            # get optimization schedule
             schedule = self._get_schedule(self._config.get(
                 'schedule_%s' % systype.lower(), 'default'))
+            stage = {
+                'model': model,
+                'optimizer': rian.model.morphisms.new(model),
+                'config': schedule.get(systype, None) }
 
-            if systype in schedule:
-                model.optimize(schedule[systype])
+            # optimize model
+            if not pipeline:
+                stage['optimizer'].optimize(stage['config'])
             else:
-                model.optimize()
+                # wait for warmup of preceding subsystem
+                if lid: self._dbn_pretraining_wait(stages[-1])
+                self._dbn_pretraining_start(stage)
+
+            stages.append(stage)
+
+        # wait for pipelined optimizations to finish
+        if pipeline:
+            for stage in stages:
+                stage['thread'].join()
+                if stage['error']: raise stage['error']
 
+        # collect optimized parameters of subsystems
+        rbmparams = { 'units': [], 'links': [] }
+        for lid, stage in enumerate(stages):
+            model = stage['model']
             if not lid: rbmparams['units'].append(
                 model.system.get('layer', 'visible'))
             rbmparams['links'].append(
@@ -176,10 +220,8 @@ class DBN(rian.model.morphisms.ann.ANN):
             rbmparams['units'].append(
                 model.system.get('layer', 'hidden'))
 
-            prevsys = model.system
-
-        # reset data to initial state (before transformation)
-        dataset.set('copy', **dataset_backup)
+        # reset data to initial state (before column filtering)
+        dataset.set('snapshot', **dataset_snapshot)
 
         # keep original inputs and outputs
         mapping = system._get_mapping()
@@ -233,6 +275,34 @@ class DBN(rian.model.morphisms.ann.ANN):
 
         return True
 
+    def _dbn_pretraining_start(self, stage):
+        """Start optimization of a pipelined subsystem in a thread."""
+
+        def run():
+            try:
+                stage['optimizer'].optimize(stage['config'],
+                    key_events_enable = False)
+            except Exception as err:
+                stage['error'] = err
+
+        stage['error'] = None
+        stage['thread'] = threading.Thread(target = run, daemon = True)
+        stage['thread'].start()
+
+        return True
+
+    def _dbn_pretraining_wait(self, stage):
+        """Wait for warmup of a pipelined subsystem."""
+
+        warmup = self._config.get('pretraining_pipeline_warmup', 0)
+        while stage['thread'].is_alive() \
+            and stage['optimizer'].get('epoch') < warmup:
+            time.sleep(0.1)
+
+        if stage['error']: raise stage['error']
+
+        return True
+
     @catalog.custom(
         name     = 'finetuning',
         longname = 'deep belief network finetuning',
@@ -153,8 +153,9 @@ class RBM(rian.model.morphisms.ann.ANN):
             if found:
                 ui.info('using generalization: %s' % (about))
 
-        # init rasa
-        self.write('sa', init_rate=config['update_rate'])
+        # init rasa (unless resumed from checkpoint)
+        if not self.read('sa'):
+            self.write('sa', init_rate=config['update_rate'])
 
         while self.update():
             # get training data (sample from stratified minibatches)
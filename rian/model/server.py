@@ -0,0 +1,429 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Frootlab
+# Copyright (C) 2013-2019 Patrick Michl
+#
+# This file is part of Frootlab Rian, https://www.frootlab.org/rian
+#
+#  Rian is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  Rian is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#  You should have received a copy of the GNU General Public License along with
+#  Rian. If not, see <http://www.gnu.org/licenses/>.
+#
+
+__copyright__ = '2019 Frootlab'
+__license__ = 'GPLv3'
+__docformat__ = 'google'
+__author__ = 'Frootlab Developers'
+__email__ = 'contact@frootlab.org'
+__authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
+
+import concurrent.futures
+import http.server
+import json
+import os
+import queue
+import socketserver
+import stat
+import threading
+import time
+import numpy
+import rian
+from hup.base import otree
+
+class Batcher:
+    """Micro-batching of prediction requests.
+
+    Concurrent prediction requests are gathered into micro-batches, such
+    that the values of the target units are calculated by a single forward
+    pass per batch, instead of a forward pass per request. A batch is
+    processed, as soon as it contains 'batchsize' rows or the first request
+    of the batch has waited for 'latency' seconds.
+
+    Args:
+        model (model instance): rian model instance
+        func (str, optional): name of the prediction function, as accepted
+            by :func:`rian.model.inference.predict`. default: 'expect'
+        mapping (tuple, optional): tuple with names of unit layers from the
+            source unit layer to the target unit layer.
+            default: None uses the mapping from the input to the output layer
+        batchsize (int, optional): maximum number of rows per batch
+            default: 256
+        latency (float, optional): maximum time in seconds, that a request
+            waits for further requests. default: 0.005
+
+    """
+
+    def __init__(self, model, func = 'expect', mapping = None,
+        batchsize = 256, latency = .005):
+        if not otree.has_base(model, 'Model'):
+            raise ValueError("model is not valid")
+
+        self.model = model
+        self.func = func
+        self.mapping = mapping or model.system._get_mapping()
+        self.batchsize = batchsize
+        self.latency = latency
+        self.size = len(model.system._units[self.mapping[0]].params['id'])
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self._set_stats_reset()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        """Start processing of requests in a background thread."""
+
+        if self._thread is not None: return False
+        self._stopping = False
+        self._thread = threading.Thread(target = self._run, daemon = True)
+        self._thread.start()
+        with self._lock: self._stats['start_time'] = time.time()
+
+        return True
+
+    def stop(self):
+        """Stop processing after the pending requests have been processed.
+
+        Requests, which are submitted after the stop has been initiated, are
+        rejected.
+
+        """
+
+        if self._thread is None: return False
+        with self._lock:
+            if not self._stopping:
+                self._stopping = True
+                self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+        return True
+
+    def submit(self, data):
+        """Submit prediction request.
+
+        Args:
+            data: numpy array of shape (rows, sources) or (sources, ) with
+                preprocessed source data
+
+        Returns:
+            :class:`concurrent.futures.Future`, which result is a numpy array
+            of shape (rows, targets) with the values of the target units.
+
+        """
+
+        data = numpy.asarray(data, dtype = float)
+        if data.ndim == 1: data = data.reshape(1, -1)
+        if data.ndim != 2 or data.shape[1] != self.size:
+            raise ValueError(
+                "data is required to have %i columns" % self.size)
+
+        # requests are only accepted before the sentinel is queued
+        future = concurrent.futures.Future()
+        with self._lock:
+            if self._thread is None or self._stopping:
+                raise RuntimeError("batcher is not running")
+            self._queue.put((data, future, time.time()))
+
+        return future
+
+    def predict(self, data, timeout = None):
+        """Predict values of target units.
+
+        Args:
+            data: numpy array of shape (rows, sources) or (sources, ) with
+                preprocessed source data
+            timeout (float, optional): maximum time in seconds to wait for
+                the result. default: None waits without limit
+
+        Returns:
+            Numpy array of shape (rows, targets) with the values of the
+            target units.
+
+        """
+        return self.submit(data).result(timeout)
+
+    def get(self, key = 'stats'):
+        """Get statistics of processed requests."""
+
+        if key == 'stats': return self._get_stats()
+
+        raise KeyError(f"unknown key '{key}'")
+
+    def _get_stats(self):
+        """Get latency and throughput counters.
+
+        Returns:
+            Dictionary with the number of processed 'requests', 'rows',
+            'batches' and failed requests 'errors', the mean number of rows
+            per batch 'batch_mean', the mean and maximum latency of the
+            requests in seconds 'latency_mean' and 'latency_max' and the
+            'throughput' in rows per second since the start.
+
+        """
+
+        with self._lock:
+            stats = self._stats.copy()
+
+        start = stats.pop('start_time')
+        latency = stats.pop('latency_sum')
+        runtime = time.time() - start if start else 0.
+
+        return {**stats,
+            'batch_mean': stats['rows'] / max(stats['batches'], 1),
+            'latency_mean': latency / max(stats['requests'], 1),
+            'throughput': stats['rows'] / runtime if runtime else 0.}
+
+    def _set_stats_reset(self):
+        self._stats = {
+            'requests': 0,
+            'rows': 0,
+            'batches': 0,
+            'errors': 0,
+            'latency_sum': 0.,
+            'latency_max': 0.,
+            'start_time': None }
+
+        return True
+
+    def _run(self):
+        """Gather requests into batches until the sentinel is received."""
+
+        try:
+            running = True
+            while running:
+                request = self._queue.get()
+                if request is None: break
+                batch = [request]
+                rows = request[0].shape[0]
+                deadline = request[2] + self.latency
+                while rows < self.batchsize:
+                    timeout = deadline - time.time()
+                    if timeout <= 0: break
+                    try:
+                        request = self._queue.get(timeout = timeout)
+                    except queue.Empty:
+                        break
+                    if request is None:
+                        running = False
+                        break
+                    batch.append(request)
+                    rows += request[0].shape[0]
+                self._process(batch)
+        finally:
+            self._set_queue_reject()
+
+    def _set_queue_reject(self):
+        """Reject new and remaining requests, that have not been processed."""
+
+        with self._lock:
+            self._stopping = True
+        rejected = 0
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None: continue
+            request[1].set_exception(
+                RuntimeError("batcher has been stopped"))
+            rejected += 1
+        with self._lock: self._stats['errors'] += rejected
+
+        return True
+
+    def _process(self, batch):
+        """Process batch by a single forward pass and scatter results."""
+
+        data = numpy.concatenate([request[0] for request in batch])
+        try:
+            values = rian.model.inference.predict(self.model, data,
+                func = self.func, mapping = self.mapping,
+                chunksize = max(data.shape[0], 1))
+        except Exception as err:
+            for request in batch: request[1].set_exception(err)
+            with self._lock: self._stats['errors'] += len(batch)
+            return False
+
+        pos = 0
+        now = time.time()
+        for request in batch:
+            size = request[0].shape[0]
+            request[1].set_result(values[pos:pos + size])
+            pos += size
+
+        with self._lock:
+            stats = self._stats
+            stats['requests'] += len(batch)
+            stats['rows'] += pos
+            stats['batches'] += 1
+            latency = [now - request[2] for request in batch]
+            stats['latency_sum'] += sum(latency)
+            stats['latency_max'] = max(stats['latency_max'], max(latency))
+
+        return True
+
+class Server:
+    """Scoring service for prediction requests.
+
+    The server provides a HTTP interface to a :class:`Batcher`, which is
+    bound to a TCP address or a Unix domain socket. Prediction requests are
+    sent by 'POST /predict' with a JSON object {"data": [[...], ...]} and
+    answered with a JSON object {"values": [[...], ...]}. The statistics of
+    the batcher are provided by 'GET /stats'.
+
+    Args:
+        model (model instance): rian model instance
+        address (tuple or str, optional): tuple (host, port) of a TCP
+            address or path of a Unix domain socket. The port 0 selects an
+            arbitrary free port. An existing socket at the path is replaced,
+            but any other existing file raises a FileExistsError.
+            default: ('127.0.0.1', 0)
+        **kwds: keyword arguments, that are passed to :class:`Batcher`
+
+    """
+
+    def __init__(self, model, address = ('127.0.0.1', 0), **kwds):
+        self.batcher = Batcher(model, **kwds)
+
+        handler = type('Handler', (_Handler, ), {'batcher': self.batcher})
+        if isinstance(address, str):
+            if os.path.exists(address):
+                if not _is_socket(address):
+                    raise FileExistsError(
+                        f"file '{address}' exists and is not a socket")
+                os.remove(address)
+            self._server = _UnixServer(address, handler)
+        else:
+            self._server = _TCPServer(tuple(address), handler)
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def address(self):
+        """Address, to which the server is bound."""
+        return self._server.server_address
+
+    def start(self):
+        """Start server in a background thread."""
+
+        if self._thread is not None: return False
+        self.batcher.start()
+        self._thread = threading.Thread(
+            target = self._server.serve_forever, daemon = True)
+        self._thread.start()
+
+        return True
+
+    def serve(self):
+        """Start server and handle requests until interrupted."""
+
+        self.batcher.start()
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+        return True
+
+    def stop(self):
+        """Stop server and close socket."""
+
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        self.batcher.stop()
+        if isinstance(self.address, str) and _is_socket(self.address):
+            os.remove(self.address)
+
+        return True
+
+def serve(model, address = ('127.0.0.1', 8080), **kwds):
+    """Serve predictions of model until interrupted.
+
+    Args:
+        model (model instance): rian model instance
+        address (tuple or str, optional): tuple (host, port) of a TCP
+            address or path of a Unix domain socket.
+            default: ('127.0.0.1', 8080)
+        **kwds: keyword arguments, that are passed to :class:`Batcher`
+
+    """
+    return Server(model, address, **kwds).serve()
+
+def _is_socket(path):
+    """Check if path exists and is a Unix domain socket."""
+    return os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode)
+
+#
+# HTTP interface
+#
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """Handler of HTTP requests for prediction service."""
+
+    batcher = None
+
+    def do_GET(self):
+        if self.path != '/stats':
+            return self._send(404, {'error': f"unknown path '{self.path}'"})
+        return self._send(200, self.batcher.get('stats'))
+
+    def do_POST(self):
+        if self.path != '/predict':
+            return self._send(404, {'error': f"unknown path '{self.path}'"})
+        try:
+            size = int(self.headers.get('Content-Length', 0))
+            data = json.loads(self.rfile.read(size))['data']
+            values = self.batcher.predict(data)
+        except (ValueError, KeyError, TypeError) as err:
+            return self._send(400, {'error': str(err)})
+        except Exception as err:
+            return self._send(500, {'error': str(err)})
+        return self._send(200, {'values': values.tolist()})
+
+    def _send(self, status, obj):
+        body = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix domain sockets do not have a client address
+        return str(self.client_address or 'local')
+
+    def log_message(self, format, *args):
+        pass
+
+class _TCPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Frootlab
+# Copyright (C) 2013-2019 Patrick Michl
+#
+# This file is part of Frootlab Rian, https://www.frootlab.org/rian
+#
+#  Rian is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  Rian is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#  You should have received a copy of the GNU General Public License along with
+#  Rian. If not, see <http://www.gnu.org/licenses/>.
+#
+
+__copyright__ = '2019 Frootlab'
+__license__ = 'GPLv3'
+__docformat__ = 'google'
+__author__ = 'Frootlab Developers'
+__email__ = 'contact@frootlab.org'
+__authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
+
+import concurrent.futures
+import copy
+import itertools
+import math
+import os
+import tempfile
+import numpy
+import rian
+from hup.base import otree
+from rian.base import shared
+from rian.core import ui
+
+def sweep(model, space, method = 'grid', trials = 16, metric = 'error',
+    updates = None, rungs = 1, eta = 3, workers = 0, seed = None, **kwds):
+    """Search optimizer configuration by successive halving.
+
+    Every trial optimizes the system parameters of the model, starting from
+    their current values, with a configuration from the search space and is
+    scored by an evaluation function. With successive halving the trials are
+    optimized in rungs: In every rung all remaining trials are continued from
+    their checkpoints of the previous rung, and only the best trials, given
+    by the fraction 1 / 'eta', are promoted to the next rung, in which they
+    are optimized for 'eta' times the number of updates.
+
+    Trials run in a pool of worker processes, in which the model is restored
+    once per worker. The dataset tables are thereby not copied into the
+    workers, but exported to shared memory, which is attached by the
+    workers.
+
+    Args:
+        model (model instance): initialized rian model instance
+        space (dict): search space, given by a dictionary with optimizer
+            configuration keys as keys and lists of values as values. For
+            random search the values may also be given by tuples (low, high)
+            or (low, high, 'log'), which respectively are sampled uniformly or
+            log-uniformly from the interval.
+        method (str, optional): 'grid' for grid search over all combinations
+            of the values or 'random' for random search. default: 'grid'
+        trials (int, optional): number of trials of random search
+            default: 16
+        metric (str, optional): name of evaluation function, which scores
+            the trials, e.g. 'error' or 'accuracy'. default: 'error'
+        updates (int, optional): number of updates in the last rung
+            default: None uses the number of updates of the optimizer
+        rungs (int, optional): number of rungs of successive halving. For 1
+            rung all trials are optimized with the full number of updates.
+            default: 1
+        eta (int, optional): reduction factor of successive halving
+            default: 3
+        workers (int, optional): number of worker processes. For 0 or 1 the
+            trials are optimized sequentially in the current process.
+            default: 0
+        seed (int, optional): seed of random search. default: None
+        **kwds: optimizer configuration, that is shared by all trials
+
+    Returns:
+        List of dictionaries, which describe the trials by the keys 'config',
+        'score', 'updates' and 'rung', sorted by the reached rung and the
+        score, such that the first trial is the best trial.
+
+    """
+
+    if not otree.has_base(model, 'Model'):
+        raise ValueError("model is not valid")
+    if not isinstance(rungs, int) or rungs < 1:
+        raise ValueError("rungs is required to be a positive integer")
+    if not isinstance(eta, int) or eta < 2:
+        raise ValueError("eta is required to be an integer greater than 1")
+
+    # get configurations of trials
+    configs = _get_configs(space, method, trials, seed)
+    if not configs:
+        raise ValueError("search space is empty")
+
+    # get number of updates of the last rung and the optimum of the metric
+    optimizer = rian.model.morphisms.new(model)
+    optimizer.set('config', None, **kwds)
+    updates = int(updates or optimizer.get('config')['updates'])
+    algorithm = optimizer.evaluation.get('algorithm', metric,
+        category = 'model')
+    if not algorithm:
+        raise ValueError(f"evaluation function '{metric}' is not supported")
+    metric = algorithm['name']
+    optimum = algorithm.get('optimum', 'min')
+
+    def rank(trial):
+        score = trial['score']
+        if score is None or math.isnan(score): score = math.inf
+        elif optimum == 'max': score = -score
+        return (-trial['rung'], score)
+
+    results = [{'config': config, 'score': None, 'updates': 0,
+        'rung': -1} for config in configs]
+
+    if workers and workers > 1 and not shared.is_available():
+        ui.warning("parallel sweeps require shared memory: "
+            "using sequential sweep.")
+        workers = 0
+
+    with tempfile.TemporaryDirectory() as dirname:
+
+        def tasks(active, count):
+            return [(id, {**kwds, **results[id]['config']}, count, metric,
+                os.path.join(dirname, 'trial-%i.npz' % id)) for id in active]
+
+        if workers and workers > 1:
+            share = rian.dataset.share(model.dataset)
+            executor = concurrent.futures.ProcessPoolExecutor(workers,
+                initializer = _worker_init,
+                initargs = (_get_spec(model, share.handle), ))
+            run = executor.map
+        else:
+            share = None
+            executor = None
+            _worker_init(_get_spec(model))
+            run = map
+
+        try:
+            active = list(range(len(results)))
+            for rung in range(rungs):
+                count = max(1, round(updates * eta ** (rung - rungs + 1)))
+                for id, score in run(_worker_trial, tasks(active, count)):
+                    results[id].update(
+                        score = score, updates = count, rung = rung)
+                active = sorted(active, key = lambda id: rank(results[id]))
+                active = active[:max(1, len(active) // eta)]
+        finally:
+            if executor: executor.shutdown()
+            if share: share.close()
+            _worker.clear()
+
+    return sorted(results, key = rank)
+
+def _get_configs(space, method, trials, seed):
+    """Get configurations of trials from search space."""
+
+    keys = list(space.keys())
+
+    if method == 'grid':
+        for key, values in space.items():
+            if not isinstance(values, list):
+                raise ValueError(
+                    f"grid search requires a list of values for '{key}'")
+        return [dict(zip(keys, values)) for values \
+            in itertools.product(*[space[key] for key in keys])]
+
+    if method != 'random':
+        raise ValueError(f"search method '{method}' is not supported")
+
+    rng = numpy.random.default_rng(seed)
+
+    def sample(values):
+        if isinstance(values, list):
+            return values[rng.integers(len(values))]
+        if isinstance(values, tuple) and len(values) == 3 \
+            and values[2] == 'log':
+            return float(numpy.exp(rng.uniform(
+                numpy.log(values[0]), numpy.log(values[1]))))
+        if isinstance(values, tuple) and len(values) == 2:
+            if all(isinstance(value, int) for value in values):
+                return int(rng.integers(values[0], values[1] + 1))
+            return float(rng.uniform(values[0], values[1]))
+        raise ValueError(f"invalid search space '{values}'")
+
+    return [{key: sample(space[key]) for key in keys} \
+        for id in range(trials)]
+
+def _get_spec(model, handle = None):
+    """Get specification of model, which is restored in the workers.
+
+    If a handle of the dataset in shared memory is given, the workers attach
+    the dataset tables. Otherwise the tables are referenced.
+
+    """
+
+    return {
+        'config': model.get('config'),
+        'dataset': handle or model.dataset.get('snapshot'),
+        'shared': handle is not None,
+        'network': model.network.get('copy'),
+        'system': model.system.get('copy') }
+
+#
+# Workers
+#
+
+_worker = {}
+
+def _worker_init(spec):
+    """Restore model from specification."""
+
+    if spec['shared']:
+        dataset = rian.dataset.attach(spec['dataset'])
+    else:
+        snapshot = spec['dataset']
+        dataset = rian.dataset.new(config = snapshot['config'])
+        dataset.set('snapshot', **snapshot)
+
+    _worker['model'] = rian.model.new(config = spec['config'],
+        dataset = dataset, network = spec['network'], system = spec['system'])
+    _worker['params'] = spec['system']['params']
+
+def _worker_trial(task):
+    """Optimize and score trial.
+
+    The trial is continued from its checkpoint, if the checkpoint exists,
+    and otherwise started from the initial system parameters.
+
+    """
+
+    id, config, updates, metric, path = task
+    model = _worker['model']
+    model.system.set('copy', params = copy.deepcopy(_worker['params']))
+
+    optimizer = rian.model.morphisms.new(model)
+    optimizer.optimize(updates = updates, checkpoint_path = path,
+        checkpoint_resume = True, key_events_enable = False, **config)
+
+    score = optimizer.evaluation.evaluate(metric)
+
+    return id, float(score)
@@ -27,6 +27,7 @@ __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 import importlib
 from typing import Any, Dict
 import networkx
+import numpy
 from hup.base import otree
 import rian
 from rian.core import log
@@ -94,6 +95,7 @@ class Network(nbase.ObjectIP):
 
     _config  = None
     _graph   = None
+    _index   = None
 
 
     def __init__(self, *args: Any, **kwds: Any) -> None:
@@ -133,20 +135,6 @@ class Network(nbase.ObjectIP):
         if not edgelist:
             edgelist = {'layer': (None, None), 'list': []}
 
-        # find new nodes to add and old nodes to delete
-        if nodelist['layer'] in self._config['layer']:
-
-            # count number of new nodes to add to graph
-            add_nodes = 0
-            for node in nodelist['list']:
-                if node not in self._config['nodes'][nodelist['layer']]:
-                    add_nodes += 1
-
-            # count number of nodes to delete from graph
-            del_nodes = 0
-            for node in self._config['nodes'][nodelist['layer']]:
-                if node not in nodelist['list']: del_nodes += 1
-
         # add edges from edgelist
         layers = self._config['layer']
         src_layer_name = edgelist['layer'][0]
@@ -165,12 +153,11 @@ class Network(nbase.ObjectIP):
             src_layer = layers[i]
             tgt_layer = layers[i + 1]
             edge_layer = (src_layer, tgt_layer)
-            edges_filtered = []
-            for src_node, tgt_node in edges[edge_layer]:
-                if not (src_node in nodes[src_layer] \
-                    and tgt_node in nodes[tgt_layer]): continue
-                edges_filtered.append((src_node, tgt_node))
-            edges[edge_layer] = edges_filtered
+            src_nodes = set(nodes[src_layer])
+            tgt_nodes = set(nodes[tgt_layer])
+            edges[edge_layer] = [(src_node, tgt_node)
+                for src_node, tgt_node in edges[edge_layer]
+                if src_node in src_nodes and tgt_node in tgt_nodes]
 
         # clear or create new instance of networkx directed graph
         if self._graph is None: self._graph = networkx.DiGraph()
@@ -184,57 +171,92 @@ class Network(nbase.ObjectIP):
             'module': self._graph.__module__,
             'class': self._graph.__class__.__name__ }
 
+        # get node names
+        encapsulate = self._config.get('labelencapsulate', True) != False
+        names = {layer: {node: layer + ':' + node if encapsulate else node
+            for node in nodes[layer]} for layer in layers}
+
         # add nodes to graph
-        order = 0
+        node_list = []
+        node_names = set()
         for layerid, layer in enumerate(layers):
+            layer_params = self._config['layers'][layer]
             for layersubid, node in enumerate(nodes[layer]):
-                if 'labelencapsulate' in self._config \
-                    and self._config['labelencapsulate'] == False:
-                    node_name = node
-                else:
-                    node_name = layer + ':' + node
+                node_name = names[layer][node]
 
                 # if node is already known, do not add node
-                if node_name in self._graph.nodes(): continue
+                if node_name in node_names: continue
+                node_names.add(node_name)
 
                 # create dictionary with node parameters
-                node_params = self._config['layers'][layer].copy()
-                node_params['label'] = node
-                node_params['layer'] = layer
-                node_params['order'] = order
-                node_params['layer_id'] = layerid
-                node_params['layer_sub_id'] = layersubid
-
-                self._graph.add_node(node_name,
-                    label = node_name, params = node_params )
-
-                order += 1
+                node_params = {
+                    **layer_params,
+                    'label': node,
+                    'layer': layer,
+                    'order': len(node_list),
+                    'layer_id': layerid,
+                    'layer_sub_id': layersubid }
+
+                node_list.append((node_name,
+                    {'label': node_name, 'params': node_params}))
+        self._graph.add_nodes_from(node_list)
 
         # add edges to graph
-        edge_order = 0
+        edge_list = []
         for layer_id in range(len(layers) - 1):
             src_layer = layers[layer_id]
             tgt_layer = layers[layer_id + 1]
             edge_layer = (src_layer, tgt_layer)
+            src_names = names[src_layer]
+            tgt_names = names[tgt_layer]
+
+            edge_list += [(src_names[src_node], tgt_names[tgt_node], {
+                'weight': 0.,
+                'params': {
+                    'order': order,
+                    'layer': edge_layer,
+                    'layer_id': layer_id }})
+                for order, (src_node, tgt_node) in enumerate(
+                    edges[edge_layer], len(edge_list))]
+        self._graph.add_edges_from(edge_list)
+
+        return self._update_index(
+            nodes = [node for node, attr in node_list],
+            edges = [(src, tgt) for src, tgt, attr in edge_list])
+
+    def _update_index(self, nodes = None, edges = None):
+        """Update secondary index of nodes and edges.
+
+        The index contains the nodes and edges of the graph, sorted by
+        their parameter 'order', and mappings from the values of node
+        and edge parameters to the respective nodes and edges, which are
+        created on demand. The index is required to be updated, whenever
+        the graph or the parameters of its nodes and edges are modified.
+
+        Args:
+            nodes (list or None, optional): nodes of the graph, sorted
+                by their order. By default the nodes are sorted.
+            edges (list or None, optional): edges of the graph, sorted
+                by their order. By default the edges are sorted.
+
+        Returns:
+            bool: True if no error occured, else False
+
+        """
+
+        order = lambda item: item[-1]['params']['order']
+        if nodes is None or len(nodes) != self._graph.number_of_nodes():
+            nodes = [node for node, attr in sorted(
+                self._graph.nodes(data = True), key = order)]
+        if edges is None or len(edges) != self._graph.number_of_edges():
+            edges = [(src, tgt) for src, tgt, attr in sorted(
+                self._graph.edges(data = True), key = order)]
 
-            for (src_node, tgt_node) in edges[edge_layer]:
-                if 'labelencapsulate' not in self._config \
-                    or self._config['labelencapsulate'] == True:
-                    src_node_name = src_layer + ':' + src_node
-                    tgt_node_name = tgt_layer + ':' + tgt_node
-                else:
-                    src_node_name = src_node
-                    tgt_node_name = tgt_node
-
-                self._graph.add_edge(
-                    src_node_name, tgt_node_name,
-                    weight = 0.,
-                    params = {
-                        'order': edge_order,
-                        'layer': edge_layer,
-                        'layer_id': layer_id })
-
-                edge_order += 1
+        self._index = {
+            'nodes': [node for node in nodes if node],
+            'edges': edges,
+            'nodes_params': {},
+            'edges_params': {} }
 
         return True
 
@@ -370,6 +392,7 @@ class Network(nbase.ObjectIP):
         if key == 'edges': return self._get_edges(*args, **kwds)
         if key == 'layer': return self._get_layer(*args, **kwds)
         if key == 'layers': return self._get_layers(*args, **kwds)
+        if key == 'arrays': return self._get_arrays(*args, **kwds)
 
         # direct access
         if key == 'copy': return self._get_copy(*args, **kwds)
@@ -422,40 +445,10 @@ class Network(nbase.ObjectIP):
 
         """
 
-        # filter nodes to given attributes
-        nodes_sort_list = [None] * self._graph.number_of_nodes()
-        for node, attr in self._graph.nodes(data = True):
-            if not kwds == {}:
-                passed = True
-                for key in kwds:
-                    if key not in attr['params'] \
-                        or not kwds[key] == attr['params'][key]:
-                        passed = False
-                        break
-                if not passed: continue
-            nodes_sort_list[attr['params']['order']] = node
-        nodes = [node for node in nodes_sort_list if node]
+        nodes = self._get_index_filter('nodes', kwds)
         if groupby is None: return nodes
 
-        # group nodes by given attribute
-        grouping_values = []
-        for node in nodes:
-            node_params = self._graph.node[node]['params']
-            if groupby not in node_params:
-                raise ValueError("""could not get nodes:
-                    unknown node attribute '%s'.""" % (groupby))
-            grouping_value = node_params[groupby]
-            if grouping_value not in grouping_values:
-                grouping_values.append(grouping_value)
-        grouped_nodes = []
-        for grouping_value in grouping_values:
-            group = []
-            for node in nodes:
-                if self._graph.node[node]['params'][groupby] \
-                    == grouping_value:
-                    group.append(node)
-            grouped_nodes.append(group)
-        return grouped_nodes
+        return self._get_index_groups('nodes', nodes, groupby)
 
     def _get_edge(self, edge):
         if edge not in self._graph.edges:
@@ -489,40 +482,10 @@ class Network(nbase.ObjectIP):
 
         """
 
-        # filter efges to given attributes
-        edge_sort_list = [None] * self._graph.number_of_edges()
-        for src, tgt, attr in self._graph.edges(data = True):
-            if not kwds == {}:
-                passed = True
-                for key in kwds:
-                    if key not in attr['params'] \
-                        or not kwds[key] == attr['params'][key]:
-                        passed = False
-                        break
-                if not passed: continue
-            edge_sort_list[attr['params']['order']] = (src, tgt)
-        edges = [edge for edge in edge_sort_list if edge]
+        edges = self._get_index_filter('edges', kwds)
         if groupby is None: return edges
 
-        # group edges by given attribute
-        grouping_values = []
-        for edge in edges:
-            edge_params = self._graph.edges[edge]['params']
-            if groupby not in edge_params:
-                raise ValueError("""could not get edges:
-                    unknown edge attribute '%s'.""" % (groupby))
-            grouping_value = edge_params[groupby]
-            if not grouping_value in grouping_values:
-                grouping_values.append(grouping_value)
-        grouped_edges = []
-        for grouping_value in grouping_values:
-            group = []
-            for edge in edges:
-                if self._graph.edges[edge]['params'][groupby] \
-                    == grouping_value:
-                    group.append(edge)
-            grouped_edges.append(group)
-        return grouped_edges
+        return self._get_index_groups('edges', edges, groupby)
 
     def _get_layer(self, layer):
         """Return dictionary containing information about a layer."""
@@ -549,30 +512,152 @@ class Network(nbase.ObjectIP):
 
         """
 
-        graph = self._graph
-
-        # get ordered list of nodes
-        nodes_sort_list = [None] * graph.number_of_nodes()
-        for node, attr in graph.nodes(data = True):
-            if not kwds == {}:
-                passed = True
-                for key in kwds:
-                    if key not in attr['params'] \
-                        or kwds[key] != attr['params'][key]:
-                        passed = False
-                        break
-                if not passed: continue
-            nodes_sort_list[attr['params']['order']] = node
-        nodes = [node for node in nodes_sort_list if node]
-
-        # get ordered list of layers
-        layers = []
-        for node in nodes:
-            layer = graph.node[node]['params']['layer']
-            if layer in layers: continue
-            layers.append(layer)
-
-        return layers
+        if not kwds:
+            return list(self._get_index_params('nodes', 'layer').keys())
+
+        # get ordered list of layers from ordered list of nodes
+        layers = {}
+        for node in self._get_index_filter('nodes', kwds):
+            layers[self._graph.nodes[node]['params']['layer']] = True
+
+        return list(layers.keys())
+
+    def _get_arrays(self):
+        """Get integer indexed representation of the graph.
+
+        The integer indexed representation provides the structure of the
+        graph by numpy arrays, for applications, that do not require the
+        features of NetworkX. The arrays are cached by the secondary index
+        and therefore are not to be modified.
+
+        Returns:
+            Dictionary with the following items:
+            'nodes': list of node names, sorted by the node order
+            'layer_id': numpy array with the layer ids of the nodes
+            'source': numpy array with the node ids of the edge sources
+            'target': numpy array with the node ids of the edge targets
+            'edge_layer_id': numpy array with the layer ids of the edges
+
+        """
+
+        index = self._get_index()
+        if 'arrays' in index: return index['arrays']
+
+        nodes = index['nodes']
+        edges = index['edges']
+        nodeids = {node: nid for nid, node in enumerate(nodes)}
+        nattr = self._graph.nodes
+        eattr = self._graph.edges
+
+        index['arrays'] = {
+            'nodes': list(nodes),
+            'layer_id': numpy.fromiter(
+                (nattr[node]['params']['layer_id'] for node in nodes),
+                dtype = int, count = len(nodes)),
+            'source': numpy.fromiter((nodeids[src] for src, tgt in edges),
+                dtype = int, count = len(edges)),
+            'target': numpy.fromiter((nodeids[tgt] for src, tgt in edges),
+                dtype = int, count = len(edges)),
+            'edge_layer_id': numpy.fromiter(
+                (eattr[edge]['params']['layer_id'] for edge in edges),
+                dtype = int, count = len(edges)) }
+
+        return index['arrays']
+
+    def _get_index(self):
+        """Get secondary index of nodes and edges."""
+        if self._index is None: self._update_index()
+        return self._index
+
+    def _get_index_params(self, kind, key):
+        """Get mapping from values of a parameter to nodes or edges.
+
+        Args:
+            kind (str): 'nodes' or 'edges'
+            key (str): name of node or edge parameter
+
+        Returns:
+            Dictionary with the values of the parameter as keys and lists
+            of the nodes or edges, that have the respective value, as
+            values, or None if the values of the parameter are not
+            hashable.
+
+        """
+
+        index = self._get_index()
+        cache = index[kind + '_params']
+        if key in cache: return cache[key]
+
+        attr = self._graph.nodes if kind == 'nodes' else self._graph.edges
+        groups = {}
+        try:
+            for item in index[kind]:
+                params = attr[item]['params']
+                if key not in params: continue
+                groups.setdefault(params[key], []).append(item)
+        except TypeError:
+            groups = None
+        cache[key] = groups
+
+        return groups
+
+    def _get_index_filter(self, kind, params):
+        """Get ordered list of nodes or edges, that match given parameters."""
+
+        items = self._get_index()[kind]
+        attr = self._graph.nodes if kind == 'nodes' else self._graph.edges
+        for key, val in params.items():
+            groups = self._get_index_params(kind, key)
+            try:
+                found = None if groups is None else groups.get(val, [])
+            except TypeError:
+                found = None
+
+            # filter by parameter values, if they are not hashable
+            if found is None:
+                items = [item for item in items
+                    if key in attr[item]['params']
+                    and attr[item]['params'][key] == val]
+                continue
+
+            if items is self._index[kind]:
+                items = found
+            else:
+                found = set(found)
+                items = [item for item in items if item in found]
+
+        return list(items)
+
+    def _get_index_groups(self, kind, items, key):
+        """Group ordered list of nodes or edges by parameter values."""
+
+        attr = self._graph.nodes if kind == 'nodes' else self._graph.edges
+        for item in items:
+            if key in attr[item]['params']: continue
+            raise ValueError("""could not get %s:
+                unknown %s attribute '%s'.""" % (kind, kind[:-1], key))
+
+        try:
+            groups = {}
+            for item in items:
+                value = attr[item]['params'][key]
+                groups.setdefault(value, []).append(item)
+            return list(groups.values())
+        except TypeError:
+            pass
+
+        # group by parameter values, if they are not hashable
+        values = []
+        groups = []
+        for item in items:
+            value = attr[item]['params'][key]
+            if value in values:
+                groups[values.index(value)].append(item)
+                continue
+            values.append(value)
+            groups.append([item])
+
+        return groups
 
     def _get_graph(self, type = 'dict'):
         """Get graph as dictionary or networkx graph."""
@@ -583,7 +668,7 @@ class Network(nbase.ObjectIP):
         if type == 'dict':
             return {
                 'graph': graph.graph,
-                'nodes': graph.nodes(data = True),
+                'nodes': list(graph.nodes(data = True)),
                 'edges': networkx.to_dict_of_dicts(graph) }
 
         return None
@@ -666,7 +751,7 @@ class Network(nbase.ObjectIP):
         for node, attr in graph_copy['nodes']:
             self._graph.node[node].update(attr)
 
-        return True
+        return self._update_index()
 
     def evaluate(self, name = None, *args, **kwds):
         """Evaluate network."""
@@ -693,7 +778,7 @@ class Network(nbase.ObjectIP):
             edge_dict['params'] = {**edge_dict['params'], **params}
             edge_dict['weight'] = float(params['weight'])
 
-        return True
+        return self._update_index()
 
     def save(self, *args, **kwds):
         """Export network to file."""
@@ -25,6 +25,7 @@ __author__ = 'Frootlab Developers'
 __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
+import matplotlib.collections
 import matplotlib.patches
 import networkx as nx
 import numpy as np
@@ -52,8 +53,16 @@ class Graph2D(Plot):
         'graph_layout': 'layer',
         'graph_direction': 'right',
         'node_style': 'o',
+        'edge_attribute': 'weight',
         'edge_width_enabled': True,
-        'edge_curvature': 1.0
+        'edge_curvature': 1.0,
+        'lod_enabled': None,
+        'lod_edge_limit': 2000,
+        'lod_edge_threshold': 0.,
+        'lod_edge_bins': 0,
+        'lod_edge_points': 9,
+        'lod_layer_size': 100,
+        'lod_label_limit': 100
     }
 
     def plot(self, G: DiGraph) -> None:
@@ -86,6 +95,25 @@ class Graph2D(Plot):
             edge_style (string):  '-', '<-', '<->', '->',
                 '<|-', '<|-|>', '-|>', '|-', '|-|', '-|',
                 ']-', ']-[', '-[', 'fancy', 'simple', 'wedge'
+            lod_enabled (bool): flag for the level-of-detail rendering of
+                large graphs. If None, the rendering is used, if the graph
+                has more than 'lod_edge_limit' edges.
+                default: None
+            lod_edge_threshold (float): minimal absolute value of the edge
+                attribute, for edges to be drawn in level-of-detail
+                rendering.
+                default: 0.
+            lod_edge_bins (int): number of bins for the absolute values of
+                the edge attribute, that determine the edge widths in
+                level-of-detail rendering. If 0, the values are not binned.
+                default: 0
+            lod_layer_size (int): number of nodes of a layer, above which
+                the layer is drawn as an aggregated node in level-of-detail
+                rendering.
+                default: 100
+            lod_label_limit (int): maximum number of nodes, for which labels
+                are drawn in level-of-detail rendering.
+                default: 100
 
         Returns:
             Boolen value which is True if no error occured.
@@ -106,11 +134,19 @@ class Graph2D(Plot):
         layout_params = mapping.crop(self._config, 'graph_')
         del layout_params['layout']
 
-        pos = graph.get_layout(
-            G, layout=self._config['graph_layout'], size=figsize,
+        pos = self.get_layout(
+            G, layout=self._config['graph_layout'], size=tuple(figsize),
             padding=self._config['padding'], **layout_params)
 
         sizes = self.get_layout_normsize(pos)
+
+        # (optional) use level-of-detail rendering for large graphs
+        lod = self._config['lod_enabled']
+        if lod is None:
+            lod = G.number_of_edges() > self._config['lod_edge_limit']
+        if lod:
+            return self._plot_lod(G, pos, sizes)
+
         node_size = sizes.get('node_size', None)
         node_radius = sizes.get('node_radius', None)
         line_width = sizes.get('line_width', None)
@@ -169,8 +205,9 @@ class Graph2D(Plot):
             default_edge_style = '-|>'
         else: default_edge_style = '-'
 
+        attribute = self._config['edge_attribute']
         for (u, v, data) in G.edges(data=True):
-            weight = data['weight']
+            weight = data.get(attribute)
             if weight == 0.:
                 continue
 
@@ -187,6 +224,7 @@ class Graph2D(Plot):
                     gdir = self._config['graph_direction']
                     if gdir in ['left', 'right']:
                         rad *= -1
+                rad *= self._config['edge_curvature']
             seen[(u, v)] = rad
 
             # determine style of edge from edge weight
@@ -218,22 +256,223 @@ class Graph2D(Plot):
 
         # (optional) draw legend
         if self._config['show_legend']:
-            num_groups = np.sum([1 for g in list(groups.values()) \
-                if isinstance(g, list) and g])
-            markerscale = 0.6 * self._config['legend_fontsize'] / font_size
-            ax.legend(
-                numpoints=1,
-                loc='lower center',
-                ncol=num_groups,
-                borderaxespad=0.,
-                framealpha=0.,
-                bbox_to_anchor=(0.5, -0.1),
-                fontsize=self._config['legend_fontsize'],
-                markerscale=markerscale)
+            self.plot_legend(groups, font_size)
 
         # (optional) plot title
         self.plot_title()
 
+    def _plot_lod(self, G: DiGraph, pos: dict, sizes: dict) -> None:
+        """Plot graph with level-of-detail rendering.
+
+        In contrast to :meth:`plot`, the edges are thresholded by the absolute
+        value of the edge attribute and drawn by a single line collection,
+        node groups with more than 'lod_layer_size' nodes are drawn as
+        aggregated nodes and node labels are only drawn for at most
+        'lod_label_limit' nodes.
+
+        Args:
+            G: networkx graph instance
+            pos: dictionary with node positions
+            sizes: dictionary with normal sizes of the node positions
+
+        """
+        ax = self._axes
+        node_size = sizes.get('node_size', None)
+        node_radius = sizes.get('node_radius', None)
+        line_width = sizes.get('line_width', None)
+        edge_width = sizes.get('edge_width', None)
+        font_size = sizes.get('font_size', None)
+
+        # get nodes and groups sorted by node attribute group_id
+        groups = graph.get_groups(G, attribute='group')
+        sorted_groups = sorted(
+            list(groups.keys()),
+            key=lambda g: 0 if not isinstance(g, list) or not g \
+            else G.nodes[g[0]].get('group_id', 0))
+
+        # draw nodes of small groups and aggregated nodes of large groups
+        labeled = []
+        for group in sorted_groups:
+            gnodes = groups.get(group, [])
+            if not gnodes:
+                continue
+            refnode = G.nodes[gnodes[0]]
+            label = refnode.get('description') or refnode.get('group') \
+                or str(group)
+            color = self.get_color(refnode.get('color'), 'white')
+            border_color = self.get_color(
+                refnode.get('border_color'), 'black')
+
+            if len(gnodes) <= self._config['lod_layer_size']:
+                node_obj = nx.draw_networkx_nodes(
+                    G, pos, nodelist=gnodes, linewidths=line_width,
+                    node_size=node_size,
+                    node_shape=self._config['node_style'],
+                    node_color=[color], label=label)
+                node_obj.set_edgecolor(border_color)
+                labeled += gnodes
+                continue
+
+            # draw aggregated node as box around the node positions
+            xy = np.array([pos[node] for node in gnodes])
+            lower = xy.min(axis=0) - node_radius
+            upper = xy.max(axis=0) + node_radius
+            box = matplotlib.patches.FancyBboxPatch(
+                lower, *(upper - lower),
+                boxstyle='round,pad=0.,rounding_size=%s' % node_radius,
+                linewidth=line_width, facecolor=color,
+                edgecolor=border_color, zorder=2, label=label)
+            ax.add_patch(box)
+            ax.text(
+                *((lower + upper) / 2.), self.get_texlabel(str(label)),
+                fontsize=font_size, family='sans-serif',
+                color=self.get_color(refnode.get('font_color'), 'black'),
+                horizontalalignment='center', verticalalignment='center',
+                zorder=3)
+
+        # draw node labels
+        if len(labeled) <= self._config['lod_label_limit']:
+            for node in labeled:
+                data = G.nodes[node]
+                node_label = data.get('label', str(node).title())
+                node_label_format = self.get_texlabel(node_label)
+                node_label_size = np.sqrt(
+                    self.get_texlabel_width(node_label))
+                font_color = self.get_color(data.get('font_color'), 'black')
+                nx.draw_networkx_labels(
+                    G, pos, labels={node: node_label_format},
+                    font_size=font_size / node_label_size,
+                    font_color=font_color, font_family='sans-serif',
+                    font_weight='normal')
+
+        # draw edges
+        segments, widths, colors = self.get_lod_edges(G, pos, edge_width)
+        if len(segments):
+            ax.add_collection(matplotlib.collections.LineCollection(
+                segments, linewidths=widths, colors=colors,
+                capstyle='round', zorder=1))
+
+        # (optional) draw legend
+        if self._config['show_legend']:
+            self.plot_legend(groups, font_size)
+
+        # (optional) plot title
+        self.plot_title()
+
+    def get_lod_edges(self, G: DiGraph, pos: dict, edge_width: float) -> tuple:
+        """Get line segments, widths and colors of edges.
+
+        Args:
+            G: networkx graph instance
+            pos: dictionary with node positions
+            edge_width: normal edge width of the node positions
+
+        Returns:
+            Tuple of a numpy array of shape (edges, points, 2), that contains
+            the line segments of the edges, a numpy array with the line widths
+            and a numpy array with RGBA colors of the edges. The edges are
+            sorted by the absolute value of the edge attribute, such that
+            strong edges are drawn on top.
+
+        """
+        attribute = self._config['edge_attribute']
+        edges = list(G.edges(data=True))
+        if not edges:
+            return np.empty((0, 2, 2)), np.empty(0), np.empty((0, 4))
+
+        # get absolute values of edge attribute, where None is given by NaN
+        values = np.array([
+            np.nan if data.get(attribute) is None else data.get(attribute)
+            for (u, v, data) in edges], dtype=float)
+        absval = np.absolute(values)
+        missing = np.isnan(values)
+
+        # threshold edges by absolute value and sort them by absolute value
+        threshold = self._config['lod_edge_threshold']
+        keep = missing | ((absval > 0.) & (absval >= threshold))
+        order = np.flatnonzero(keep)
+        order = order[np.argsort(np.where(
+            missing[order], 0., absval[order]), kind='stable')]
+        absval, missing = absval[order], missing[order]
+
+        # (optional) bin absolute values
+        bins = self._config['lod_edge_bins']
+        if bins and np.any(~missing):
+            known = absval[~missing]
+            bounds = np.linspace(known.min(), known.max(), bins + 1)
+            index = np.clip(np.digitize(known, bounds) - 1, 0, bins - 1)
+            absval[~missing] = (bounds[index] + bounds[index + 1]) / 2.
+
+        # determine line widths and transparency from absolute values
+        alpha = np.where(missing, .5, np.minimum(absval, 1.))
+        if self._config['edge_width_enabled']:
+            widths = np.where(missing, .5 * edge_width, absval * edge_width)
+        else:
+            widths = np.where(missing, .5 * edge_width, edge_width)
+
+        # determine colors, given by edge attribute 'color'
+        rgb: dict = {}
+        colors = np.empty((len(order), 4))
+        for i, eid in enumerate(order):
+            cname = edges[eid][2].get('color', 'black')
+            if cname not in rgb:
+                rgb[cname] = self.get_color(cname) or (0., 0., 0.)
+            colors[i, :3] = rgb[cname]
+        colors[:, 3] = alpha
+
+        # get positions of source and target nodes
+        nodes = list(pos.keys())
+        nid = {node: i for i, node in enumerate(nodes)}
+        xy = np.array([pos[node] for node in nodes], dtype=float)
+        src = xy[[nid[edges[eid][0]] for eid in order]]
+        tgt = xy[[nid[edges[eid][1]] for eid in order]]
+
+        # calculate edge curvature from node positions, like in plot()
+        figsize = self._fig.get_size_inches() * self._fig.dpi
+        vec = (tgt - src) / np.amax(figsize)
+        norm = np.sqrt(2. * np.sum(vec ** 2, axis=1))
+        rad = np.divide(vec[:, 0] * vec[:, 1], norm,
+            out=np.zeros(len(norm)), where=norm > 0.)
+        if self._config['graph_layout'] == 'layer' \
+            and self._config['graph_direction'] in ['left', 'right']:
+            rad *= -1
+        rad *= self._config['edge_curvature']
+
+        # sample quadratic bezier curves with the control points of the
+        # connection style 'arc3'
+        if not np.any(rad):
+            return np.stack([src, tgt], axis=1), widths, colors
+        diff = tgt - src
+        ctrl = (src + tgt) / 2. + rad[:, None] * np.stack(
+            [diff[:, 1], -diff[:, 0]], axis=1)
+        t = np.linspace(0., 1., max(self._config['lod_edge_points'], 2))
+        t = t[None, :, None]
+        segments = (1. - t) ** 2 * src[:, None] \
+            + 2. * (1. - t) * t * ctrl[:, None] + t ** 2 * tgt[:, None]
+
+        return segments, widths, colors
+
+    def plot_legend(self, groups: dict, font_size: float) -> None:
+        """Plot legend of node groups.
+
+        Args:
+            groups: dictionary with grouped lists of nodes
+            font_size: normal font size of the node positions
+
+        """
+        num_groups = np.sum([1 for g in list(groups.values()) \
+            if isinstance(g, list) and g])
+        markerscale = 0.6 * self._config['legend_fontsize'] / font_size
+        self._axes.legend(
+            numpoints=1,
+            loc='lower center',
+            ncol=num_groups,
+            borderaxespad=0.,
+            framealpha=0.,
+            bbox_to_anchor=(0.5, -0.1),
+            fontsize=self._config['legend_fontsize'],
+            markerscale=markerscale)
+
     @classmethod
     def get_node_layout(cls, ntype: str) -> dict:
         """Get plot layout for node type.
@@ -310,22 +549,28 @@ class Graph2D(Plot):
             float containing a normalized scaling factor
 
         """
-        # calculate euclidean distances between node positions
-        norm = lambda x: np.sqrt(np.sum(x ** 2))
-        dist = lambda u, v: norm(np.array(pos[u]) - np.array(pos[v]))
-        dl = []
-        for i, u in enumerate(pos.keys()):
-            for j, v in enumerate(list(pos.keys())[i + 1:], i + 1):
-                dl.append(dist(u, v))
-        da = np.array(dl)
+        # calculate minimal and average euclidean distances between node
+        # positions in chunks of rows, to bound the memory of large graphs
+        xy = np.array(list(pos.values()), dtype=float)
+        num = len(xy)
+        chunk = max(1, 2 ** 22 // max(num, 1))
+        dmin, dsum = np.inf, 0.
+        for i in range(0, num, chunk):
+            rows = xy[i:i + chunk]
+            dist = np.sqrt(np.sum((rows[:, None] - xy[None]) ** 2, axis=2))
+            upper = np.arange(num)[None] > np.arange(i, i + len(rows))[:, None]
+            if np.any(upper):
+                dmin = min(dmin, np.amin(dist[upper]))
+                dsum += np.sum(dist[upper])
+        dmean = dsum / (num * (num - 1) / 2)
 
         # calculate maximal scaling factor for non overlapping nodes
         # by minimal euklidean distance between node positions
-        smax = 2.32 * np.amin(da)
+        smax = 2.32 * dmin
 
         # calculate minimal scaling factor
         # by average euklidean distance between node positions
-        smin = 0.20 * np.mean(da)
+        smin = 0.20 * dmean
 
         # if some nodes are exceptional close
         # the overlapping of those nodes is not avoided
@@ -372,15 +617,35 @@ class Graph2D(Plot):
     @classmethod
     def get_layer_layout(
             cls, G: DiGraph, direction: str = 'right',
-            minimize: str = 'weight') -> dict:
+            minimize: str = 'weight', method: str = 'barycenter',
+            assignment: int = 0) -> dict:
         """Calculate node positions for layer layout.
 
+        The nodes within the layers are ordered to reduce the crossings of
+        edges, from the first to the last layer. Thereby the nodes of a layer
+        are ordered by the weighted barycenter or median of the positions of
+        their neighbours in the preceding layer.
+
         Args:
             G: networkx graph instance
-            direction:
-            minimize:
+            direction: string within the list ['up', 'down', 'left',
+                'right'], that determines the direction of the layers.
+                Default: 'right'
+            minimize: name of edge attribute, that determines the strength
+                of the attraction of connected nodes by its absolute
+                value. If None, the nodes are not reordered.
+                Default: 'weight'
+            method: name of the method, that orders the nodes within the
+                layers. Accepted values are 'barycenter' and 'median'.
+                Default: 'barycenter'
+            assignment: maximum number of nodes within a layer, which
+                are ordered by an optimal assignment of nodes to positions,
+                that minimizes the weighted distances to the neighbours.
+                The assignment requires scipy. Default: 0
 
         Return:
+            Dictionary with nodes as keys and node positions in the box
+            [0, 1] x [0, 1] as values.
 
         """
         def _orientate(p: FloatPair, d: str) -> FloatPair:
@@ -401,7 +666,7 @@ class Graph2D(Plot):
         if not G:
             return {}
         if len(G) == 1:
-            return {G.nodes()[0]: (.5, .5)}
+            return {list(G.nodes())[0]: (.5, .5)}
 
         # get list of node lists, sorted by layer (list of lists)
         stack = graph.get_layers(G)
@@ -409,48 +674,32 @@ class Graph2D(Plot):
         # sort node stack to minimize the euclidean distances
         # of connected nodes
         if isinstance(minimize, str):
-            edges = {(u, v): data for (u, v, data) in G.edges(data=True)}
+            layerid = {}
+            for lid, layer in enumerate(stack):
+                for nid, node in enumerate(layer):
+                    layerid[node] = (lid, nid)
+
+            # get absolute edge weights between successive layers
+            weights = [np.zeros((len(stack[lid - 1]), len(stack[lid])))
+                for lid in range(1, len(stack))]
+            for (u, v, data) in G.edges(data=True):
+                value = data.get(minimize)
+                if not isinstance(value, float):
+                    continue
+                (lu, nu), (lv, nv) = layerid[u], layerid[v]
+                if lv == lu + 1:
+                    weights[lu][nu, nv] += np.absolute(value)
+                elif lu == lv + 1:
+                    weights[lv][nv, nu] += np.absolute(value)
 
             for lid, tgt in enumerate(stack[1:], 1):
-                src = stack[lid - 1]
-                slen = len(src)
-                tlen = len(tgt)
-
-                # calculate cost matrix for positions by weights
-                cost = np.zeros((tlen, tlen))
-                for sid, u in enumerate(src):
-                    for tid, v in enumerate(tgt):
-                        data = edges.get((u, v))
-                        if data is None:
-                            data = edges.get((v, u))
-                        if not isinstance(data, dict):
-                            continue
-                        value = data.get(minimize)
-                        if not isinstance(value, float):
-                            continue
-                        weight = np.absolute(value)
-                        for pid in range(tlen):
-                            dist = np.absolute(
-                                (pid + .5) / (tlen + 1.) \
-                                - (sid + .5) / (slen + 1.))
-                            cost[pid, tid] += dist * weight
-
-                # choose (node, position) pair with maximum savings
-                # thereby penalize large distances by power two
-                # repeat until all nodes have positions
-                nsel = list(range(tlen)) # node select list
-                psel = list(range(tlen)) # position select list
-                sort = [None] * tlen
-                for i in range(tlen):
-                    cmax = np.amax(cost[psel][:, nsel], axis=0)
-                    cmin = np.amin(cost[psel][:, nsel], axis=0)
-                    diff = cmax ** 2 - cmin ** 2
-                    nid = nsel[np.argmax(diff)]
-                    pid = psel[np.argmin(cost[psel][:, nid])]
-                    sort[pid] = tgt[nid]
-                    nsel.remove(nid)
-                    psel.remove(pid)
-                stack[lid] = sort
+                order = cls._get_layer_order(
+                    weights[lid - 1], method=method, assignment=assignment)
+                stack[lid] = [tgt[nid] for nid in order]
+
+                # the rows of the succeeding weights follow the new order
+                if lid < len(weights):
+                    weights[lid] = weights[lid][order]
 
         # calculate node positions in box [0, 1] x [0, 1]
         pos = {}
@@ -462,6 +711,44 @@ class Graph2D(Plot):
 
         return pos
 
+    @classmethod
+    def _get_layer_order(
+            cls, weights: Any, method: str = 'barycenter',
+            assignment: int = 0) -> Any:
+        # Get order of the nodes in a layer from the weights of the edges
+        # to the ordered nodes of the preceding layer, given as a matrix
+        # with the source nodes as rows and the target nodes as columns
+        slen, tlen = weights.shape
+        spos = (np.arange(slen) + .5) / (slen + 1.)
+        tpos = (np.arange(tlen) + .5) / (tlen + 1.)
+        total = weights.sum(axis=0)
+        connected = total > 0.
+
+        # optimal assignment of nodes to positions
+        if 0 < tlen <= assignment:
+            try:
+                from scipy.optimize import linear_sum_assignment
+            except ImportError:
+                linear_sum_assignment = None
+            if linear_sum_assignment:
+                dist = np.absolute(tpos[:, None] - spos[None, :])
+                pids, nids = linear_sum_assignment(np.dot(dist, weights))
+                return nids[np.argsort(pids)]
+
+        # unconnected nodes keep their relative positions
+        key = tpos.copy()
+        if method == 'barycenter':
+            key[connected] = np.dot(spos, weights[:, connected]) \
+                / total[connected]
+        elif method == 'median':
+            cumsum = np.cumsum(weights[:, connected], axis=0)
+            median = np.argmax(cumsum >= .5 * total[connected], axis=0)
+            key[connected] = spos[median]
+        else:
+            raise ValueError(f"method '{method}' is not supported")
+
+        return np.argsort(key, kind='stable')
+
     @classmethod
     def rescale_layout(
             cls, pos: dict, size: OptTuple = None,
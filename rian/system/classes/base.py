@@ -24,13 +24,18 @@ __author__ = 'Frootlab Developers'
 __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
+import itertools
 import numpy
 from hup.base import catalog, otree
 import rian
-from rian.base import nbase
+from rian.base import array, nbase
 from rian.math import curve
 from hup.typing import Any, Dict
 
+# the versions of system parameters are drawn from a common counter, such that
+# versions of different system instances are distinct
+_params_versions = itertools.count(1)
+
 class System(nbase.ObjectIP):
     """Base class for systems.
 
@@ -89,6 +94,7 @@ class System(nbase.ObjectIP):
 
     _config = None
     _params = None
+    _params_version: int = 0
 
     def __init__(self, *args: Any, **kwds: Any) -> None:
         """Initialize system with content from arguments."""
@@ -118,8 +124,11 @@ class System(nbase.ObjectIP):
         if not otree.has_base(dataset, 'Dataset'):
             raise ValueError("dataset is not valid")
 
-        return self._set_params_init_units(dataset) \
+        retval = self._set_params_init_units(dataset) \
             and self._set_params_init_links(dataset)
+        self._set_params_version()
+
+        return retval
 
     def _check_network(self, network, *args, **kwds):
         """Check if network is valid for system."""
@@ -515,6 +524,18 @@ class System(nbase.ObjectIP):
         raise ValueError("""could not get parameters:
             unknown key '%s'.""" % key)
 
+    def _get_params_version(self):
+        """Get version counter of system parameters.
+
+        The version is renewed, whenever the system parameters are set,
+        initialized or updated by an optimizer. Since the versions are drawn
+        from a common counter, they also distinguish the parameters of
+        different system instances. The version is used to invalidate cached
+        evaluations of the system.
+
+        """
+        return self._params_version
+
     @catalog.objective(
         name     = 'error',
         category = ('system', 'evaluation'),
@@ -937,7 +958,8 @@ class System(nbase.ObjectIP):
         plot     = 'heatmap',
         formater = lambda val: '%.3f' % (val) )
 
-    def _get_correlation(self, data, mapping = None, **kwds):
+    def _get_correlation(self, data, mapping = None, chunksize = 0,
+        **kwds):
         """Data correlation between source and target units.
 
         Undirected data based relation describing the 'linearity'
@@ -948,6 +970,8 @@ class System(nbase.ObjectIP):
             mapping: tuple of strings containing the mapping
                 from input layer (first argument of tuple)
                 to output layer (last argument of tuple)
+            chunksize: number of samples, that are processed at once.
+                The default value 0 processes all samples at once.
 
         Returns:
             Numpy array of shape (source, target) containing pairwise
@@ -957,22 +981,11 @@ class System(nbase.ObjectIP):
 
         # 2do: allow correlation between hidden units
 
-        # calculate symmetric correlation matrix
-        C = numpy.corrcoef(numpy.hstack(data).T)
+        # calculate asymmetric correlation matrix between the columns of
+        # the input data (source units) and the output data (target units)
+        from rian.math import matrix
 
-        # create asymmetric output matrix
-        mapping = self._get_mapping()
-        src = self._get_units(layer = mapping[0])
-        tgt = self._get_units(layer = mapping[-1])
-        units = src + tgt
-        R = numpy.zeros(shape = (len(src), len(tgt)))
-        for i, u in enumerate(src):
-            k = units.index(u)
-            for j, v in enumerate(tgt):
-                l = units.index(v)
-                R[i, j] = C[k, l]
-
-        return R
+        return matrix.corrcoef(data[0], data[1], chunksize = chunksize)
 
     @catalog.custom(
         name     = 'weightsumproduct',
@@ -1262,6 +1275,8 @@ class System(nbase.ObjectIP):
         if key == 'copy': return self._set_copy(*args, **kwds)
         if key == 'config': return self._set_config(*args, **kwds)
         if key == 'params': return self._set_params(*args, **kwds)
+        if key == 'params_version':
+            return self._set_params_version(*args, **kwds)
 
         raise KeyError(f"unknown key '{key}'")
 
@@ -1405,22 +1420,38 @@ class System(nbase.ObjectIP):
                 links[link_layer] = {
                     'source': src, 'target': tgt,
                     'A': link_layer_adj.astype(float)}
-            for link in network.edges:
-                src, tgt = link
-                found = False
-                for lid in range(len(units) - 1):
-                    if src in units[lid]['id']:
-                        src_lid = lid
-                        src_sid = units[lid]['id'].index(src)
-                        tgt_lid = lid + 1
-                        tgt_sid = units[lid + 1]['id'].index(tgt)
-                        found = True
-                        break
-                if not found:
-                    continue
-                if (src_lid, tgt_lid) not in links:
-                    continue
-                links[(src_lid, tgt_lid)]['A'][src_sid, tgt_sid] = 1.0
+
+            # map nodes to unit layer ids and unit positions within layers
+            arrays = network.get('arrays')
+            nodeids = {node: i for i, node in enumerate(arrays['nodes'])}
+            node_lid = numpy.full(len(nodeids), -1, dtype = int)
+            node_sid = numpy.zeros(len(nodeids), dtype = int)
+            for lid, layer in enumerate(units):
+                ids = [nodeids[node] for node in layer['id']]
+                node_lid[ids] = lid
+                node_sid[ids] = numpy.arange(len(ids))
+
+            # set adjacency matrices from edges between successive layers.
+            # Edges from the last layer or from nodes, that are not units,
+            # are ignored, but the target of any other edge is required to
+            # be within the successive layer of the source
+            src_lid = node_lid[arrays['source']]
+            tgt_lid = node_lid[arrays['target']]
+            valid = (src_lid >= 0) & (src_lid < len(units) - 1)
+            invalid = valid & (tgt_lid != src_lid + 1)
+            if invalid.any():
+                eid = int(numpy.flatnonzero(invalid)[0])
+                raise ValueError(
+                    "could not set adjacency: target of edge ('%s', '%s') "
+                    "is not in the successive layer of its source" % (
+                    arrays['nodes'][arrays['source'][eid]],
+                    arrays['nodes'][arrays['target'][eid]]))
+            src_sid = node_sid[arrays['source']]
+            tgt_sid = node_sid[arrays['target']]
+            for lid in range(len(units) - 1):
+                select = valid & (src_lid == lid)
+                links[(lid, lid + 1)]['A'][
+                    src_sid[select], tgt_sid[select]] = 1.0
 
             self._params['units'] = units
             self._params['links'] = links
@@ -1441,8 +1472,15 @@ class System(nbase.ObjectIP):
             retval &= self._set_params_init_units(dataset)
             retval &= self._set_params_init_links(dataset)
 
+        self._set_params_version()
+
         return retval
 
+    def _set_params_version(self):
+        """Renew version of system parameters."""
+        self._params_version = next(_params_versions)
+        return True
+
     def _set_params_create_units(self):
         # create instances of unit classes
         # and link units params to local params dict
@@ -1761,6 +1799,37 @@ class System(nbase.ObjectIP):
         raise Warning("""could not evaluate system links:
             unknown return format '%s'.""" % (algorithm['retfmt']))
 
+    def _get_relation_stats(self, values, src, tgt):
+        """Get statistics of relation values between different units.
+
+        Relations of units to themselves, e.g. between the input and the
+        output of the same unit, are excluded from the statistics by a mask,
+        which is given by the unit names within the unit labels.
+
+        Args:
+            values: numpy array of shape (source, target) with relation
+                values
+            src: list of strings containing labels of source units
+            tgt: list of strings containing labels of target units
+
+        Returns:
+            Dictionary with keys 'max', 'min', 'mean' and 'std'.
+
+        """
+
+        # create mask of relations between different units
+        name = lambda label: label.split(':')[1] if ':' in label else label
+        sunits = numpy.array([name(label) for label in src], dtype=str)
+        tunits = numpy.array([name(label) for label in tgt], dtype=str)
+        mask = sunits[:, None] != tunits[None, :]
+
+        # calculate statistics of masked values, without NaN entries
+        filtered = values[mask & ~numpy.isnan(values)]
+
+        return {
+            'max': numpy.amax(filtered), 'min': numpy.amin(filtered),
+            'mean': numpy.mean(filtered), 'std': numpy.std(filtered) }
+
     def _evaluate_relation(self, data, func = 'correlation',
         evalstat = True, **kwds):
         """Evaluate relations between source and target units.
@@ -1850,29 +1919,17 @@ class System(nbase.ObjectIP):
 
             # create formated return values
             if retfmt == 'array':
-                retval = values
+                return values
             elif retfmt == 'dict':
-                from rian.math import matrix
                 src = self._get_units(layer=ekwds['mapping'][0])
                 tgt = self._get_units(layer=ekwds['mapping'][-1])
-                retval = matrix.as_dict(values, labels=(src, tgt))
-                if not evalstat:
-                    return retval
 
                 # (optional) add statistics
-                filtered = []
-                for src, tgt in retval:
-                    sunit = src.split(':')[1] if ':' in src else src
-                    tunit = tgt.split(':')[1] if ':' in tgt else tgt
-                    if sunit == tunit: continue
-                    filtered.append(retval[(src, tgt)])
-                array = numpy.array(filtered)
-                retval['max'] = numpy.amax(array)
-                retval['min'] = numpy.amin(array)
-                retval['mean'] = numpy.mean(array)
-                retval['std'] = numpy.std(array)
-
-                return retval
+                stats = self._get_relation_stats(values, src, tgt) \
+                    if evalstat else None
+
+                # create lazy dictionary view of relation matrix
+                return array.as_view(values, labels=(src, tgt), extra=stats)
 
             else: raise Warning(
                 'could not perform system unit relation evaluation')
@@ -24,9 +24,11 @@ __author__ = 'Frootlab Developers'
 __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
-import rian
-import numpy
+import json
 import os
+import zipfile
+import numpy
+import rian
 
 def filetypes():
     """Get supported archive filetypes for system export."""
@@ -45,10 +47,26 @@ def save(system, path, filetype, **kwds):
     return Npz(**kwds).save(copy, path)
 
 class Npz:
-    """Export system to numpy zipped archive."""
+    """Export system to numpy zipped archive.
+
+    The archive does not contain pickled objects: The numpy arrays of the
+    system, like the link weights 'W' and adjacencies 'A' and the unit
+    parameters 'bias' and 'lvar', are stored as individual NPY members and
+    the remaining configuration and structure of the parameters as JSON
+    member 'system.json'. Uncompressed archives allow to memory map the
+    arrays on import.
+
+    Settings:
+        compress (bool): Compress members of the archive. Default: True
+        dtype (str): If given, floating point arrays with a higher precision
+            are converted to the given data type, e.g. 'float32' to halve the
+            size of the archive. Default: None
+
+    """
 
     settings = None
-    default = { 'compress': True }
+    default = {'compress': True, 'dtype': None}
+    version = 1
 
     def __init__(self, **kwds):
         self.settings = {**self.default, **kwds}
@@ -59,9 +77,79 @@ class Npz:
         if not os.path.exists(os.path.dirname(path)):
             os.makedirs(os.path.dirname(path))
 
-        if self.settings['compress']:
-            numpy.savez_compressed(path, **copy)
-        else:
-            numpy.savez(path, **copy)
+        compression = zipfile.ZIP_DEFLATED if self.settings['compress'] \
+            else zipfile.ZIP_STORED
+        dtype = self.settings['dtype']
+        if dtype: dtype = numpy.dtype(dtype)
+
+        arrays = {}
+        meta = {'version': self.version,
+            'config': _encode(copy.get('config', {}), arrays, 'config'),
+            'params': _encode(copy.get('params', {}), arrays, 'params')}
+
+        # write to temporary file, which atomically replaces the archive
+        temp = path + '.tmp'
+        try:
+            with zipfile.ZipFile(temp, mode='w',
+                compression=compression, allowZip64=True) as file:
+                file.writestr('system.json', json.dumps(meta))
+                for name, array in arrays.items():
+                    if dtype and array.dtype.kind == 'f' \
+                        and array.dtype.itemsize > dtype.itemsize:
+                        array = array.astype(dtype)
+                    with file.open(name, mode='w', force_zip64=True) as npy:
+                        numpy.lib.format.write_array(npy, array,
+                            allow_pickle = False)
+            os.replace(temp, path)
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
 
         return path
+
+def _encode(obj, arrays, name):
+    """Encode system configuration or parameters as JSON object.
+
+    Numpy arrays are added to the dictionary 'arrays', with the name of the
+    NPY member as key, and replaced by references to the member. Tuples and
+    dictionaries with keys, that are not strings, are tagged, such that they
+    can be restored on import. The encoding is also used for the components
+    of model archives.
+
+    """
+
+    if isinstance(obj, numpy.ndarray):
+        if obj.dtype.hasobject:
+            raise TypeError(
+                f"could not export '{name}': array contains objects")
+        member = name + '.npy'
+        if member in arrays: member = '%s.%i.npy' % (name, len(arrays))
+        arrays[member] = obj
+        return {'__array__': member}
+    if isinstance(obj, numpy.generic):
+        return obj.item()
+    if isinstance(obj, dict):
+        if all(isinstance(key, str) for key in obj):
+            return {key: _encode(val, arrays, name + '/' + key) \
+                for key, val in obj.items()}
+        return {'__items__': [[_encode(key, arrays, name),
+            _encode(val, arrays, name + '/' + _get_name(key))] \
+            for key, val in obj.items()]}
+    if isinstance(obj, tuple):
+        return {'__tuple__': [_encode(val, arrays, '%s/%i' % (name, id)) \
+            for id, val in enumerate(obj)]}
+    if isinstance(obj, list):
+        return [_encode(val, arrays, '%s/%i' % (name, id)) \
+            for id, val in enumerate(obj)]
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+
+    raise TypeError(
+        f"could not export '{name}': unsupported type "
+        f"'{type(obj).__name__}'")
+
+def _get_name(key):
+    """Get name of archive member from dictionary key."""
+    if isinstance(key, tuple):
+        return '-'.join(_get_name(item) for item in key)
+    return str(key)
@@ -24,8 +24,11 @@ __author__ = 'Frootlab Developers'
 __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
-import rian
+import json
+import zipfile
 import numpy
+import rian
+from rian.core import ws
 
 def filetypes():
     """Get supported archive filetypes for system import."""
@@ -37,16 +40,74 @@ def load(path, **kwds):
     return Npz(**kwds).load(path)
 
 class Npz:
-    """Import system from numpy zipped archive."""
+    """Import system from numpy zipped archive.
+
+    Settings:
+        mmap_mode (str): If given, numpy arrays, which are stored uncompressed
+            within the archive, are memory mapped from the file instead of
+            being read into memory. Supported modes are 'r' for reading only,
+            e.g. for inference, and 'c' for copy-on-write. Default: None
+
+    """
 
     settings = None
-    default = {}
+    default = {'mmap_mode': None}
 
     def __init__(self, **kwds):
         self.settings = {**self.default, **kwds}
 
     def load(self, path):
-        copy = numpy.load(path)
-        return {
-            'config': copy['config'].item(),
-            'params': copy['params'].item() }
+        with zipfile.ZipFile(path) as file:
+            pickled = 'system.json' not in file.namelist()
+
+        # archives without 'system.json' contain pickled objects
+        if pickled:
+            with numpy.load(path, allow_pickle=True) as copy:
+                return {
+                    'config': copy['config'].item(),
+                    'params': copy['params'].item() }
+
+        archive = ws.Archive(path)
+        try:
+            with archive.open('system.json') as file:
+                meta = json.load(file)
+            def load(name):
+                return self._load_array(name, archive)
+            return {
+                'config': _decode(meta['config'], load),
+                'params': _decode(meta['params'], load) }
+        finally:
+            archive.close()
+
+    def _load_array(self, name, archive):
+        """Load numpy array from archive member."""
+
+        mode = self.settings['mmap_mode']
+        if mode and archive.getinfo(name).compress_type == zipfile.ZIP_STORED:
+            return archive.memmap(name, mode=mode)
+        with archive.open(name, mode='rb') as file:
+            return numpy.lib.format.read_array(file, allow_pickle = False)
+
+def _decode(obj, load):
+    """Decode system configuration or parameters from JSON object.
+
+    Args:
+        obj: JSON object, as encoded by the system export
+        load: Function, that loads a numpy array by the name of its NPY
+            member. References to NPY members are replaced by its result.
+
+    """
+
+    if isinstance(obj, list):
+        return [_decode(val, load) for val in obj]
+    if not isinstance(obj, dict):
+        return obj
+    if '__array__' in obj:
+        return load(obj['__array__'])
+    if '__tuple__' in obj:
+        return tuple(_decode(val, load) for val in obj['__tuple__'])
+    if '__items__' in obj:
+        return {_decode(key, load): _decode(val, load) \
+            for key, val in obj['__items__']}
+
+    return {key: _decode(val, load) for key, val in obj.items()}
@@ -69,6 +69,21 @@ class TestModule(test.ModuleTest):
         d = array.as_dict(self.x, labels=self.labels)
         self.assertEqual(d, self.d)
 
+    def test_PairView(self) -> None:
+        view = array.PairView(
+            self.x, labels=self.labels, extra={'max': 1.})
+        self.assertEqual(dict(view), {**self.d, 'max': 1.})
+        self.assertEqual(len(view), 2)
+        self.assertEqual(view[('a', 'b')], 1.)
+        self.assertNotIn(('a', 'a'), view)
+        self.assertIs(view.array, self.x)
+
+    def test_as_view(self) -> None:
+        view = array.as_view(self.x, labels=self.labels)
+        self.assertEqual(view, self.d)
+        view = array.as_view(self.x, labels=self.labels, nan=None)
+        self.assertEqual(len(view), 4)
+
     def test_from_tuples(self) -> None:
         x = array.from_tuples(self.tuples) # type: ignore
         self.assertEqual(x.tolist(), self.tuples)
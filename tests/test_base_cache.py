@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Frootlab
+# Copyright (C) 2013-2019 Patrick Michl
+#
+# This file is part of Frootlab Rian, https://www.frootlab.org/rian
+#
+#  Rian is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  Rian is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#  You should have received a copy of the GNU General Public License along with
+#  Rian. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Unittests for module 'rian.base.cache'."""
+
+__copyright__ = '2019 Frootlab'
+__license__ = 'GPLv3'
+__docformat__ = 'google'
+__author__ = 'Frootlab Developers'
+__email__ = 'contact@frootlab.org'
+__authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
+
+import numpy as np
+from hup.base import test
+from rian.base import cache
+
+#
+# Test Cases
+#
+
+class TestModule(test.ModuleTest):
+    module = cache
+
+    def test_Cache(self) -> None:
+        x = np.zeros(100) # 800 bytes
+        lru = cache.Cache(maxsize=2000)
+        self.assertTrue(lru.set('a', x))
+        self.assertTrue(lru.set('b', x))
+        self.assertIs(lru.get('a'), x) # 'b' is least recently used
+        self.assertTrue(lru.set('c', x))
+        self.assertEqual(set(lru._items.keys()), {'a', 'c'})
+        self.assertEqual(lru.size, 1600)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual((lru.hits, lru.misses), (1, 1))
+        self.assertFalse(lru.set('d', np.zeros(1000)))
+        self.assertNotIn('d', lru)
+        lru.clear()
+        self.assertEqual((len(lru), lru.size), (0, 0))
+
+    def test_get_size(self) -> None:
+        x = np.zeros((10, 10))
+        self.assertEqual(cache.get_size(x), 800)
+        self.assertGreater(cache.get_size({'x': x, 'y': [x, x]}), 2400)
+
+    def test_fingerprint(self) -> None:
+        x = np.arange(10.)
+        fp = cache.fingerprint('a', {'b': 1, 'c': x})
+        self.assertIsInstance(fp, str)
+        self.assertEqual(fp, cache.fingerprint('a', {'c': x.copy(), 'b': 1}))
+        self.assertNotEqual(fp, cache.fingerprint('a', {'b': 1, 'c': x + 1.}))
+        self.assertNotEqual(fp, cache.fingerprint('a', {'b': 1, 'c': x[:5]}))
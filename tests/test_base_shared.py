@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Frootlab
+# Copyright (C) 2013-2019 Patrick Michl
+#
+# This file is part of Frootlab Rian, https://www.frootlab.org/rian
+#
+#  Rian is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  Rian is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#  You should have received a copy of the GNU General Public License along with
+#  Rian. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Unittests for module 'rian.base.shared'."""
+
+__copyright__ = '2019 Frootlab'
+__license__ = 'GPLv3'
+__docformat__ = 'google'
+__author__ = 'Frootlab Developers'
+__email__ = 'contact@frootlab.org'
+__authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
+
+import pickle
+import numpy as np
+from hup.base import test
+from rian.base import shared
+
+#
+# Test Cases
+#
+
+class TestModule(test.ModuleTest):
+    module = shared
+
+    def setUp(self) -> None:
+        self.x = np.array([('a', 1.), ('b', 2.)],
+            dtype=[('label', 'U4'), ('value', float)])
+
+    def test_Handle(self) -> None:
+        handle = shared.Handle(name='block', shape=(2, ), dtype=self.x.dtype)
+        self.assertEqual(pickle.loads(pickle.dumps(handle)), handle)
+
+    def test_is_available(self) -> None:
+        self.assertIsInstance(shared.is_available(), bool)
+
+    def test_share(self) -> None:
+        block, y = shared.share(self.x)
+        self.assertTrue(np.all(y == self.x))
+        self.assertFalse(np.shares_memory(y, self.x))
+        del y
+        shared.release(block, unlink=True)
+
+    def test_get_handle(self) -> None:
+        block, y = shared.share(self.x)
+        handle = shared.get_handle(block, y)
+        self.assertEqual(handle.name, block.name)
+        self.assertEqual(handle.shape, self.x.shape)
+        self.assertEqual(np.dtype(handle.dtype), self.x.dtype)
+        del y
+        shared.release(block, unlink=True)
+
+    def test_attach(self) -> None:
+        block, y = shared.share(self.x)
+        handle = pickle.loads(pickle.dumps(shared.get_handle(block, y)))
+        other, z = shared.attach(handle)
+        self.assertEqual(z.dtype, self.x.dtype)
+        self.assertTrue(np.all(z == self.x))
+        y['value'][0] = 3. # changes are visible to attached arrays
+        self.assertEqual(z['value'][0], 3.)
+        del y, z
+        shared.release(other)
+        shared.release(block, unlink=True)
+
+    def test_release(self) -> None:
+        block, y = shared.share(self.x)
+        handle = shared.get_handle(block, y)
+        del y
+        shared.release(block, unlink=True)
+        with self.assertRaises(FileNotFoundError):
+            shared.attach(handle)
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Frootlab
+# Copyright (C) 2013-2019 Patrick Michl
+#
+# This file is part of Frootlab Rian, https://www.frootlab.org/rian
+#
+#  Rian is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  Rian is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#  You should have received a copy of the GNU General Public License along with
+#  Rian. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Unittests for module 'benchmarks.base'."""
+
+__copyright__ = '2019 Frootlab'
+__license__ = 'GPLv3'
+__docformat__ = 'google'
+__author__ = 'Frootlab Developers'
+__email__ = 'contact@frootlab.org'
+__authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
+
+import os
+import tempfile
+from hup.base import test
+from benchmarks import base
+
+#
+# Test Cases
+#
+
+class TestModule(test.ModuleTest):
+    module = base
+
+    def setUp(self) -> None:
+        self.results = {
+            'a[small]': {'time': 1., 'peakmem': 100., 'throughput': 10.},
+            'b[small]': {'time': 2., 'peakmem': 100., 'throughput': 5.}}
+
+    def test_get_columns(self) -> None:
+        inputs, outputs = base.get_columns('small')
+        self.assertEqual(len(inputs), base.scales['small']['inputs'])
+        self.assertEqual(len(outputs), base.scales['small']['outputs'])
+        self.assertFalse(set(inputs) & set(outputs))
+
+    def test_get_dataset(self) -> None:
+        dataset = base.get_dataset('small')
+        inputs, outputs = base.get_columns('small')
+        self.assertEqual(list(dataset.get('columns')), inputs + outputs)
+
+    def test_get_model(self) -> None:
+        model = base.get_model('small', system='ann')
+        self.assertEqual(len(model.system.get('layers')), 3)
+
+    def test_measure(self) -> None:
+        calls = []
+        def func() -> int:
+            calls.append(bytearray(2**16))
+            return 10
+        result = base.measure(func, repeat=2)
+        self.assertEqual(len(calls), 3) # one traced and two timed calls
+        self.assertEqual(set(result), {'time', 'peakmem', 'throughput'})
+        self.assertGreaterEqual(result['peakmem'], 2**16)
+        self.assertGreater(result['throughput'], 0.)
+
+    def test_load_baseline(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'baseline.json')
+            self.assertEqual(base.load_baseline(path), {})
+            base.save_baseline(path, self.results)
+            self.assertEqual(base.load_baseline(path), self.results)
+
+    def test_save_baseline(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'baseline.json')
+            base.save_baseline(path, {'a[small]': self.results['a[small]']})
+            base.save_baseline(path, {'b[small]': self.results['b[small]']})
+            self.assertEqual(base.load_baseline(path), self.results)
+
+    def test_compare(self) -> None:
+        results = {
+            'a[small]': {'time': 1.5, 'peakmem': 100., 'throughput': 6.7},
+            'b[small]': {'time': 2., 'peakmem': 200., 'throughput': 5.},
+            'c[small]': {'time': 9., 'peakmem': 900., 'throughput': 1.}}
+        regressions = base.compare(results, self.results, threshold=.25)
+        self.assertEqual(
+            [(key, name) for key, name, _ in regressions],
+            [('a[small]', 'time'), ('b[small]', 'peakmem')])
+        self.assertAlmostEqual(regressions[0][2], .5)
+        regressions = base.compare(
+            results, self.results, threshold=.25, memthreshold=2.)
+        self.assertEqual(len(regressions), 1)
+        self.assertEqual(base.compare(results, {}), [])
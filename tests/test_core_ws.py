@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Frootlab
+# Copyright (C) 2013-2019 Patrick Michl
+#
+# This file is part of Frootlab Rian, https://www.frootlab.org/rian
+#
+#  Rian is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  Rian is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#  You should have received a copy of the GNU General Public License along with
+#  Rian. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Unittests for module 'rian.core.ws'."""
+
+__copyright__ = '2019 Frootlab'
+__license__ = 'GPLv3'
+__docformat__ = 'google'
+__author__ = 'Frootlab Developers'
+__email__ = 'contact@frootlab.org'
+__authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
+
+import io
+import tempfile
+import zipfile
+from pathlib import Path
+import numpy as np
+from hup.base import test
+from rian.core import ws
+
+#
+# Test Cases
+#
+
+class TestWorkspace(test.ModuleTest):
+    module = ws
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = Path(self.tmpdir.name, 'test.zip')
+        self.array = np.arange(12.).reshape(3, 4)
+        buffer = io.BytesIO()
+        np.save(buffer, self.array)
+        with zipfile.ZipFile(self.filepath, mode='w') as file:
+            file.writestr('workspace.ini', '[dc]\n')
+            file.writestr('data/stored.npy', buffer.getvalue(),
+                compress_type=zipfile.ZIP_STORED)
+            file.writestr('data/deflated.npy', buffer.getvalue(),
+                compress_type=zipfile.ZIP_DEFLATED)
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_Archive(self) -> None:
+        archive = ws.Archive(self.filepath)
+        try:
+            with archive.open('workspace.ini') as file:
+                self.assertEqual(file.read(), '[dc]\n')
+            with self.assertRaises(FileNotFoundError):
+                archive.open('missing.ini')
+            array = archive.memmap('data/stored.npy')
+            self.assertIsInstance(array, np.memmap)
+            self.assertTrue(np.all(array == self.array))
+            del array
+            with self.assertRaises(ValueError):
+                archive.memmap('data/deflated.npy')
+        finally:
+            archive.close()
+
+    def test_Workspace(self) -> None:
+        workspace = ws.Workspace(self.filepath, lazy=True)
+        try:
+            self.assertEqual(
+                workspace.search('data/*'),
+                ['data/deflated.npy', 'data/stored.npy'])
+            self.assertIsInstance(
+                workspace.memmap('data/stored.npy'), np.memmap)
+            self.assertTrue(
+                np.all(workspace.memmap('data/deflated.npy') == self.array))
+        finally:
+            workspace.close()
+
+    def test_Workspace_save(self) -> None:
+        workspace = ws.Workspace(self.filepath, lazy=True)
+        try:
+            size = self.filepath.stat().st_size
+            workspace.write_text('text', 'data/text.txt')
+            self.assertEqual(workspace.changes, ['data/text.txt'])
+            workspace.save()
+            self.assertEqual(workspace.changes, [])
+            self.assertGreater(self.filepath.stat().st_size, size)
+            self.assertEqual(workspace.read_text('data/text.txt'), 'text')
+            workspace.unlink('data/deflated.npy')
+            workspace.save() # Removed members require a compaction
+            with zipfile.ZipFile(self.filepath) as file:
+                self.assertNotIn('data/deflated.npy', file.namelist())
+            self.assertIsInstance(
+                workspace.memmap('data/stored.npy'), np.memmap)
+
+            # A failed compaction closes the previous archive handle and
+            # keeps the workspace file
+            workspace.unlink('data/text.txt')
+            archive = workspace._archive
+            def copy(name, file):
+                raise OSError(name)
+            archive.copy = copy
+            with self.assertRaises(OSError):
+                workspace.save()
+            self.assertIsNone(archive._file.fp)
+            self.assertIsNot(workspace._archive, archive)
+            self.assertFalse(
+                self.filepath.with_name(self.filepath.name + '.tmp').exists())
+            self.assertIsInstance(
+                workspace.memmap('data/stored.npy'), np.memmap)
+        finally:
+            workspace.close()
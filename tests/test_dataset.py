@@ -24,10 +24,12 @@ __author__ = 'Frootlab Developers'
 __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
+import pickle
 import numpy
 import rian
 from hup.base import otree, test
 import rian.dataset
+import rian.model
 
 class TestCase(test.GenericTest):
 
@@ -88,3 +90,86 @@ class TestCase(test.GenericTest):
                 samples=10000)
             test = otree.has_base(dataset, 'Dataset')
             self.assertTrue(test)
+
+    def test_dataset_snapshot(self):
+        dataset = rian.dataset.open('linear', workspace='testsuite')
+        data = dataset.get('data')
+        snapshot = dataset.get('snapshot')
+        tables = dict(dataset._tables)
+        dataset.set('colfilter', visible=dataset.get('columns')[:2])
+        dataset._initialize_normalize('gauss')
+        dataset.set('snapshot', **snapshot)
+        self.assertTrue(numpy.all(dataset.get('data') == data))
+        # the snapshot references the tables instead of copying them
+        for name, table in tables.items():
+            self.assertIs(dataset._tables[name], table)
+
+    def test_dataset_chunks(self):
+        dataset = rian.dataset.open('linear', workspace='testsuite')
+        columns = dataset.get('columns')
+        cols = (columns[:4], columns[4:])
+        data = dataset.get('data', cols=cols)
+        chunks = list(dataset.get('chunks', size=100, cols=cols))
+        for i in range(2):
+            with self.subTest(cols=i):
+                stacked = numpy.vstack([chunk[i] for chunk in chunks])
+                self.assertTrue(numpy.allclose(stacked, data[i]))
+
+    def test_dataset_share(self):
+        dataset = rian.dataset.open('linear', workspace='testsuite')
+        data = dataset.get('data')
+        with rian.dataset.share(dataset) as share:
+            handle = pickle.loads(pickle.dumps(share.handle))
+            attached = rian.dataset.attach(handle)
+            self.assertEqual(
+                attached.get('columns'), dataset.get('columns'))
+            self.assertTrue(numpy.all(attached.get('data') == data))
+            with self.subTest(tables='read-only'):
+                table = list(attached._tables)[0]
+                self.assertFalse(attached._tables[table].flags.writeable)
+            with self.subTest(transform='normalize'):
+                attached._initialize_normalize('gauss', mu=5.)
+                self.assertFalse(
+                    numpy.allclose(attached.get('data'), data))
+                other = rian.dataset.attach(handle)
+                self.assertTrue(numpy.all(other.get('data') == data))
+                self.assertTrue(numpy.all(dataset.get('data') == data))
+                del other
+            del attached
+            rian.dataset.shared.detach(handle)
+        self.assertTrue(share.closed)
+
+    def test_dataset_view(self):
+        model = rian.model.create(
+            dataset='linear', network='shallow', system='ann')
+        mapping = model.system._get_mapping()
+        source = model.dataset.get('data', cols=mapping[0])
+        expect = model.system._get_unitexpect(source, mapping)
+        view = rian.dataset.view(model.dataset, model.system)
+        columns = view.get('columns')
+        table = list(view._tables)[0]
+        labels = view._tables[table]['label'][:10]
+        rows = ['%s:%s' % (table, label) for label in labels]
+
+        with self.subTest(get='data'):
+            data = view.get('data')
+            self.assertTrue(numpy.allclose(data, expect))
+        with self.subTest(filter='cols'):
+            data = view.get('data', cols=columns[1:])
+            self.assertTrue(numpy.allclose(data, expect[:, 1:]))
+        with self.subTest(filter='rows'):
+            data = view.get('data', rows=rows)
+            self.assertTrue(numpy.allclose(data, expect[:10]))
+        with self.subTest(get='copy'):
+            copy = rian.dataset.new(**view.get('copy'))
+            self.assertEqual(copy.get('columns'), columns)
+            self.assertTrue(numpy.allclose(copy.get('data'), expect))
+        with self.subTest(get='chunks'):
+            chunks = list(view.get('chunks', size=100))
+            self.assertTrue(numpy.allclose(numpy.vstack(chunks), expect))
+        with self.subTest(get='chunks', filter='rows'):
+            chunks = list(view.get('chunks', size=3, rows=rows,
+                cols=columns[:1], output=('array', 'rows')))
+            stacked = numpy.vstack([chunk[0] for chunk in chunks])
+            self.assertTrue(numpy.allclose(stacked, expect[:10, :1]))
+            self.assertEqual(len(chunks), 4)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2019 Frootlab
+# Copyright (C) 2013-2019 Patrick Michl
+#
+# This file is part of Frootlab Rian, https://www.frootlab.org/rian
+#
+#  Rian is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  Rian is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+#  A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#  You should have received a copy of the GNU General Public License along with
+#  Rian. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Unittests for module 'rian.math.descent'."""
+
+__copyright__ = '2019 Frootlab'
+__license__ = 'GPLv3'
+__docformat__ = 'google'
+__author__ = 'Frootlab Developers'
+__email__ = 'contact@frootlab.org'
+__authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
+
+import numpy as np
+from rian.math import descent, test
+
+#
+# Test Cases
+#
+
+class TestDescent(test.MathModule):
+    module = descent
+
+    def setUp(self) -> None:
+        self.grad = np.array([[1.0, -0.5], [0.0, 2.0]])
+
+    def assertConverges(self, name: str, **kwds) -> None:
+        # Minimize the squared distance to a target by an update engine
+        target = np.array([[3.0, -1.0], [0.5, 2.0]])
+        engine = descent.Engine(name, **kwds)
+        param = np.zeros(target.shape)
+        for _ in range(1000):
+            engine.update('param', param, 2. * (target - param))
+        self.assertTrue(np.allclose(param, target, atol=1e-2))
+
+    def assertReusesStep(self, func, **kwds) -> None:
+        state: dict = {}
+        step1 = func(self.grad, state, **kwds)
+        step2 = func(self.grad, state, **kwds)
+        self.assertEqual(step1.shape, self.grad.shape)
+        self.assertIs(step1, step2)
+
+    def test_Rule(self) -> None:
+        pass # Testing is not required for Catalog Categories
+
+    def test_rules(self) -> None:
+        rules = descent.rules()
+        self.assertIsInstance(rules, list)
+        self.assertTrue(rules)
+
+    def test_step(self) -> None:
+        for name in descent.rules():
+            with self.subTest(name=name):
+                step = descent.step(self.grad, {}, name=name)
+                self.assertEqual(step.shape, self.grad.shape)
+
+    def test_sgd(self) -> None:
+        self.assertReusesStep(descent.sgd)
+        step = descent.sgd(self.grad, {}, rate=.5)
+        self.assertTrue(np.allclose(step, .5 * self.grad))
+        self.assertConverges('sgd', rate=.1)
+
+    def test_momentum(self) -> None:
+        self.assertReusesStep(descent.momentum)
+        state: dict = {}
+        descent.momentum(self.grad, state, rate=1., beta=.5)
+        step = descent.momentum(self.grad, state, rate=1., beta=.5)
+        self.assertTrue(np.allclose(step, 1.5 * self.grad))
+        self.assertConverges('momentum', rate=.05)
+
+    def test_nesterov(self) -> None:
+        self.assertReusesStep(descent.nesterov)
+        step = descent.nesterov(self.grad, {}, rate=1., beta=.5)
+        self.assertTrue(np.allclose(step, 1.5 * self.grad))
+        self.assertConverges('nesterov', rate=.05)
+
+    def test_rmsprop(self) -> None:
+        self.assertReusesStep(descent.rmsprop)
+        self.assertConverges('rmsprop', rate=.01)
+
+    def test_adam(self) -> None:
+        self.assertReusesStep(descent.adam)
+        step = descent.adam(self.grad, {}, rate=.1)
+        self.assertTrue(np.allclose(step, .1 * np.sign(self.grad), atol=1e-6))
+        self.assertConverges('adam', rate=.1)
+
+    def test_rprop(self) -> None:
+        self.assertReusesStep(descent.rprop)
+        state: dict = {}
+        step = descent.rprop(self.grad, state, init_rate=.1)
+        self.assertTrue(np.allclose(step, .1 * np.sign(self.grad)))
+        step = descent.rprop(-self.grad, state, accel=(.5, 1., 1.2))
+        self.assertTrue(np.allclose(step, -.05 * np.sign(self.grad)))
+        self.assertConverges('rprop')
+
+    def test_Engine(self) -> None:
+        engine = descent.Engine('sgd', rate=1., unknown=None)
+        param = np.zeros(self.grad.shape)
+        engine.update('param', param, self.grad)
+        self.assertTrue(np.allclose(param, self.grad))
+        self.assertIn('param', engine.states)
+        engine.reset()
+        self.assertFalse(engine.states)
+        with self.assertRaises(ValueError):
+            descent.Engine('unknown')
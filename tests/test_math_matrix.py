@@ -25,6 +25,7 @@ __author__ = 'Frootlab Developers'
 __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
+import numpy as np
 from rian.math import matrix, test
 
 #
@@ -77,3 +78,14 @@ class TestMatrix(test.MathModule):
             for q in range(1, 5):
                 with self.subTest(p=p, q=q):
                     self.assertIsMatrixDistance(matrix.pq_dist, p=p, q=q)
+
+    def test_corrcoef(self) -> None:
+        x = np.random.normal(size=(50, 3))
+        y = np.hstack([x[:, :2] + np.random.normal(size=(50, 2)), x[:, :2]])
+        corr = np.corrcoef(np.hstack([x, y]).T)[:3, 3:]
+        self.assertTrue(np.allclose(matrix.corrcoef(x, y), corr))
+        self.assertTrue(
+            np.allclose(matrix.corrcoef(x, y, chunksize=7), corr))
+        self.assertEqual(matrix.corrcoef(x, y).shape, (3, 4))
+        with self.assertRaises(ValueError):
+            matrix.corrcoef(x, y[:10])
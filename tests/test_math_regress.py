@@ -25,7 +25,8 @@ __author__ = 'Frootlab Developers'
 __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
-from rian.math import regress, test
+import numpy as np
+from rian.math import regress, test, vector
 
 #
 # Test Cases
@@ -37,6 +38,23 @@ class TestRegress(test.MathModule):
     def test_Error(self) -> None:
         pass # Not required to test
 
+    def test_Statistics(self) -> None:
+        x = np.random.RandomState(0).normal(size=(100, 3))
+        y = np.random.RandomState(1).normal(size=(100, 3))
+        stats = regress.Statistics(p=3.)
+        for i in range(0, 100, 30):
+            stats.update(x[i:i + 30] - y[i:i + 30])
+        for name in ['sad', 'rss', 'mse', 'mae', 'rmse']:
+            with self.subTest(name=name):
+                self.assertTrue(np.allclose(
+                    stats.error(name), regress.error(x, y, name=name)))
+        for norm in vector.norms():
+            with self.subTest(norm=norm):
+                self.assertTrue(np.allclose(
+                    stats.length(norm),
+                    vector.length(x - y, norm=norm, p=3.)))
+        self.assertTrue(np.allclose(stats.length('SD'), np.std(x - y, 0)))
+
     def test_errors(self) -> None:
         errs = regress.errors()
         self.assertIsInstance(errs, list)
@@ -24,6 +24,15 @@ __author__ = 'Frootlab Developers'
 __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
+import concurrent.futures
+import http.client
+import json
+import os
+import tempfile
+import threading
+import time
+import zipfile
+import numpy
 import rian
 from hup.base import otree
 from hup.base import test
@@ -68,3 +77,291 @@ class TestCase(test.GenericTest):
             model.optimize()
             test = model.error < 0.5
             self.assertTrue(test)
+
+        with self.subTest(step='optimize dbn with pretraining pipeline'):
+            model = rian.model.create(
+                dataset='linear', network='deep', system='dbn')
+            columns = model.dataset.get('columns')
+            data = model.dataset.get('data')
+            model.optimize(pretraining_pipeline=True,
+                pretraining_pipeline_warmup=100)
+            self.assertLess(model.error, 0.5)
+            # the dataset is restored after the layerwise pretraining
+            self.assertEqual(model.dataset.get('columns'), columns)
+            self.assertTrue(numpy.all(model.dataset.get('data') == data))
+
+    def test_model_archive(self) -> None:
+        model = rian.model.create(
+            dataset='linear', network='shallow', system='ann')
+        with tempfile.TemporaryDirectory() as dirname:
+            path = os.path.join(dirname, 'test.npz')
+            with self.subTest(step='save model with dataset reference'):
+                rian.model.save(model, path, compress=False)
+                self.assertEqual(len(os.listdir(dirname)), 2)
+            with self.subTest(step='store components without pickling'):
+                with zipfile.ZipFile(path) as file:
+                    names = file.namelist()
+                self.assertIn('system.json', names)
+                self.assertFalse([name for name in names
+                    if name.endswith('.npy') and name.count('/') == 0])
+            with self.subTest(step='load model components lazily'):
+                copy = rian.model.load(path, mmap_mode='c')
+                self.assertEqual(
+                    set(copy), {'config', 'dataset', 'network', 'system'})
+                loaded = rian.model.new(copy)
+                self.assertTrue(otree.has_base(loaded, 'Model'))
+                self.assertAlmostEqual(loaded.error, model.error)
+            with self.subTest(step='open model'):
+                loaded = rian.model.open(path)
+                self.assertAlmostEqual(loaded.error, model.error)
+            with self.subTest(step='cache dataset hash'):
+                fingerprint = model.dataset.get('fingerprint')
+                digest = rian.model.exports.archive._digests.get(fingerprint)
+                self.assertIn(digest, ''.join(os.listdir(dirname)))
+            with self.subTest(step='reject unsupported version'):
+                with zipfile.ZipFile(path) as file:
+                    members = {name: file.read(name)
+                        for name in file.namelist()}
+                manifest = json.loads(members['manifest.json'])
+                members['manifest.json'] = json.dumps(
+                    {**manifest, 'version': 1})
+                with zipfile.ZipFile(path, mode='w') as file:
+                    for name, data in members.items():
+                        file.writestr(name, data)
+                with self.assertRaises(ValueError):
+                    rian.model.load(path)
+
+    def test_model_stop(self) -> None:
+        model = rian.model.create(
+            dataset='linear', network='shallow', system='ann')
+        config = {'updates': 5000, 'tracker_obj_init_wait': 0.,
+            'tracker_obj_update_interval': 10, 'key_events_enable': False}
+        criterions = {
+            'patience': {'tracker_obj_stop_patience': 3,
+                'tracker_obj_stop_min_delta': 1.},
+            'window': {'tracker_obj_stop_window': 3,
+                'tracker_obj_stop_rel_delta': 10.},
+            'updates': {'updates': 50}}
+        for reason, kwds in criterions.items():
+            with self.subTest(stop_reason=reason):
+                optimizer = rian.model.morphisms.new(model)
+                optimizer.optimize(**{**config, **kwds})
+                self.assertEqual(
+                    model.get('config', 'stop_reason'), reason)
+                self.assertLess(optimizer.get('epoch'), 5000)
+
+    def test_model_evaluation_chunks(self) -> None:
+        model = rian.model.create(
+            dataset='linear', network='shallow', system='ann')
+        evaluation = rian.model.evaluation.new(model)
+        mapping = model.system._get_mapping()
+        src, tgt = model.dataset.get('data', cols=(mapping[0], mapping[-1]))
+        error = evaluation.uniterror((src, tgt), mapping=mapping)
+        with self.subTest(data='list'):
+            value = evaluation.uniterror([src, tgt], mapping=mapping)
+            self.assertTrue(numpy.allclose(value, error))
+        with self.subTest(data='chunks'):
+            chunks = [(src[:100], tgt[:100]), (src[100:], tgt[100:])]
+            value = evaluation.uniterror(chunks, mapping=mapping)
+            self.assertTrue(numpy.allclose(value, error))
+
+    def test_model_relation_cache(self) -> None:
+        model = rian.model.create(
+            dataset='linear', network='shallow', system='ann')
+        evaluation = rian.model.evaluation.new(model)
+        evaluate = lambda: evaluation.evaluate(
+            'relation', 'correlation', format='array')
+        relation = evaluate()
+        with self.subTest(cached='copy'):
+            cached = evaluate()
+            self.assertIsNot(cached, relation)
+            self.assertTrue(numpy.allclose(cached, relation))
+        with self.subTest(modified='tables'):
+            version = model.dataset.get('tables_version')
+            model.dataset._initialize_transform('binary')
+            self.assertNotEqual(model.dataset.get('tables_version'), version)
+            self.assertFalse(numpy.allclose(evaluate(), relation))
+        with self.subTest(modified='params'):
+            version = model.system.get('params_version')
+            params = model.system.get('copy', 'params')
+            model.system.set('copy', params=params)
+            self.assertNotEqual(model.system.get('params_version'), version)
+        with self.subTest(modified='system'):
+            other = rian.model.create(
+                dataset='linear', network='shallow', system='ann')
+            self.assertNotEqual(other.system.get('params_version'),
+                model.system.get('params_version'))
+
+    def test_model_checkpoint(self) -> None:
+        model = rian.model.create(
+            dataset='linear', network='shallow', system='ann')
+        with tempfile.TemporaryDirectory() as dirname:
+            path = os.path.join(dirname, 'checkpoint.npz')
+            with self.subTest(step='write checkpoints'):
+                model.optimize(updates=200, checkpoint_path=path,
+                    checkpoint_updates=50, bprop_rate=.05)
+                self.assertTrue(os.path.exists(path))
+                with zipfile.ZipFile(path) as file:
+                    self.assertIn('checkpoint.json', file.namelist())
+                state = rian.model.morphisms.base._read_checkpoint(path)
+                self.assertEqual(state['buffer']['epoch'], 200)
+                self.assertEqual(state['rates']['bprop_rate'], .05)
+            with self.subTest(step='resume from checkpoint'):
+                optimizer = rian.model.morphisms.new(model)
+                optimizer.optimize(updates=300, checkpoint_path=path,
+                    checkpoint_resume=True)
+                self.assertEqual(optimizer.get('epoch'), 300)
+                self.assertEqual(optimizer.get('config')['bprop_rate'], .05)
+            with self.subTest(step='resume with explicit rates'):
+                optimizer = rian.model.morphisms.new(model)
+                optimizer.optimize(updates=400, checkpoint_path=path,
+                    checkpoint_resume=True, bprop_rate=.2)
+                self.assertEqual(optimizer.get('epoch'), 400)
+                self.assertEqual(optimizer.get('config')['bprop_rate'], .2)
+
+    def test_model_bprop_parallel(self) -> None:
+        model = rian.model.create(
+            dataset='linear', network='shallow', system='ann')
+        params = {}
+        for workers in [0, 2]:
+            with self.subTest(bprop_workers=workers):
+                copy = rian.model.copy(model)
+                numpy.random.seed(0)
+                copy.optimize(algorithm='bprop', updates=20,
+                    bprop_workers=workers, key_events_enable=False)
+                params[workers] = copy.system.get('copy')['params']
+        for key, links in params[0]['links'].items():
+            self.assertTrue(
+                numpy.allclose(links['W'], params[2]['links'][key]['W']))
+
+    def test_model_predict(self) -> None:
+        model = rian.model.create(
+            dataset='linear', network='shallow', system='ann')
+        mapping = model.system._get_mapping()
+        data = model.dataset.get('data', cols=mapping[0])
+        expect = model.system._get_unitexpect(data, mapping)
+        with self.subTest(source='dataset'):
+            values = model.predict(chunksize=100)
+            self.assertTrue(numpy.allclose(values, expect))
+        with self.subTest(source='array', pool='thread'):
+            values = model.predict(data, chunksize=100, workers=2)
+            self.assertTrue(numpy.allclose(values, expect))
+        with self.subTest(source='array', pool='process'):
+            values = model.predict(
+                data, chunksize=100, workers=2, pool='process')
+            self.assertTrue(numpy.allclose(values, expect))
+        with self.subTest(source='array', output='array'):
+            out = numpy.zeros((len(data) + 10, expect.shape[1]))
+            values = model.predict(data, chunksize=100, out=out)
+            self.assertTrue(numpy.allclose(out[:len(data)], expect))
+            self.assertFalse(numpy.any(out[len(data):]))
+            self.assertIs(values, out)
+            with self.assertRaises(ValueError):
+                model.predict(data, chunksize=100, out=out[:10])
+        with self.subTest(source='iterator', output='file'):
+            with tempfile.TemporaryDirectory() as dirname:
+                path = os.path.join(dirname, 'values.npy')
+                model.predict(iter([data]), chunksize=100, out=path)
+                self.assertTrue(numpy.allclose(numpy.load(path), expect))
+
+    def test_model_score(self) -> None:
+        models = {name: rian.model.create(
+            dataset='linear', network='shallow', system='ann')
+            for name in ['a', 'b']}
+        scores = rian.model.score(models, chunksize=100)
+        for name, model in models.items():
+            with self.subTest(model=name):
+                values = model.predict(models['a'].dataset)
+                self.assertTrue(numpy.allclose(scores[name], values))
+        self.assertEqual(len(scores['label']), len(values))
+        with self.subTest(stack=False):
+            unstacked = rian.model.score(models, chunksize=100, stack=False)
+            for name in models:
+                self.assertTrue(
+                    numpy.allclose(unstacked[name], scores[name]))
+        with self.subTest(stack='unsupported'):
+            model = rian.model.copy(models['a'])
+            mapping = model.system._get_mapping()
+            model.system._units[mapping[1]].params['class'] = 'softmax'
+            self.assertFalse(rian.model.inference._get_stackable(model))
+            with self.assertRaises(ValueError):
+                rian.model.inference._get_stack([models['a'], model])
+
+    def test_model_server(self) -> None:
+        model = rian.model.create(
+            dataset='linear', network='shallow', system='ann')
+        mapping = model.system._get_mapping()
+        data = model.dataset.get('data', cols=mapping[0])[:20]
+        expect = model.system._get_unitexpect(data, mapping)
+        with self.subTest(api='batcher'):
+            values = [None] * len(data)
+            with rian.model.server.Batcher(model, latency=.05) as batcher:
+                def request(i):
+                    values[i] = batcher.predict(data[i])
+                threads = [threading.Thread(target=request, args=(i, ))
+                    for i in range(len(data))]
+                for thread in threads: thread.start()
+                for thread in threads: thread.join()
+                stats = batcher.get('stats')
+            self.assertTrue(numpy.allclose(numpy.vstack(values), expect))
+            self.assertEqual(stats['requests'], len(data))
+            self.assertLess(stats['batches'], len(data))
+        with self.subTest(api='http'):
+            with rian.model.server.Server(model) as server:
+                conn = http.client.HTTPConnection(*server.address)
+                conn.request('POST', '/predict',
+                    json.dumps({'data': data.tolist()}))
+                response = conn.getresponse()
+                values = json.loads(response.read())['values']
+                conn.close()
+            self.assertEqual(response.status, 200)
+            self.assertTrue(numpy.allclose(values, expect))
+        with self.subTest(api='http', error='internal'):
+            with rian.model.server.Server(model) as server:
+                def predict(data):
+                    raise RuntimeError("failed")
+                server.batcher.predict = predict
+                conn = http.client.HTTPConnection(*server.address)
+                conn.request('POST', '/predict',
+                    json.dumps({'data': data.tolist()}))
+                response = conn.getresponse()
+                error = json.loads(response.read())['error']
+                conn.close()
+            self.assertEqual(response.status, 500)
+            self.assertEqual(error, 'failed')
+        with self.subTest(api='http', address='socket'):
+            with tempfile.TemporaryDirectory() as dirname:
+                path = os.path.join(dirname, 'server.sock')
+                with open(path, 'w') as file: file.write('data')
+                with self.assertRaises(FileExistsError):
+                    rian.model.server.Server(model, path)
+                with open(path) as file:
+                    self.assertEqual(file.read(), 'data')
+                os.remove(path)
+                with rian.model.server.Server(model, path):
+                    self.assertTrue(os.path.exists(path))
+                self.assertFalse(os.path.exists(path))
+        with self.subTest(api='batcher', state='stopped'):
+            batcher = rian.model.server.Batcher(model)
+            future = concurrent.futures.Future()
+            batcher._queue.put(None) # request behind the sentinel
+            batcher._queue.put((data[:1], future, time.time()))
+            batcher.start()
+            batcher.stop()
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=1.)
+            with self.assertRaises(RuntimeError):
+                batcher.submit(data[0])
+
+    def test_model_sweep(self) -> None:
+        model = rian.model.create(
+            dataset='linear', network='shallow', system='ann')
+        space = {'algorithm': ['bprop', 'rprop']}
+        for workers in [0, 2]:
+            with self.subTest(workers=workers):
+                trials = rian.model.sweep(
+                    model, space, updates=8, rungs=2, eta=2, workers=workers)
+                self.assertEqual(len(trials), 2)
+                self.assertEqual(trials[0]['rung'], 1)
+                self.assertEqual(trials[0]['updates'], 8)
+                self.assertEqual(trials[1]['updates'], 4)
@@ -24,6 +24,8 @@ __author__ = 'Frootlab Developers'
 __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
+import networkx
+import numpy
 import rian
 from hup.base import otree
 from hup.base import test
@@ -45,3 +47,72 @@ class TestCase(test.GenericTest):
                 visible_nodes=['v1', 'v2', 'v3'], visible_type='gauss',
                 hidden_nodes=['h1', 'h2'], hidden_type='sigmoid')
             self.assertTrue(otree.has_base(network, 'Network'))
+
+    def test_network_get(self) -> None:
+        network = rian.network.create('autoencoder',
+            columns=['v1', 'v2', 'v3'], shape=[6, 3, 6])
+        nodes = network.get('nodes')
+        with self.subTest(get='nodes'):
+            layers = network.get('nodes', groupby='layer')
+            self.assertEqual(sum(layers, []), nodes)
+            self.assertEqual(network.get('nodes', layer='h2'), layers[2])
+            visible = network.get('nodes', visible=True)
+            self.assertEqual(visible, layers[0] + layers[-1])
+        with self.subTest(get='layers'):
+            self.assertEqual(network.get('layers', visible=True), ['i', 'o'])
+        with self.subTest(get='edges'):
+            edges = network.get('edges', groupby='layer')
+            self.assertEqual(sum(edges, []), network.get('edges'))
+
+    def test_network_graph(self) -> None:
+        network = rian.network.create('autoencoder',
+            columns=['v%i' % i for i in range(100)], shape=[300, 30, 300])
+        config = network._config
+        layers = config['layer']
+
+        # create graph node by node and edge by edge
+        graph = networkx.DiGraph()
+        order = 0
+        for layer_id, layer in enumerate(layers):
+            for sub_id, node in enumerate(config['nodes'][layer]):
+                name = layer + ':' + node
+                graph.add_node(name, label=name, params={
+                    **config['layers'][layer], 'label': node,
+                    'layer': layer, 'order': order, 'layer_id': layer_id,
+                    'layer_sub_id': sub_id})
+                order += 1
+        order = 0
+        for layer_id, edge_layer in enumerate(zip(layers[:-1], layers[1:])):
+            src_layer, tgt_layer = edge_layer
+            for src, tgt in config['edges'][edge_layer]:
+                graph.add_edge(src_layer + ':' + src, tgt_layer + ':' + tgt,
+                    weight=0., params={'order': order, 'layer': edge_layer,
+                    'layer_id': layer_id})
+                order += 1
+
+        self.assertGreater(graph.number_of_edges(), 10000)
+        self.assertEqual(
+            list(network._graph.nodes(data=True)),
+            list(graph.nodes(data=True)))
+        self.assertEqual(
+            list(network._graph.edges(data=True)),
+            list(graph.edges(data=True)))
+
+    def test_network_arrays(self) -> None:
+        network = rian.network.create('autoencoder',
+            columns=['v1', 'v2', 'v3'], shape=[6, 3, 6])
+        arrays = network.get('arrays')
+        nodes = arrays['nodes']
+        self.assertEqual(nodes, network.get('nodes'))
+        edges = [(nodes[src], nodes[tgt])
+            for src, tgt in zip(arrays['source'], arrays['target'])]
+        self.assertEqual(edges, network.get('edges'))
+        layers = network.get('layers')
+        for lid, layer in enumerate(layers):
+            with self.subTest(layer=layer):
+                ids = numpy.flatnonzero(arrays['layer_id'] == lid)
+                self.assertEqual([nodes[i] for i in ids],
+                    network.get('nodes', layer=layer))
+        self.assertTrue(numpy.all(arrays['edge_layer_id']
+            == arrays['layer_id'][arrays['source']]))
+        self.assertIs(network.get('arrays'), arrays)
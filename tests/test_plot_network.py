@@ -81,3 +81,15 @@ class TestNetwork(test.ModuleTest):
         self.assertEqual(layout, self.pos1)
         layout = network.Graph2D.get_layer_layout(self.G, direction='down')
         self.assertEqual(layout, self.pos2)
+        layout = network.Graph2D.get_layer_layout(self.G, method='median')
+        self.assertEqual(layout, self.pos1)
+        layout = network.Graph2D.get_layer_layout(self.G, assignment=2)
+        self.assertEqual(layout, self.pos1)
+
+    def test_Graph2D_get_lod_edges(self) -> None:
+        plot = network.Graph2D(lod_edge_threshold=.5, edge_curvature=0.)
+        segments, widths, colors = plot.get_lod_edges(self.G, self.pos3, 1.)
+        plot.release()
+        self.assertEqual(segments.shape, (2, 2, 2))
+        self.assertEqual(list(widths), [.9, .9])
+        self.assertEqual(colors.shape, (2, 4))
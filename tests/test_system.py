@@ -24,6 +24,9 @@ __author__ = 'Frootlab Developers'
 __email__ = 'contact@frootlab.org'
 __authors__ = ['Patrick Michl <patrick.michl@frootlab.org>']
 
+import os
+import tempfile
+import numpy
 import rian
 from hup.base import otree
 from hup.base import test
@@ -38,3 +41,50 @@ class TestCase(test.GenericTest):
             system = rian.system.open('dbn', workspace='testsuite')
             test = otree.has_base(system, 'System')
             self.assertTrue(test)
+
+    def test_system_archive(self) -> None:
+        model = rian.model.create(
+            dataset='linear', network='shallow', system='ann')
+        links = model.system.get('copy', 'params')['links']
+        with tempfile.TemporaryDirectory() as dirname:
+            path = os.path.join(dirname, 'test.npz')
+            rian.system.save(model.system, path, compress=False,
+                dtype='float32')
+            copy = rian.system.load(path, mmap_mode='r')
+            for key, params in links.items():
+                W = copy['params']['links'][key]['W']
+                self.assertEqual(W.dtype, numpy.float32)
+                self.assertTrue(numpy.allclose(W, params['W'], atol=1e-6))
+
+    def test_system_adjacency(self) -> None:
+        model = rian.model.create(
+            dataset='linear', network='deep', system='dbn')
+        units = model.system._params['units']
+        links = model.system._params['links']
+
+        # adjacency matrices from iteration over edges
+        expect = {key: numpy.zeros(link['A'].shape)
+            for key, link in links.items()}
+        for src, tgt in model.network.edges:
+            for lid in range(len(units) - 1):
+                if src in units[lid]['id']:
+                    sid = units[lid]['id'].index(src)
+                    tid = units[lid + 1]['id'].index(tgt)
+                    expect[(lid, lid + 1)][sid, tid] = 1.
+                    break
+        self.assertGreater(len(expect), 2)
+        for key, A in expect.items():
+            with self.subTest(links=key):
+                self.assertTrue(numpy.array_equal(links[key]['A'], A))
+
+        with self.subTest(edge='invalid'):
+            network = rian.network.create('autoencoder',
+                columns=['v1', 'v2', 'v3'], shape=[6, 3, 6])
+            layers = network.get('nodes', groupby='layer')
+            network._graph.add_edge(layers[0][0], layers[2][0], params={
+                'order': network._graph.number_of_edges(),
+                'layer': None, 'layer_id': 0})
+            network._update_index()
+            system = rian.system.new(config={'type': 'ann.ANN'})
+            with self.assertRaises(ValueError):
+                system._set_params(network=network)